@@ -6,12 +6,13 @@ from .core import CoreRuntime
 
 
 try:
-    from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig, TextIteratorStreamer
+    from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig, TextIteratorStreamer, set_seed
     import torch
 
 
     class BinRuntime(CoreRuntime):
         __cache_dir = os.path.join(os.path.dirname(__file__), ".cache")
+        __seed_lock = threading.Lock()  # the torch RNG is process-wide: seeded runs must not interleave
 
         def __init__(self,
             model_id: str,
@@ -31,6 +32,7 @@ try:
             self.context_length = context_length
             self.tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
             save_path = os.path.join(self.__cache_dir, model_id)
+            self.model_path = save_path
 
             kwargs['device_map'] = device_map
             kwargs['cache_dir'] = cache_dir
@@ -60,6 +62,7 @@ try:
             stream: bool = False,
             max_new_tokens: int = 512,
             repeat_penalty: float = 1.0,
+            seed: Optional[int] = None,
             **kwargs
         ) -> Union[Generator[str, None, None], str]:
             prompt = self.tokenizer.apply_chat_template(
@@ -70,23 +73,28 @@ try:
             )
             inputs = self.tokenizer.encode(prompt, return_tensors="pt").to(self.model.device)
             streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True) if stream else None
+            sampling = temperature > 0  # greedy decoding at temperature 0
             generation_kwargs = dict(
                 input_ids=inputs,
                 max_new_tokens=max_new_tokens,
-                temperature=temperature if temperature > 0 else None,
-                top_p=top_p,
-                top_k=top_k,
-                min_p=min_p,
-                typical_p=typical_p,
                 repetition_penalty=repeat_penalty,
                 streamer=streamer,
-                do_sample=True,
+                do_sample=sampling,
                 pad_token_id=self.tokenizer.eos_token_id
             )
+            if sampling:
+                generation_kwargs.update(temperature=temperature, top_p=top_p, top_k=top_k, min_p=min_p, typical_p=typical_p)
             generation_kwargs.update(kwargs)
 
+            def generate(**generation_kwargs):
+                if not sampling or seed is None:
+                    return self.model.generate(**generation_kwargs)
+                with self.__seed_lock:
+                    set_seed(seed)
+                    return self.model.generate(**generation_kwargs)
+
             if stream:
-                thread = threading.Thread(target=self.model.generate, kwargs=generation_kwargs)
+                thread = threading.Thread(target=generate, kwargs=generation_kwargs)
                 thread.start()
 
                 try:
@@ -95,7 +103,7 @@ try:
                 finally:
                     thread.join()
             else:
-                outputs = self.model.generate(**generation_kwargs)
+                outputs = generate(**generation_kwargs)
                 return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
 
 
@@ -2,6 +2,7 @@
 Core Runtime for managing backend implementations.
 """
 from typing import Optional, List, Dict, Union, Generator
+import hashlib
 import os
 
 
@@ -11,6 +12,10 @@ class CoreRuntime:
 
     DUMMY_BACKEND = None
 
+    model_id: str = ""
+    model_path: Optional[str] = None  # local weights, set by the backends once loaded
+    __model_hash: Optional[tuple] = None  # (model_path, hash) of the last computation
+
     @classmethod
     def register_backend(cls, backend_name: str, backend_class: type, default: bool = False):
         """
@@ -51,6 +56,28 @@ class CoreRuntime:
             backend = cls.__backends.get(backend_str, cls.__backends[cls.__default_backend])
         return super().__new__(backend)
 
+    @property
+    def model_hash(self) -> str:
+        """
+        Identity of the loaded weights: backend, model id and the size and modification time
+        of the local weight files (hashing gigabytes of weights on every start would be too slow).
+        Computed once per loaded model path.
+        """
+        if self.__model_hash is not None and self.__model_hash[0] == self.model_path:
+            return self.__model_hash[1]
+        files = []
+        if self.model_path and os.path.isdir(self.model_path):
+            for root, _, names in os.walk(self.model_path):
+                files.extend(os.path.join(root, name) for name in names)
+        elif self.model_path and os.path.isfile(self.model_path):
+            files.append(self.model_path)
+        parts = [type(self).__name__, self.model_id]
+        for file in sorted(files):
+            stat = os.stat(file)
+            parts.append(f"{os.path.relpath(file, os.path.dirname(self.model_path))}:{stat.st_size}:{int(stat.st_mtime)}")
+        self.__model_hash = (self.model_path, hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16])
+        return self.__model_hash[1]
+
     def __call__(
         self,
         messages: List[Dict[str, str]],
@@ -63,8 +90,13 @@ class CoreRuntime:
         stream: bool = False,
         max_new_tokens: int = 512,
         repeat_penalty: float = 1.0,
+        seed: Optional[int] = None,
         **kwargs
     ) -> Union[Generator[str, None, None], str]:
+        """
+        Generate a reply. Decoding is greedy when `temperature` is 0; otherwise a `seed` makes
+        sampling reproducible and None samples with a random seed.
+        """
         raise NotImplementedError("The generate method must be implemented by subclasses.")
 
 
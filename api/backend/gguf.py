@@ -51,6 +51,7 @@ try:
                     kwargs_copy['n_gpu_layers'] = n_layers
 
                     self.model = Llama.from_pretrained(**kwargs_copy)
+                    self.model_path = self.model.model_path
 
                     print(f"INFO:     Model {model_id} loaded with {n_layers} GPU layers.")
 
@@ -85,6 +86,7 @@ try:
             stream: bool = False,
             max_new_tokens: int = 512,
             repeat_penalty: float = 1.0,
+            seed: Optional[int] = None,
             **kwargs
         ) -> Union[Generator[str, None, None], str]:
             generation_kwargs = dict(
@@ -99,6 +101,8 @@ try:
                 repeat_penalty=repeat_penalty,
                 stream=stream
             )
+            if seed is not None:  # llama.cpp decodes greedily at temperature 0 by itself
+                generation_kwargs['seed'] = seed
             generation_kwargs.update(kwargs)
             outputs = self.model.create_chat_completion(**generation_kwargs)
 
@@ -17,7 +17,10 @@ PublikaiFunctions = FunctionCalling(
                     }
                 },
                 "required": []
-            }
+            },
+            timeout=45,
+            max_concurrency=2,
+            cache_ttl=3600
         ),
         FunctionSchema(
             name="get_business_information",
@@ -32,7 +35,10 @@ PublikaiFunctions = FunctionCalling(
                     }
                 },
                 "required": []
-            }
+            },
+            timeout=45,
+            max_concurrency=2,
+            cache_ttl=3600
         ),
         FunctionSchema(
             name="get_center_notices",
@@ -52,7 +58,10 @@ PublikaiFunctions = FunctionCalling(
                     }
                 },
                 "required": []
-            }
+            },
+            timeout=45,
+            max_concurrency=2,
+            cache_ttl=600
         ),
         FunctionSchema(
             name="get_upcoming_programs",
@@ -67,7 +76,10 @@ PublikaiFunctions = FunctionCalling(
                     }
                 },
                 "required": []
-            }
+            },
+            timeout=45,
+            max_concurrency=2,
+            cache_ttl=900
         ),
         FunctionSchema(
             name="get_program_history",
@@ -82,7 +94,10 @@ PublikaiFunctions = FunctionCalling(
                     }
                 },
                 "required": []
-            }
+            },
+            timeout=45,
+            max_concurrency=2,
+            cache_ttl=900
         ),
         FunctionSchema(
             name="get_tour_information",
@@ -107,7 +122,10 @@ PublikaiFunctions = FunctionCalling(
                     }
                 },
                 "required": []
-            }
+            },
+            timeout=45,
+            max_concurrency=2,
+            cache_ttl=3600
         ),
         FunctionSchema(
             name="subscribe_newsletter",
@@ -135,7 +153,9 @@ PublikaiFunctions = FunctionCalling(
                     }
                 },
                 "required": ["nick", "email", "name"]
-            }
+            },
+            timeout=45,
+            max_concurrency=2
         )
     ] + FunctionCalling.DEFAULT.schemas,
     implementations=dict(
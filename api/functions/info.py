@@ -1,4 +1,3 @@
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 import sys
@@ -6,11 +5,13 @@ import os
 import re
 
 try:
-    from ..utils import web_search
+    from .mirror import site_mirror, describe_freshness
+    from ..utils.fanout import fetch_all, RetryPolicy
 except ImportError:
     parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sys.path.insert(0, parent)
-    from utils import web_search
+    from mirror import site_mirror, describe_freshness
+    from utils.fanout import fetch_all, RetryPolicy
 
 
 dashboard_center_description = ""
@@ -23,20 +24,19 @@ def get_center_information(retry: int = 3) -> str:
         "https://www.cheonanurc.or.kr/128"
     ]
 
+    # The three pages are fetched in parallel; pages still missing at the deadline are left out
+    outcomes = fetch_all(lambda url: site_mirror.fetch_webpage(url, length_limit=-1), urls, deadline=20, retry=RetryPolicy(attempts=retry))
+
     results = [dashboard_center_description]
-    for url in urls:
-        for attempt in range(retry):
-            try:
-                data = web_search.fetch_webpage(url, length_limit=-1)
-                if "text_content" in data:
-                    data = data["text_content"].split("Copyrightⓒ")[0].strip()
-                    data = data.split("천안시 도시재생지원센터 site search")[-1].strip()
-                    results.append(data)
-            except requests.RequestException as e:
-                if attempt == retry - 1:
-                    return "홈페이지가 현재 접속되지 않아 정보 조회에 실패했습니다.. 나중에 다시 시도해주세요."
-                else:
-                    print(f"웹 페이지 가져오기 실패: {e}. 재시도 중... ({attempt + 1}/{retry})")
+    for url, outcome in outcomes.items():
+        if outcome.ok:
+            results.append(outcome.value["text_content"] + describe_freshness(outcome.value))
+        else:
+            print(f"웹 페이지 가져오기 실패: {url} ({outcome.error}, {outcome.attempts}회 시도)")
+    if len(results) == 1:
+        return "홈페이지가 현재 접속되지 않아 정보 조회에 실패했습니다.. 나중에 다시 시도해주세요."
+    if len(results) <= len(urls):
+        results.append("(일부 페이지에 접속하지 못해 정보가 일부 누락되었을 수 있습니다.)")
     return "\n".join(results)
 
 
@@ -0,0 +1,374 @@
+"""
+Local mirror of the center website, refreshed incrementally in the background.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+from datetime import datetime
+import traceback
+import threading
+import json
+import time
+import sys
+import os
+import re
+
+try:
+    from ..utils import web_search
+    from ..utils.page_cache import page_cache
+    from ..utils.extract import html_extractor, strip_boilerplate
+    from ..utils.http_client import HTTPError
+except ImportError:
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, parent)
+    from utils import web_search
+    from utils.page_cache import page_cache
+    from utils.extract import html_extractor, strip_boilerplate
+    from utils.http_client import HTTPError
+
+
+SITE_URL = "https://www.cheonanurc.or.kr"
+MIRROR_FILE = os.getenv("SITE_MIRROR_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "mirror.json"))
+
+
+@dataclass
+class MirrorTarget:
+    """ A page to keep mirrored """
+    url: str
+    interval: float  # seconds between refreshes
+    follow: Optional[str] = None  # regex of the linked pages (path and query) to mirror as well
+    child_interval: Optional[float] = None  # refresh interval of the linked pages (defaults to `interval`)
+    parent: Optional[str] = None
+
+
+@dataclass
+class PageSnapshot:
+    """ Cleaned copy of a mirrored page """
+    url: str
+    title: str = ""
+    description: str = ""
+    text_content: str = ""
+    links: List[str] = field(default_factory=list)
+    parent: Optional[str] = None
+    fetched_at: float = 0.0  # last time the content was confirmed (wall clock)
+    changed_at: float = 0.0  # last time the content changed
+    error: Optional[str] = None
+
+
+# Center pages listed in SPEC.md
+TARGETS = [
+    MirrorTarget(f"{SITE_URL}/131", interval=86400),  # 연락처와 위치
+    MirrorTarget(f"{SITE_URL}/133", interval=86400),
+    MirrorTarget(f"{SITE_URL}/128", interval=86400),
+    MirrorTarget(f"{SITE_URL}/68", interval=3600, follow=r"^/68/?\?.*\bidx=\d+"),  # 사업 현황 (+ 사업별 세부 페이지)
+    MirrorTarget(f"{SITE_URL}/new/?keyword_type=all", interval=600, follow=r"^/new/?\?.*\b(?:idx|page)=\d+", child_interval=86400),  # 공지사항 (+ 본문, 이전 페이지)
+    MirrorTarget(f"{SITE_URL}/41", interval=900),  # 센터 프로그램
+    MirrorTarget(f"{SITE_URL}/35", interval=3600),  # 도시재생 뉴스
+]
+
+
+def extract_links(body: bytes) -> List[str]:
+    """ href of every anchor in a page (in document order, without duplicates) """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(body, 'html.parser')
+    return list(dict.fromkeys(a['href'] for a in soup.find_all('a', href=True)))
+
+
+class SiteMirror:
+    """
+    Keeps a local snapshot of the center pages so the center tools answer without network access.
+
+    A background thread refreshes every page on its own schedule. Refreshes go through the
+    page cache, so an unchanged page costs one conditional request. At most `max_workers`
+    pages are fetched at once and requests to the site are spaced by at least `delay` seconds.
+    Pages linked from a target that match its `follow` pattern (business detail pages, notice
+    articles and older notice list pages) are discovered and mirrored as well, recursively,
+    up to `max_pages` pages in total.
+
+    The snapshot is saved to `path` after every refresh round and loaded on start-up. Listeners
+    added with `add_listener` are then called with the URLs of the round.
+    """
+
+    def __init__(
+        self,
+        targets: List[MirrorTarget] = TARGETS,
+        path: str = MIRROR_FILE,
+        max_workers: int = 2,
+        delay: float = 1.0,
+        max_pages: int = 512,
+        max_age: float = 7 * 86400
+    ):
+        self.path = path
+        self.max_workers = max_workers
+        self.delay = delay
+        self.max_pages = max_pages
+        self.max_age = max_age  # snapshots older than this are fetched live instead
+
+        self.__lock = threading.Lock()
+        self.__targets: Dict[str, MirrorTarget] = {target.url: target for target in targets}
+        self.__snapshots: Dict[str, PageSnapshot] = {}
+        self.__due: Dict[str, float] = {}  # url -> next refresh (wall clock)
+        self.__running: Dict[str, threading.Event] = {}  # url -> set when its refresh in flight ends
+        self.__next_request = 0.0
+        self.__wakeup = threading.Event()
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__pool: Optional[ThreadPoolExecutor] = None
+        self.__listeners: List[Callable[[List[str]], None]] = []
+        self.load()
+
+    def load(self):
+        """ Load the saved snapshot """
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            saved = {}
+        with self.__lock:
+            for item in saved.get("pages", []):
+                try:
+                    snapshot = PageSnapshot(**item)
+                except TypeError:
+                    continue
+                self.__snapshots[snapshot.url] = snapshot
+                if snapshot.parent in self.__targets and snapshot.url not in self.__targets:
+                    self.__targets[snapshot.url] = self.__child_target(self.__targets[snapshot.parent], snapshot.url)
+            for url, target in self.__targets.items():
+                snapshot = self.__snapshots.get(url)
+                self.__due[url] = snapshot.fetched_at + target.interval if snapshot else 0.0
+
+    def save(self):
+        """ Atomically write the snapshot to disk """
+        with self.__lock:
+            pages = [asdict(snapshot) for snapshot in self.__snapshots.values()]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump({"saved_at": time.time(), "pages": pages}, file, ensure_ascii=False)
+        os.replace(temp, self.path)
+
+    def add_listener(self, listener: Callable[[List[str]], None]):
+        """ Call `listener(urls)` after every saved refresh round """
+        with self.__lock:
+            self.__listeners.append(listener)
+
+    def start(self):
+        """ Start the background refresh thread """
+        with self.__lock:
+            if self.__thread is not None and self.__thread.is_alive():
+                return
+            self.__stop.clear()
+            self.__pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="site-mirror")
+            self.__thread = threading.Thread(target=self.__schedule, name="site-mirror", daemon=True)
+            self.__thread.start()
+
+    def stop(self):
+        """ Stop refreshing (the snapshot stays available) """
+        self.__stop.set()
+        self.__wakeup.set()
+        if self.__pool is not None:
+            self.__pool.shutdown(wait=False, cancel_futures=True)
+
+    def __schedule(self):
+        while not self.__stop.is_set():
+            try:
+                self.refresh_due(self.__pool)
+            except RuntimeError:  # Pool shut down by `stop`
+                if self.__stop.is_set():
+                    return
+                traceback.print_exc()
+            except Exception:  # keep the mirror alive: the failed pages are rescheduled by `refresh`
+                traceback.print_exc()
+            with self.__lock:
+                upcoming = min((at for url, at in self.__due.items() if url not in self.__running), default=time.time() + 60)
+            self.__wakeup.wait(max(1.0, upcoming - time.time()))
+            self.__wakeup.clear()
+
+    def refresh_due(self, pool: Optional[ThreadPoolExecutor] = None) -> int:
+        """ Refresh every page whose schedule has come, then save the snapshot. Returns the number of pages. """
+        with self.__lock:
+            now = time.time()
+            due = [url for url, at in self.__due.items() if at <= now and url not in self.__running]
+            self.__running.update((url, threading.Event()) for url in due)
+        if not due:
+            return 0
+        if pool is None:
+            for url in due:
+                self.__refresh(url)
+        else:
+            for future in [pool.submit(self.__refresh, url) for url in due]:
+                future.result()
+        self.save()
+        with self.__lock:
+            listeners = list(self.__listeners)
+        for listener in listeners:
+            try:
+                listener(due)
+            except Exception:
+                traceback.print_exc()
+        return len(due)
+
+    def __polite(self):
+        """ Space requests to the site by at least `delay` seconds """
+        with self.__lock:
+            now = time.monotonic()
+            start = max(now, self.__next_request)
+            self.__next_request = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+    def refresh(self, url: str, wait: float = 30.0) -> Optional[PageSnapshot]:
+        """ Fetch one page now and update its snapshot, or wait up to `wait` seconds for the refresh of it already in flight """
+        with self.__lock:
+            running = self.__running.get(url)
+            if running is None:
+                self.__running[url] = threading.Event()
+        if running is None:
+            return self.__refresh(url)
+        running.wait(wait)
+        with self.__lock:
+            return self.__snapshots.get(url)
+
+    def __refresh(self, url: str) -> Optional[PageSnapshot]:
+        """ Fetch one page claimed in `__running` and update its snapshot """
+        with self.__lock:
+            target = self.__targets.get(url) or MirrorTarget(url, interval=3600)
+            previous = self.__snapshots.get(url)
+        now = time.time()
+        due = now + min(target.interval, 300)  # retry sooner after a failure
+
+        try:
+            self.__polite()
+            page = page_cache.fetch(url, timeout=15)
+            extracted = page_cache.extract(page, html_extractor.cache_name, html_extractor.extract)
+            links = page_cache.extract(page, "links", extract_links) if target.follow else []
+
+            text = strip_boilerplate(page.final_url, extracted["text_content"])
+            changed = previous is None or previous.text_content != text
+            snapshot = PageSnapshot(
+                url=url,
+                title=extracted["title"],
+                description=extracted["description"],
+                text_content=text,
+                links=[urljoin(page.final_url, link) for link in links],
+                parent=target.parent,
+                fetched_at=now,
+                changed_at=now if changed else previous.changed_at
+            )
+            with self.__lock:
+                self.__snapshots[url] = snapshot
+                if target.follow:
+                    self.__discover(target, snapshot)
+            due = now + target.interval
+            return snapshot
+        except Exception as e:  # network errors, but also unexpected markup or extractor bugs
+            if not isinstance(e, (HTTPError, OSError)):
+                print(f"ERROR:    Failed to mirror {url}: {type(e).__name__}: {e}", file=sys.stderr)
+            with self.__lock:
+                if previous is not None:
+                    previous.error = f"{type(e).__name__}: {e}"
+            return previous
+        finally:
+            with self.__lock:  # always reschedule, so a failing page is never stuck as running
+                self.__running.pop(url).set()
+                self.__due[url] = due
+
+    @staticmethod
+    def __child_target(target: MirrorTarget, url: str) -> MirrorTarget:
+        """ Target of a discovered page (it follows the same links as the page it was found on) """
+        interval = target.child_interval or target.interval
+        return MirrorTarget(url, interval, follow=target.follow, child_interval=interval, parent=target.url)
+
+    def __discover(self, target: MirrorTarget, snapshot: PageSnapshot):
+        """ Schedule the linked pages matching the `follow` pattern (lock must be held) """
+        host = urlparse(target.url).netloc
+        pattern = re.compile(target.follow)
+        for link in snapshot.links:
+            parsed = urlparse(link)
+            path = parsed.path + ("?" + parsed.query if parsed.query else "")
+            if parsed.netloc != host or not pattern.search(path) or link in self.__targets:
+                continue
+            if len(self.__targets) >= self.max_pages:
+                break
+            self.__targets[link] = self.__child_target(target, link)
+            self.__due[link] = 0.0
+        self.__wakeup.set()
+
+    def get(self, url: str) -> Optional[PageSnapshot]:
+        """ Mirrored snapshot of a page (None if it was never fetched) """
+        with self.__lock:
+            snapshot = self.__snapshots.get(url)
+        if snapshot is None or not snapshot.fetched_at:
+            return None
+        return snapshot
+
+    def children(self, url: str, recursive: bool = False) -> List[PageSnapshot]:
+        """ Mirrored pages discovered from a page (and, if recursive, from those pages) """
+        with self.__lock:
+            found, seen, parents = [], {url}, {url}
+            while parents:
+                level = [s for s in self.__snapshots.values() if s.parent in parents and s.url not in seen and s.fetched_at]
+                found.extend(level)
+                seen.update(s.url for s in level)
+                parents = {s.url for s in level} if recursive else set()
+            return found
+
+    def fetch_webpage(self, url: str, length_limit: int = 5000) -> Dict[str, Any]:
+        """
+        Drop-in replacement of `web_search.fetch_webpage` answering from the mirror.
+
+        Mirrored pages are returned immediately (with `fetched_at` and `age` metadata); pages
+        that were never mirrored, or whose snapshot is older than `max_age`, are fetched live.
+        """
+        snapshot = self.get(url)
+        if snapshot is None or time.time() - snapshot.fetched_at > self.max_age:
+            if url in self.__targets:
+                snapshot = self.refresh(url)
+            if snapshot is None or not snapshot.fetched_at:
+                return web_search.fetch_webpage(url, length_limit=length_limit)
+
+        result = {
+            "url": url,
+            "title": snapshot.title,
+            "description": snapshot.description,
+            "text_content": snapshot.text_content[:length_limit],
+            "fetched_at": datetime.fromtimestamp(snapshot.fetched_at).isoformat(timespec="seconds"),
+            "age": round(time.time() - snapshot.fetched_at)
+        }
+        if snapshot.error is not None:
+            result["refresh_error"] = snapshot.error
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self.__lock:
+            return {
+                "pages": len(self.__snapshots),
+                "targets": len(self.__targets),
+                "running": len(self.__running),
+                "oldest_age": round(max((now - s.fetched_at for s in self.__snapshots.values() if s.fetched_at), default=0))
+            }
+
+
+def describe_freshness(data: Dict[str, Any]) -> str:
+    """ Staleness note appended to tool results answered from the mirror """
+    if "fetched_at" not in data:
+        return ""
+    minutes = data["age"] // 60
+    age = f"{minutes}분 전" if minutes < 60 * 24 else f"{minutes // (60 * 24)}일 전"
+    if data.get("stale") or "refresh_error" in data:
+        return f"\n(현재 홈페이지에 접속할 수 없어 마지막으로 확인한 정보를 제공합니다. 기준 시각: {data['fetched_at'].replace('T', ' ')}, {age})"
+    return f"\n(홈페이지 정보 기준 시각: {data['fetched_at'].replace('T', ' ')}, {age})"
+
+
+# Global site mirror instance
+site_mirror = SiteMirror()
+
+
+if __name__ == '__main__':
+    # Example usage: mirror the site (two rounds: pages, then the discovered detail pages)
+    while site_mirror.refresh_due():
+        print("Mirror stats:", site_mirror.stats())
+    for child in site_mirror.children(f"{SITE_URL}/68"):
+        print(child.url, "->", child.title)
@@ -1,4 +1,3 @@
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 import random
@@ -7,11 +6,13 @@ import os
 import re
 
 try:
-    from ..utils import web_search
+    from .mirror import site_mirror, describe_freshness
+    from ..utils.http_client import http_client, HTTPError
 except ImportError:
     parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sys.path.insert(0, parent)
-    from utils import web_search
+    from mirror import site_mirror, describe_freshness
+    from utils.http_client import http_client, HTTPError
 
 
 def get_center_news(retry: int = 3) -> str:
@@ -19,12 +20,10 @@ def get_center_news(retry: int = 3) -> str:
 
     for attempt in range(retry):
         try:
-            data = web_search.fetch_webpage(url, length_limit=10000)
+            data = page = site_mirror.fetch_webpage(url, length_limit=10000)
             if "text_content" in data:
-                data = data["text_content"].split("Copyrightⓒ")[0].strip()
-                data = data.split("천안시 도시재생지원센터 site search")[-1].strip()
-                return data
-        except requests.RequestException as e:
+                return data["text_content"] + describe_freshness(page)
+        except HTTPError as e:
             print(f"웹 페이지 가져오기 실패: {e}. 재시도 중... ({attempt + 1}/{retry})")
     return "홈페이지가 현재 접속되지 않아 소식 조회에 실패했습니다.. 나중에 다시 시도해주세요."
 
@@ -45,11 +44,11 @@ def subscribe_newsletter(nick: str, email: str, name: str, retry: int = 3, use_t
     token = ""
     for attempt in range(retry):
         try:
-            response = requests.post(f"{token_url}&expire={expire}", headers=headers)
+            response = http_client.post(f"{token_url}&expire={expire}", headers=headers)
             if response.status_code == 200:
                 token = response.json().get("token", ""), response.json().get("token_key", 0)
                 break
-        except requests.RequestException as e:
+        except HTTPError as e:
             print(f"토큰 생성 실패: {e}. 재시도 중... ({attempt + 1}/{retry})")
 
     if not token:
@@ -70,14 +69,14 @@ def subscribe_newsletter(nick: str, email: str, name: str, retry: int = 3, use_t
     print(f"구독 신청 데이터: {data}")
     for attempt in range(retry):
         try:
-            response = requests.post(subscribe_url, data=data, headers=headers)
+            response = http_client.post(subscribe_url, data=data, headers=headers)
             if response.status_code == 200:
                 result = response.json()
                 if result.get("msg").lower() == "success":
                     return f"구독 신청이 완료되었습니다. 신청 내역은 비밀번호 `{password}`를 사용하여 홈페이지에서 확인할 수 있습니다."
                 else:
                     return f"구독 신청 실패: {result}"
-        except requests.RequestException as e:
+        except HTTPError as e:
             print(f"구독 신청 실패: {e}. 재시도 중... ({attempt + 1}/{retry})")
 
     return "홈페이지 접속 오류로 인해 구독 신청에 실패했습니다. 나중에 다시 시도해주세요."
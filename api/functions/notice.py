@@ -1,36 +1,141 @@
-import requests
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date
+from urllib.parse import quote_plus
+from dataclasses import dataclass
+import threading
+import time
 import sys
 import os
-import re
 
 try:
-    from ..utils import web_search
+    from .mirror import site_mirror, describe_freshness
+    from .records import record_store, parse_dates, NOTICE_URL
+    from ..utils.http_client import HTTPError
+    from ..utils.bm25 import BM25Index, tokenize
+    from ..utils.fanout import RetryPolicy
 except ImportError:
     parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sys.path.insert(0, parent)
-    from utils import web_search
+    from mirror import site_mirror, describe_freshness
+    from records import record_store, parse_dates, NOTICE_URL
+    from utils.http_client import HTTPError
+    from utils.bm25 import BM25Index, tokenize
+    from utils.fanout import RetryPolicy
 
 
-def get_center_notices(query: str = "", retry: int = 3) -> str:
-    url = "https://www.cheonanurc.or.kr/new/?keyword_type=all"
+def get_center_notices(query: str = "", retry: int = 3, limit: int = 10) -> str:
+    url = NOTICE_URL
 
     if query:
-        url += f"&keyword={query}"
+        found = search_notices(query, limit)
+        if found:
+            return found
+        url += f"&keyword={quote_plus(query)}"  # Articles not mirrored yet: use the site search
+    else:
+        latest = get_latest_notices(limit)
+        if latest:
+            return latest
 
+    policy = RetryPolicy(attempts=retry)
     for attempt in range(retry):
+        if attempt:
+            time.sleep(policy.delay(attempt - 1))
         try:
-            data = web_search.fetch_webpage(url, length_limit=-1)
+            data = page = site_mirror.fetch_webpage(url, length_limit=-1)
             if "text_content" in data:
-                data = data["text_content"].split("Copyrightⓒ")[0].strip().split("검색어 입력 Previous")[0].strip()
-                data = data.split("천안시 도시재생지원센터 site search")[-1].strip()
-                return data
-        except requests.RequestException as e:
+                return data["text_content"] + describe_freshness(page)
+        except HTTPError as e:
             print(f"웹 페이지 가져오기 실패: {e}. 재시도 중... ({attempt + 1}/{retry})")
     return "홈페이지가 현재 접속되지 않아 공지사항 조회에 실패했습니다.. 나중에 다시 시도해주세요."
 
 
+def get_latest_notices(limit: int = 10) -> str:
+    """ Latest notices as dated records (empty if the notice board could not be parsed) """
+    index, page = record_store.index(NOTICE_URL, default_slot="posted")
+    if not index:
+        return ""
+    today = date.today()
+    lines = [f"기준일: {today.isoformat()}", f"최신 공지사항 {min(limit, len(index))}건 (총 {len(index)}건 중)"]
+    lines.extend(f"- {record.describe(today)}" for record in index.query(today=today, newest_first=True)[:limit])
+    return "\n".join(lines) + describe_freshness(page)
+
+
+@dataclass
+class Notice:
+    """ A notice article mirrored from the center website """
+    url: str
+    title: str
+    body: str
+    posted: Optional[date] = None
+
+
+class NoticeIndex:
+    """
+    BM25 index over every mirrored notice article (title, date and body).
+
+    The index follows the site mirror incrementally: before each search, articles that are
+    new or changed since the last update are (re)indexed and removed ones are dropped.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__index = BM25Index()
+        self.__notices: Dict[str, Notice] = {}
+        self.__versions: Dict[str, float] = {}  # url -> changed_at of the indexed snapshot
+
+    def update(self) -> int:
+        """ Sync the index with the mirror. Returns the number of (re)indexed articles. """
+        articles = [page for page in site_mirror.children(NOTICE_URL, recursive=True) if "idx=" in page.url]
+        updated = 0
+        with self.__lock:
+            for url in set(self.__notices) - {page.url for page in articles}:
+                self.__index.remove(url)
+                del self.__notices[url], self.__versions[url]
+            for page in articles:
+                if self.__versions.get(page.url) == page.changed_at:
+                    continue
+                body = page.text_content
+                dates = parse_dates(body[:500])
+                notice = Notice(page.url, page.title or body[:60], body, dates[0][2][0] if dates else None)
+                self.__index.add(page.url, f"{notice.title} {notice.title} {body}")  # Title terms count twice
+                self.__notices[page.url] = notice
+                self.__versions[page.url] = page.changed_at
+                updated += 1
+        return updated
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Notice, float]]:
+        self.update()
+        with self.__lock:
+            return [(self.__notices[url], score) for url, score in self.__index.search(query, k)]
+
+    def __len__(self) -> int:
+        return len(self.__notices)
+
+
+def snippet(text: str, query: str, width: int = 160) -> str:
+    """ Part of the text around the first query term """
+    folded = text.casefold()
+    positions = [folded.find(term) for term in tokenize(query) if term in folded]
+    start = max(0, min(positions, default=0) - width // 4)
+    return ("…" if start else "") + text[start:start + width].strip() + ("…" if start + width < len(text) else "")
+
+
+def search_notices(query: str, limit: int = 10) -> str:
+    """ Keyword search over the mirrored notices (empty if no article is mirrored yet) """
+    results = notice_index.search(query, limit)
+    if not results:
+        return "" if not len(notice_index) else f"'{query}'와(과) 관련된 공지사항을 찾지 못했습니다."
+    lines = [f"'{query}' 검색 결과 {len(results)}건 (공지사항 {len(notice_index)}건 중)"]
+    for notice, _ in results:
+        posted = f" | 게시 {notice.posted.isoformat()}" if notice.posted else ""
+        lines.append(f"- {notice.title}{posted}\n  {snippet(notice.body, query)}\n  {notice.url}")
+    return "\n".join(lines)
+
+
+# Global notice index instance
+notice_index = NoticeIndex()
+
+
 if __name__ == '__main__':
     # Example usage
     print("최신 공지사항:")
@@ -1,43 +1,76 @@
-import requests
 from typing import Dict, Any
-from datetime import datetime, timedelta
+from datetime import date
+import time
 import sys
 import os
-import re
 
 try:
-    from ..utils import web_search
+    from .mirror import describe_freshness
+    from .records import record_store, PROGRAM_URL, ENDED, ONGOING, UPCOMING, UNKNOWN
+    from ..utils.http_client import HTTPError
+    from ..utils.fanout import RetryPolicy
 except ImportError:
     parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sys.path.insert(0, parent)
-    from utils import web_search
+    from mirror import describe_freshness
+    from records import record_store, PROGRAM_URL, ENDED, ONGOING, UPCOMING, UNKNOWN
+    from utils.http_client import HTTPError
+    from utils.fanout import RetryPolicy
+
+
+NO_PROGRAM_MESSAGE = "현재 진행 중이거나 계획된 프로그램이 없습니다. 계속해서 관심 부탁드립니다."
+
+# Section headings of the program page
+PROGRAM_SECTIONS = ("진행 중", "진행 예정", "진행 완료")
 
 
 def get_program_information(upcoming_only: bool = False, retry: int = 3) -> str:
-    url = "https://www.cheonanurc.or.kr/41"
+    url = PROGRAM_URL
+    policy = RetryPolicy(attempts=retry)
 
     for attempt in range(retry):
+        if attempt:
+            time.sleep(policy.delay(attempt - 1))
         try:
-            data = web_search.fetch_webpage(url, length_limit=-1)
-            if "text_content" in data:
-                data = data["text_content"].split("Copyrightⓒ")[0].strip()
-                data = data.split("천안시 도시재생지원센터 site search")[-1].strip()
-                data = data.split("진행 중")[-1].strip().split("진행 완료")
-                current = data[0].strip()
-                completed = "진행 완료".join(data[1:]).strip()
-                
-                if not current:
-                    current = "현재 진행 중이거나 계획된 프로그램이 없습니다. 계속해서 관심 부탁드립니다."
-
-                if upcoming_only:
-                    return "{'신청 가능 프로그램': " + current + "}"
-                else:
-                    return "{'신청 가능 프로그램': " + current + ", '신청 마감 프로그램': " + completed + "}"
-        except requests.RequestException as e:
+            index, page = record_store.index(url, sections=PROGRAM_SECTIONS)
+            if index is None:
+                continue
+            if not index:  # The listing could not be split into programs: return the page text as is
+                return get_program_text(page, upcoming_only)
+
+            today = date.today()
+            lines = [f"기준일: {today.isoformat()} (상태는 기준일에 맞춰 분류되었습니다)"]
+            groups = [(ONGOING, "신청/진행 중"), (UPCOMING, "예정")]
+            if not upcoming_only:
+                groups += [(ENDED, "종료"), (UNKNOWN, "일정 확인 필요")]
+            for status, heading in groups:
+                records = index.query((status,), today, newest_first=status == ENDED)
+                if records:
+                    lines.append(f"\n## {heading} 프로그램")
+                    lines.extend(f"- {record.describe(today)}" for record in records)
+            if upcoming_only and len(lines) == 1:
+                lines.append(NO_PROGRAM_MESSAGE)
+            return "\n".join(lines) + describe_freshness(page)
+        except HTTPError as e:
             print(f"웹 페이지 가져오기 실패: {e}. 재시도 중... ({attempt + 1}/{retry})")
     return "홈페이지가 현재 접속되지 않아 센터 프로그램 조회에 실패했습니다.. 나중에 다시 시도해주세요."
 
 
+def get_program_text(page: Dict[str, Any], upcoming_only: bool = False) -> str:
+    """ Raw text of the program page split into its "진행 중" and "진행 완료" sections """
+    data = page["text_content"].split("진행 중")[-1].strip().split("진행 완료")
+    current = data[0].strip()
+    completed = "진행 완료".join(data[1:]).strip()
+
+    if not current:
+        current = NO_PROGRAM_MESSAGE
+
+    if upcoming_only:
+        return "{'신청 가능 프로그램': " + current + "}" + describe_freshness(page)
+    else:
+        return "{'신청 가능 프로그램': " + current + ", '신청 마감 프로그램': " + completed + "}" + describe_freshness(page)
+
+
 def get_upcoming_programs(retry: int = 3) -> str:
     return get_program_information(upcoming_only=True, retry=retry)
 
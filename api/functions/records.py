@@ -0,0 +1,278 @@
+"""
+Typed program and notice records parsed from the mirrored center pages.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+from hashlib import sha256
+import threading
+import bisect
+import sys
+import os
+import re
+
+try:
+    from .mirror import site_mirror, SITE_URL
+except ImportError:
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, parent)
+    from mirror import site_mirror, SITE_URL
+
+
+PROGRAM_URL = f"{SITE_URL}/41"
+NOTICE_URL = f"{SITE_URL}/new/?keyword_type=all"
+
+ENDED = "종료"
+ONGOING = "진행 중"
+UPCOMING = "예정"
+UNKNOWN = "확인 필요"
+
+# A full date (2025.05.19, 25.5.19, 2025-05-19, 2025년 5월 19일 (월)), optionally followed by
+# the end of a range whose year and month may be omitted (~ 06.06, ~ 6월 6일, ~ 20일)
+_FULL = r"(?P<y>(?:19|20)\d{2}|\d{2})\s*[./년-]\s*(?P<m>\d{1,2})\s*[./월-]\s*(?P<d>\d{1,2})\.?\s*일?(?:\s*\([월화수목금토일]\))?"
+_END = r"(?:(?P<y2>(?:19|20)\d{2})\s*[./년-]\s*)?(?:(?P<m2>\d{1,2})\s*[./월-]\s*)?(?P<d2>\d{1,2})\.?\s*일?(?:\s*\([월화수목금토일]\))?"
+DATE_RANGE = re.compile(rf"(?<!\d){_FULL}(?:\s*(?:[~～∼]|\s-\s)\s*{_END})?(?!\d)")
+
+# Labels written right in front of a date ("모집기간", "교육일시:", "작성일"). Words like 모집 or 교육
+# alone are part of titles ("참여자 모집 안내 2025.05.19" is a posting date, not an application window).
+_APPLICATION = r"(?:신청|모집|접수)\s?기간"
+_POSTED = r"(?:게시|등록|작성)\s?(?:일자|일시|일)"
+_EVENT = r"(?:교육|행사|운영|진행|활동)?\s?(?:기간|일시|일정)"
+_PUNCTUATION = r"[\s:|·•\-\[\]()]*"
+_LABEL = re.compile(rf"{_PUNCTUATION}(?:(?P<application>{_APPLICATION})|(?P<posted>{_POSTED})|(?P<event>{_EVENT})){_PUNCTUATION}$")
+
+# What separates a title from the details of the previous record: the end of a sentence, or a remark
+# in parentheses right after the previous dates
+_SENTENCE_END = re.compile(r"[.!?。]\s")
+_REMARK = re.compile(r"^\s*\([^()]*\)")
+# Column headers and leading row numbers of notice boards ("번호 제목 작성일 58 ...")
+_BOARD_HEADER = re.compile(r"^(?:(?:번호|제목|작성자|글쓴이|작성일|등록일|조회수?|첨부|분류)\s*){2,}")
+_ROW_NUMBER = re.compile(r"^(?!(?:19|20)\d{2}\b)\d{1,6}\s+(?=\S)")
+
+
+@dataclass
+class Record:
+    """ A program or notice listed on the center website """
+    title: str
+    application: Optional[Tuple[date, date]] = None  # 신청/모집 기간
+    event: Optional[Tuple[date, date]] = None  # 행사/교육/운영 일정
+    posted: Optional[date] = None
+    section: Optional[str] = None  # section of the page the record was listed in (e.g. "진행 완료")
+    source: str = ""
+
+    @property
+    def key_date(self) -> date:
+        """ Date the index is sorted by """
+        for window in (self.event, self.application):
+            if window:
+                return window[0]
+        return self.posted or date.min
+
+    def status(self, today: Optional[date] = None) -> str:
+        """ ended, ongoing or upcoming relative to `today` (the application window decides while it is open) """
+        today = today or date.today()
+        window = self.application or self.event
+        if window is None:
+            return ENDED if self.section and "완료" in self.section else UNKNOWN
+        start, end = window
+        if self.application and self.event and self.application[1] < today <= self.event[1]:
+            start, end = self.event  # Applications closed but the event is still to come
+        if end < today:
+            return ENDED
+        if start > today:
+            return UPCOMING
+        return ONGOING
+
+    def describe(self, today: Optional[date] = None) -> str:
+        """ One line summary for the model """
+        today = today or date.today()
+        parts = [f"[{self.status(today)}] {self.title}" if self.application or self.event or self.section else self.title]
+        if self.application:
+            parts.append(f"신청 {format_window(self.application)}" + remaining(self.application[1], today, "마감"))
+        if self.event:
+            parts.append(f"일정 {format_window(self.event)}")
+        if self.posted and not (self.application or self.event):
+            parts.append(f"게시 {self.posted.isoformat()}")
+        return " | ".join(parts)
+
+
+def format_window(window: Tuple[date, date]) -> str:
+    start, end = window
+    return start.isoformat() if start == end else f"{start.isoformat()} ~ {end.isoformat()}"
+
+
+def remaining(day: date, today: date, label: str) -> str:
+    days = (day - today).days
+    if days < 0:
+        return ""
+    return f" (오늘 {label})" if days == 0 else f" ({label} D-{days})"
+
+
+def _make_date(year: Optional[str], month: Optional[str], day: Optional[str], default: Optional[date] = None) -> Optional[date]:
+    try:
+        y = int(year) if year else default.year
+        if y < 100:
+            y += 2000
+        m = int(month) if month else default.month
+        return date(y, m, int(day))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def parse_dates(text: str) -> List[Tuple[int, int, Tuple[date, date]]]:
+    """ (start offset, end offset, (first day, last day)) of every date or date range in a text """
+    found = []
+    for match in DATE_RANGE.finditer(text):
+        start = _make_date(match["y"], match["m"], match["d"])
+        if start is None:
+            continue
+        end = start
+        if match["d2"]:
+            end = _make_date(match["y2"], match["m2"], match["d2"], default=start)
+            if end is None:
+                end = start
+            elif end < start and not match["y2"]:
+                end = _make_date(str(end.year + 1), str(end.month), str(end.day)) or start  # e.g. 12.28 ~ 01.05
+        found.append((match.start(), match.end(), (start, end)))
+    return found
+
+
+def _label_kind(text: str) -> Optional[str]:
+    """ Slot named by the label the text ends with ("application", "posted", "event" or None) """
+    match = _LABEL.search(text)
+    return match.lastgroup if match else None
+
+
+def _clean_title(text: str, board: bool = False, max_length: int = 80) -> str:
+    """
+    Title of the record whose dates follow `text` (the text since the previous date).
+
+    Details of the previous record ("(매주 목요일)", "주민 40명 수료.") and page intros end
+    with a sentence or a remark, so only the text after the last of those is kept; on boards
+    the column headers and the row number are dropped as well.
+    """
+    text = _REMARK.sub("", _LABEL.sub("", " ".join(text.split())))
+    ends = [match.end() for match in _SENTENCE_END.finditer(text) if text[match.end():].strip()]
+    if ends:
+        text = text[ends[-1]:]
+    if board:
+        text = _ROW_NUMBER.sub("", _BOARD_HEADER.sub("", text.strip()))
+    text = text.strip(" :|·•-")
+    if len(text) > max_length:  # Keep the end: the title is written right before its dates
+        text = text[-max_length:]
+        text = text[text.find(" ") + 1:] if " " in text else text
+    return text
+
+
+def parse_records(text: str, sections: Tuple[str, ...] = (), default_slot: str = "event") -> List[Record]:
+    """
+    Split a listing page into records.
+
+    The text between two dates is the title of the next record, unless it is only a label
+    ("모집기간", "일시: " ...) in which case the date belongs to the current record.
+    `sections` are headings (like "진행 중" / "진행 완료") recorded on the records that follow them;
+    a title starts after the last heading before it.
+    Unlabeled dates fill `default_slot` ("event" for programs, "posted" for notice boards, whose
+    column headers and row numbers are not part of the titles).
+    """
+    section_marks = sorted(
+        (match.start(), match.end(), name) for name in sections for match in re.finditer(re.escape(name), text)
+    )
+    records: List[Record] = []
+    current: Optional[Record] = None
+    previous_end = 0
+
+    for start, end, window in parse_dates(text):
+        gap_start = max([mark_end for mark_start, mark_end, _ in section_marks if previous_end <= mark_start and mark_end <= start], default=previous_end)
+        gap = text[gap_start:start]
+        kind = _label_kind(gap)
+        title = _clean_title(gap, board=default_slot == "posted")
+        slot = kind or default_slot
+
+        if current is None or title or getattr(current, slot) is not None:
+            if not title and current is None:
+                previous_end = end
+                continue
+            section = None
+            for offset, _, name in section_marks:
+                if offset <= start:
+                    section = name
+            current = Record(title=title or (current.title if current else ""), section=section)
+            records.append(current)
+
+        setattr(current, slot, window[0] if slot == "posted" else window)
+        previous_end = end
+    return [record for record in records if record.title]
+
+
+class RecordIndex:
+    """ Records sorted by date (bisect lookups by date range) """
+
+    def __init__(self, records: List[Record]):
+        self.records = sorted(records, key=lambda record: record.key_date)
+        self.__keys = [record.key_date for record in self.records]
+
+    def between(self, since: Optional[date] = None, until: Optional[date] = None) -> List[Record]:
+        lo = bisect.bisect_left(self.__keys, since) if since else 0
+        hi = bisect.bisect_right(self.__keys, until) if until else len(self.__keys)
+        return self.records[lo:hi]
+
+    def query(self, statuses: Optional[Tuple[str, ...]] = None, today: Optional[date] = None, newest_first: bool = False) -> List[Record]:
+        today = today or date.today()
+        records = [record for record in self.records if statuses is None or record.status(today) in statuses]
+        return records[::-1] if newest_first else records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class RecordStore:
+    """ Parses mirrored pages into record indexes, re-parsing only when a page changes """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__indexes: Dict[str, Tuple[str, RecordIndex]] = {}  # url -> (text digest, index)
+
+    def index(self, url: str, sections: Tuple[str, ...] = (), default_slot: str = "event") -> Tuple[Optional[RecordIndex], Optional[dict]]:
+        """
+        Record index of a page and the page data it was parsed from.
+
+        Returns:
+            (index or None if the page is unavailable, page data from `site_mirror.fetch_webpage`)
+        """
+        page = site_mirror.fetch_webpage(url, length_limit=-1)
+        text = page.get("text_content")
+        if not text:
+            return None, page
+        digest = sha256(text.encode("utf-8")).hexdigest()
+
+        with self.__lock:
+            cached = self.__indexes.get(url)
+            if cached is not None and cached[0] == digest:
+                return cached[1], page
+        index = RecordIndex(parse_records(text, sections, default_slot))
+        for record in index.records:
+            record.source = url
+        with self.__lock:
+            self.__indexes[url] = (digest, index)
+        return index, page
+
+
+# Global record store instance
+record_store = RecordStore()
+
+
+if __name__ == '__main__':
+    # Example usage and test cases
+    sample = (
+        "진행 중 2025 마을학교 목공 교육 참여자 모집 모집기간 2025.05.19 ~ 06.06 교육일시 2025.06.10 ~ 07.15 "
+        "도시재생 사진 공모전 접수기간 2025년 8월 1일 ~ 8월 31일 "
+        "진행 완료 봄맞이 골목 정원 가꾸기 2025.04.05 "
+        "주민 공모사업 설명회 일시: 2025.03.12 (수)"
+    )
+    today = date(2025, 6, 1)
+    index = RecordIndex(parse_records(sample, ("진행 중", "진행 완료")))
+    for record in index.records:
+        print(record.describe(today))
+    print("Open now:", [record.title for record in index.query((ONGOING, UPCOMING), today)])
+    print("Listed in June:", [record.title for record in index.between(date(2025, 6, 1), date(2025, 6, 30))])
@@ -1,4 +1,3 @@
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 import sys
@@ -1,11 +1,15 @@
 import traceback
-from re import finditer, DOTALL
+import time
+from datetime import date
 from dataclasses import dataclass
 from typing import Generator, Tuple, Optional, List, Dict, Union
 
 from .config import ChatHistory
+from .parser import ToolCallParser
 from ..backend import BackendType
 from ..utils import FunctionCalling, FunctionCallResult
+from ..utils.answer_cache import AnswerCache, answer_cache
+from ..utils.response_cache import ResponseCache, response_cache, is_deterministic
 
 
 @dataclass
@@ -32,6 +36,9 @@ class BaseModel:
     supported_tools: FunctionCalling = FunctionCalling.DEFAULT
     system_prompt = ""
     special_tags = Tags()
+    tool_progress_interval = 1.0  # seconds between progress events while tools are running
+    answer_cache: Optional[AnswerCache] = answer_cache  # None disables cached answers for the model
+    response_cache: Optional[ResponseCache] = response_cache  # None disables replaying deterministic rounds
 
     def __new__(cls, *args, **kwargs):
         """ Ensure only one instance of the model is created """
@@ -72,69 +79,50 @@ class BaseModel:
         result_obj = FunctionCallResult()
         result_obj.register_tools(tools, self.supported_tools.implementations)
 
+        tag = (self.special_tags.TOOLCALL, self.special_tags.TOOLCALL_END)
+        parser = ToolCallParser(*tag, known_tools=result_obj.implementations)
+
+        def handle(events):
+            """ Dispatch parsed calls right away so tools run while the model keeps generating """
+            for event, value in events:
+                if event == parser.TEXT:
+                    yield value
+                elif event == parser.CALL:
+                    result_obj.stage_call(*value, tag)
+                else:
+                    name, arguments, reason = value
+                    result_obj.stage_call(name, arguments, tag, error=reason)
+
         if stream:
-            started = False
-            buffer = ""
             for word in outputs:
-                if self.special_tags.TOOLCALL in word:  # Start of a tool call
-                    started = True
-                    if buffer:
-                        buffer = 0
-                elif self.special_tags.TOOLCALL_END in word:  # End of a tool call
-                    if buffer:
-                        result_obj.stage(
-                            buffer,
-                            (self.special_tags.TOOLCALL, self.special_tags.TOOLCALL_END)
-                        )
-                        state = result_obj.state
-                        if state is not None:
-                            yield state
-                    buffer = ""
-                    started = False
-                else:
-                    if started:
-                        buffer += word
-                        state = result_obj.state
-                        if state is not None:
-                            yield state
-                    else:
-                        yield word
+                yield from handle(parser.feed(word))
+                yield from result_obj.events
+            yield from handle(parser.close())
+            yield from result_obj.events
         else:
-            original_outputs = outputs
-            outputs = outputs.replace(self.special_tags.TOOLCALL, "").replace(self.special_tags.TOOLCALL_END, "")
+            outputs = "".join(handle(parser.feed(outputs))) + "".join(handle(parser.close()))
 
-            for match in finditer(r"<tool_call>\s*(\{.*?\})\s*</tool_call>", original_outputs, DOTALL):
-                json_string = match.group(1)  # Extract the JSON string from the match
-                outputs.replace(json_string, "")  # Remove the tool call from the output
-                result_obj.stage(
-                    json_string,
-                    (self.special_tags.TOOLCALL, self.special_tags.TOOLCALL_END)
-                )
+        # Wait for the tool calls to finish (blocks on a condition, no busy waiting)
+        queued = len(result_obj.job_list)
+        while not result_obj.wait(timeout=self.tool_progress_interval):
+            if stream:
+                yield from result_obj.events
+                yield result_obj.progress(tag)
+        if stream:
+            yield from result_obj.events  # results of the last finished calls, one message per event
 
-        # Finalize the tool calls
-        print("\n")
-        spinner = ['⠋','⠙','⠹','⠸','⠼','⠴','⠦','⠧','⠇','⠏']
-        stat = 0
-        while True:
-            queued = len(result_obj.job_list)
-            final_result = result_obj.finalize(
-                chat_history,
-                (self.special_tags.TOOLCALL, self.special_tags.TOOLCALL_END),
-                print_output=print_output
-            )
-            if queued > 0 and stat % 2 == 0:
-                print(f"\r{spinner[(stat//2) % len(spinner)]} Waiting for tool calls to finish...", end="", flush=True)
-            if final_result is False:
-                stat += 1
-                continue
-            if queued > 0:
-                print("\r[✔] Tool calls are finalized successfully.", flush=True)
+        final_result = result_obj.finalize(
+            chat_history,
+            tag,
+            print_output=print_output
+        )
+        if queued > 0:
+            print("\n[✔] Tool calls are finalized successfully.", flush=True)
 
-            if stream:
-                yield final_result
-                break
-            else:
-                return outputs + final_result
+        if stream:
+            yield final_result
+        else:
+            return outputs + final_result
 
     def chat(
         self,
@@ -151,6 +139,7 @@ class BaseModel:
         max_new_tokens: int = 1024,
         repeat_penalty: float = 1.0,
         print_output: bool = False,
+        seed: Optional[int] = None,
         **kwargs
     ) -> Union[Generator[str, None, None], str]:
         """ Process a chat request
@@ -169,6 +158,7 @@ class BaseModel:
             max_new_tokens (int, optional): Max new tokens. Defaults to 1024.
             repeat_penalty (float, optional): Repeat penalty. Defaults to 1.0.
             print_output (bool, optional): Print output. Defaults to False.
+            seed (int, optional): Sampling seed for reproducible output. Defaults to None (random). Temperature 0 decodes greedily.
             **kwargs: Additional arguments
         """
         def adaptive_special_tag_buffering(outs, wait_tokens_for=6):
@@ -189,6 +179,31 @@ class BaseModel:
                 else:
                     yield wd
 
+        # Deterministic rounds are replayed from the exact-match response cache
+        deterministic = stream and self.response_cache is not None and is_deterministic(temperature, seed)
+        model_hash = getattr(self.runtime, 'model_hash', self.model_id) if deterministic else None
+
+        # Other first-turn questions can be answered from the semantic answer cache
+        tools = tools if tools is not None else self.supported_tools.available_schemas()
+        cacheable = (
+            stream and not deterministic and self.answer_cache is not None and bool(user_prompt)
+            and not any(message.get('role') == "user" for message in chat_history)
+        )
+        if cacheable:
+            scope = AnswerCache.scope(
+                self.model_id, system_prompt, tuple(schema['name'] for schema in tools), date.today().isoformat(),
+                temperature, top_p, top_k, min_p, typical_p, max_new_tokens, repeat_penalty, sorted(kwargs.items())
+            )
+            cached = self.answer_cache.lookup(user_prompt, scope)
+            if cached is not None:
+                chat_history.append("user", user_prompt)
+                for word in cached:
+                    if print_output: print(word, end="", flush=True)
+                    yield word
+                if print_output: print()
+                return
+            question, history_start, started, answer_words = user_prompt, len(chat_history), time.monotonic(), []
+
         initial_operation = True
         function_called = True
         while function_called:
@@ -210,8 +225,6 @@ class BaseModel:
                 initial_operation = False
                 # TODO: Add kv cache control for tool-calling here
 
-            tools = tools if tools is not None else self.supported_tools.schemas
-
             generation_kwargs = dict(
                 messages=prompt,
                 tools=tools if tools else None,
@@ -222,11 +235,25 @@ class BaseModel:
                 typical_p=typical_p,
                 stream=stream,
                 max_new_tokens=max_new_tokens,
-                repeat_penalty=repeat_penalty
+                repeat_penalty=repeat_penalty,
+                seed=seed
             )
             generation_kwargs.update(kwargs)
+            if deterministic:
+                # The clock in the system message is replaced by the date so that rounds repeat within a day
+                # (rounds that quote the time of day are not stored by the response cache)
+                messages = [dict(role="system", content=f"{date.today().isoformat()} {system_prompt}"), *prompt[1:]]
+                key = self.response_cache.make_key(
+                    model_hash,
+                    messages,
+                    {k: v for k, v in generation_kwargs.items() if k not in ('messages', 'stream')},
+                    self.response_cache.tool_versions(messages, self.supported_tools.implementations)
+                )
+                tokens = self.response_cache.stream(key, lambda kwargs=generation_kwargs: self.runtime(**kwargs))
+            else:
+                tokens = self.runtime(**generation_kwargs)
             outputs = self.parse_tool_calling(
-                adaptive_special_tag_buffering(self.runtime(**generation_kwargs)),
+                adaptive_special_tag_buffering(tokens),
                 chat_history=chat_history,
                 tools=tools,
                 stream=stream,
@@ -239,9 +266,12 @@ class BaseModel:
                         if word:
                             if self.special_tags.TOOLCALL in word and self.special_tags.TOOLCALL_END in word:
                                 function_called = True  # flag on
+                            elif cacheable and self.special_tags.TOOLCALL not in word:
+                                answer_words.append(word)  # tool events refer to this call's results only
                             if print_output: print(word, end="", flush=True)
                             yield word
                 except ValueError as e:  # Over token limit error
+                    cacheable = False
                     traceback.print_exc()
                     if "token" in str(e) and "limit" in str(e):
                         message = "\n\nERROR: Chat is unexpectedly terminated due to token limit. Please shorten your prompt or chat history."
@@ -255,3 +285,12 @@ class BaseModel:
                 if self.special_tags.TOOLCALL in outputs and self.special_tags.TOOLCALL_END in outputs:
                     function_called = True  # flag on
                 print(outputs, flush=True)
+
+        if cacheable:
+            self.answer_cache.store(
+                question,
+                scope,
+                answer_words,
+                self.answer_cache.dependencies(chat_history[history_start:], tools, self.supported_tools.implementations),
+                elapsed=time.monotonic() - started
+            )
@@ -2,6 +2,8 @@ from datetime import datetime, date, timezone
 from typing import Iterable
 import time
 
+from ..utils.store import tool_result_store
+
 
 def clean_text(problematic_text: str) -> str:
     """ Clear non-UTF8 characters (such as emojis) to avoid UnicodeEncodeError """
@@ -43,7 +45,11 @@ class ChatHistory(list):
                     or (isinstance(item, dict) and 'role' in item and 'tool_calls' in item
                         and isinstance(item['role'], str) and isinstance(item['tool_calls'], list))
                 ):
-                    super().append({k: clean_text(v) for k, v in item.items()})
+                    item = {k: clean_text(v) for k, v in item.items()}
+                    if item['role'] == "tool" and 'content' in item:
+                        # Restore the tool result that was replaced by a placeholder for the client
+                        item['content'] = tool_result_store.resolve(item['content'])
+                    super().append(item)
                 else:
                     raise ValueError("Each item must be a dictionary with 'role' and 'content' keys or a Message object. But got: " + str(item))
 
@@ -0,0 +1,214 @@
+"""
+Incremental parser for tool calls embedded in a streamed model output.
+"""
+from typing import Any, Iterable, List, Optional, Tuple
+from json import loads, JSONDecodeError
+from ast import literal_eval
+
+
+class ToolCallParser:
+    """
+    Streaming state machine that splits model output into plain text and tool calls.
+
+    Text outside of the tool call tags is passed through as it arrives. Inside the tags
+    the JSON object is scanned character by character (brace depth, strings and escapes),
+    so the tool name is validated as soon as it is streamed and the call is emitted the
+    moment its object closes, before the closing tag or any trailing tokens arrive.
+
+    `feed` and `close` return a list of events:
+        (TEXT, str)                         - text to forward to the client
+        (CALL, (name, arguments))           - a complete tool call
+        (REJECT, (name, arguments, reason)) - an unknown tool or a malformed call
+    """
+    TEXT = "text"
+    CALL = "call"
+    REJECT = "reject"
+
+    __OUTSIDE = 0  # plain text
+    __INSIDE = 1   # inside the tags, scanning the JSON object
+    __SKIP = 2     # inside the tags, ignoring everything until the closing tag
+
+    def __init__(self, start_tag: str = "<tool_call>", end_tag: str = "</tool_call>", known_tools: Optional[Iterable[str]] = None):
+        self.start_tag = start_tag
+        self.end_tag = end_tag
+        self.known_tools = set(known_tools) if known_tools is not None else None
+
+        self.__state = self.__OUTSIDE
+        self.__carry = ""  # possible beginning of a tag held back from the previous chunk
+        self.__reset_object()
+
+    def __reset_object(self):
+        self.__chunks: List[str] = []  # raw JSON text (joined once, when the object closes)
+        self.__depth = 0
+        self.__quote = ""
+        self.__escape = False
+        self.__string: List[str] = []  # current string literal at depth 1 (keys and the tool name)
+        self.__name_key = False
+        self.__name_expected = False
+        self.__name: Optional[str] = None
+
+    def __held_back(self, text: str, tags: Tuple[str, ...]) -> int:
+        """ Length of the longest suffix of `text` that may be the beginning of a tag """
+        longest = 0
+        for tag in tags:
+            for size in range(min(len(tag) - 1, len(text)), longest, -1):
+                if text.endswith(tag[:size]):
+                    longest = size
+                    break
+        return longest
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """ Consume the next piece of model output """
+        events = []
+        text = self.__carry + text
+        self.__carry = ""
+
+        while text:
+            if self.__state == self.__OUTSIDE:
+                index = text.find(self.start_tag)
+                if index < 0:
+                    stray = text.find(self.end_tag)  # Drop closing tags without an opening one
+                    if stray >= 0:
+                        if stray:
+                            events.append((self.TEXT, text[:stray]))
+                        text = text[stray + len(self.end_tag):]
+                        continue
+                    hold = self.__held_back(text, (self.start_tag, self.end_tag))
+                    if len(text) > hold:
+                        events.append((self.TEXT, text[:len(text) - hold]))
+                    self.__carry = text[len(text) - hold:]
+                    break
+                if index:
+                    events.append((self.TEXT, text[:index]))
+                text = text[index + len(self.start_tag):]
+                self.__state = self.__INSIDE
+                self.__reset_object()
+                continue
+
+            start, end = text.find(self.start_tag), text.find(self.end_tag)
+            tags = [i for i in (start, end) if i >= 0]
+            if not tags:
+                hold = self.__held_back(text, (self.start_tag, self.end_tag))
+                self.__scan(text[:len(text) - hold], events)
+                self.__carry = text[len(text) - hold:]
+                break
+
+            index = min(tags)
+            self.__scan(text[:index], events)
+            if index == start:  # Nested opening tag: restart the call
+                text = text[index + len(self.start_tag):]
+                self.__state = self.__INSIDE
+                self.__reset_object()
+            else:  # Closing tag
+                text = text[index + len(self.end_tag):]
+                if self.__state == self.__INSIDE and self.__chunks:
+                    self.__reject(events, "Tool call JSON is incomplete.")
+                self.__state = self.__OUTSIDE
+        return events
+
+    def close(self) -> List[Tuple[str, Any]]:
+        """ Flush the parser at the end of the output stream """
+        events = []
+        carry, self.__carry = self.__carry, ""
+        if self.__state == self.__OUTSIDE:
+            if carry:
+                events.append((self.TEXT, carry))
+        else:
+            self.__scan(carry, events)
+            if self.__state == self.__INSIDE and self.__chunks:
+                self.__reject(events, "Tool call JSON is incomplete.")
+        self.__state = self.__OUTSIDE
+        return events
+
+    def __scan(self, text: str, events: List[Tuple[str, Any]]):
+        """ Advance the JSON scanner over a piece of text inside the tags """
+        if self.__state != self.__INSIDE or not text:
+            return
+
+        begin = 0
+        if self.__depth == 0:  # Skip everything before the opening brace
+            begin = text.find("{")
+            if begin < 0:
+                return
+
+        for i in range(begin, len(text)):
+            char = text[i]
+            if self.__quote:
+                if self.__depth == 1:
+                    self.__string.append(char)
+                if self.__escape:
+                    self.__escape = False
+                elif char == "\\":
+                    self.__escape = True
+                elif char == self.__quote:
+                    self.__quote = ""
+                    if self.__depth == 1 and not self.__on_string(events):
+                        return
+            elif char in "\"'":
+                self.__quote = char
+                if self.__depth == 1:
+                    self.__string = [char]
+            elif char in "{[":
+                self.__depth += 1
+            elif char in "}]":
+                self.__depth -= 1
+                if self.__depth == 0:
+                    self.__chunks.append(text[begin:i + 1])
+                    self.__dispatch(events)
+                    return
+            elif self.__depth == 1 and char in ":,":
+                self.__name_expected = char == ":" and self.__name_key
+                self.__name_key = False
+        self.__chunks.append(text[begin:])
+
+    def __on_string(self, events: List[Tuple[str, Any]]) -> bool:
+        """ Handle a string literal closed at depth 1. Returns False if the call was rejected. """
+        literal = "".join(self.__string)
+        self.__string = []
+        try:
+            value = loads(literal) if literal[0] == '"' else literal_eval(literal)
+        except (JSONDecodeError, ValueError, SyntaxError):
+            return True
+
+        if self.__name_expected:
+            self.__name_expected = False
+            self.__name = value
+            if self.known_tools is not None and value not in self.known_tools:
+                self.__reject(events, f"Function '{value}' is not registered.")
+                return False
+        else:
+            self.__name_key = value == "name"
+        return True
+
+    def __dispatch(self, events: List[Tuple[str, Any]]):
+        raw = "".join(self.__chunks)
+        try:
+            params = loads(raw)
+        except JSONDecodeError:
+            try:
+                params = literal_eval(raw)  # Python style dict with single quotes
+            except (ValueError, SyntaxError):
+                params = None
+
+        if not isinstance(params, dict) or not isinstance(params.get("name"), str):
+            self.__reject(events, "Tool call is not a valid JSON object with a 'name' field.")
+            return
+
+        arguments = params.get("arguments", params.get("parameters", {}))
+        if isinstance(arguments, str):  # OpenAI style arguments encoded as a JSON string
+            try:
+                arguments = loads(arguments)
+            except JSONDecodeError:
+                pass
+        if self.known_tools is not None and params["name"] not in self.known_tools:
+            self.__reject(events, f"Function '{params['name']}' is not registered.", arguments)
+            return
+
+        events.append((self.CALL, (params["name"], arguments)))
+        self.__state = self.__SKIP
+        self.__reset_object()
+
+    def __reject(self, events: List[Tuple[str, Any]], reason: str, arguments: Any = None):
+        events.append((self.REJECT, (self.__name, arguments, reason)))
+        self.__state = self.__SKIP
+        self.__reset_object()
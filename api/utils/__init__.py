@@ -1,18 +1,20 @@
 from json import dumps, loads, JSONDecodeError
-from typing import ClassVar, Union
+from typing import Callable, ClassVar, Union
 from dataclasses import dataclass
-from datetime import datetime
 from copy import deepcopy
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future
 import threading
 
+from .executor import tool_executor
+from .cache import tool_cache
+from .store import tool_result_store, new_call_id
 from . import weather
 from . import calendar
 from . import currency
 from . import calculator
 from . import web_search
-#from . import embedding
+from . import embedding
 
 
 @dataclass
@@ -23,15 +25,37 @@ class FunctionCalling:
     DISABLED: ClassVar['FunctionCalling'] = None
     DEFAULT: ClassVar['FunctionCalling'] = None
 
+    def available_schemas(self) -> list[dict]:
+        """ Schemas of the tools that can be used right now """
+        return [schema for schema in self.schemas if getattr(schema, 'available', None) is None or schema.available()]
+
 
 class FunctionSchema(dict):
-    def __init__(self, name: str, description: str, parameters: dict, *args, **kwargs):
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        parameters: dict,
+        *args,
+        timeout: float | None = None,
+        max_concurrency: int | None = None,
+        cache_ttl: float | None = None,
+        stale_ttl: float | None = None,
+        available: Callable[[], bool] | None = None,
+        **kwargs
+    ):
         super().__init__(*args, **kwargs)
         self.update({
             "name": name,
             "description": description,
             "parameters": parameters
         })
+        # Execution policy (kept out of the dict so it is never sent to the model)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.cache_ttl = cache_ttl  # seconds a result is reused across sessions (None: never cached)
+        self.stale_ttl = stale_ttl  # extra seconds a stale result is served while refreshing
+        self.available = available  # the tool is offered to the model only while this returns True (None: always)
 
     @property
     def name(self) -> str:
@@ -69,7 +93,7 @@ class FunctionCallResult(list):
         self.implementations: dict = FunctionCalling.DEFAULT.implementations
 
         self.__queue_mutex = threading.Lock()
-        self.__thread_pool = ThreadPoolExecutor()
+        self.__job_finished = threading.Condition(self.__queue_mutex)
         self.__completed_jobs = 0
         self.__message_queue: list[str] = []
 
@@ -87,14 +111,46 @@ class FunctionCallResult(list):
 
     @property
     def state(self):
+        events = self.events
+        if not events:
+            return None
+        else:
+            # Return the current state of the message queue
+            return "\n" + "\n".join(events)
+
+    @property
+    def events(self) -> list[str]:
+        """ Pop the pending client-side messages (one tagged message per event) """
         with self.__queue_mutex:
-            if not self.__message_queue:
-                return None
-            else:
-                # Return the current state of the message queue
-                queue = self.__message_queue
-                self.__message_queue = []
-                return "\n" + "\n".join(queue)
+            queue = self.__message_queue
+            self.__message_queue = []
+            return queue
+
+    @property
+    def pending(self) -> int:
+        """ Number of tool calls that have not finished yet """
+        return len(self.job_list) - self.__completed_jobs
+
+    def progress(self, tag: tuple[str, str] = ("<tool_call>", "</tool_call>")) -> str:
+        """ Client-side progress event of the staged tool calls """
+        with self.__queue_mutex:
+            total = len(self.job_list)
+            completed = self.__completed_jobs
+        return tag[0] + "\n" + dumps(dict(progress=dict(
+            completed=completed, total=total
+        )), ensure_ascii=False) + "\n" + tag[1]
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until a staged tool call finishes or the timeout expires.
+
+        Returns:
+            True if no tool call is pending anymore.
+        """
+        with self.__job_finished:
+            if self.pending > 0:
+                self.__job_finished.wait(timeout)
+            return self.pending == 0
 
     def finalize(
         self,
@@ -127,19 +183,32 @@ class FunctionCallResult(list):
                 # Clear the job list and message queue
                 self.job_list = []
                 self[:] = self[:1]
+                self[0]['tool_calls'] = self.job_list
                 self.__completed_jobs = 0
                 self.__message_queue = []
                 return result
 
     def stage(self, calling: str, tag: tuple[str, str] = ("<tool_call>", "</tool_call>")):
-        with self.__queue_mutex:
-            job_id = datetime.now().strftime("call_%Y%m%d%H%M%S")
-            try:
-                params = loads(calling)
-            except JSONDecodeError:
-                pass  # TODO: Handle invalid JSON format if needed (in the future)
-            name, arguments = params.get("name"), params.get("arguments")
+        """ Stage a tool call from its JSON string """
+        try:
+            params = loads(calling)
+        except JSONDecodeError:
+            params = None
+        if not isinstance(params, dict):
+            self.stage_call(None, None, tag, error="Tool call is not a valid JSON object with a 'name' field.")
+        else:
+            self.stage_call(params.get("name"), params.get("arguments"), tag)
 
+    def stage_call(
+        self,
+        name: str | None,
+        arguments: dict | None,
+        tag: tuple[str, str] = ("<tool_call>", "</tool_call>"),
+        error: str | None = None
+    ):
+        """ Stage a parsed tool call and start it immediately (or record `error` as its result) """
+        with self.__queue_mutex:
+            job_id = new_call_id()
             self.job_list.append(dict(id=job_id, function=dict(
                 name=name,
                 arguments=arguments
@@ -148,7 +217,13 @@ class FunctionCallResult(list):
                 name=name, arguments=deepcopy(arguments)
             ))), ensure_ascii=False) + "\n" + tag[1])
 
-            self.__thread_pool.submit(self.do, job_id, name, arguments, tag)
+        # Submit outside of the mutex: the callback may run immediately in this thread
+        if error is None:
+            future = self.do(job_id, name, arguments, tag)
+        else:
+            future = Future()
+            future.set_exception(ValueError(error))
+        future.add_done_callback(lambda done: self.complete(job_id, name, done, tag))
 
     def do(
         self,
@@ -156,16 +231,40 @@ class FunctionCallResult(list):
         name: str,
         arguments: dict,
         tag: tuple[str, str] = ("<tool_call>", "</tool_call>")
+    ) -> Future:
+        """ Execute the function on the shared tool executor (through the result cache) """
+        if name not in self.implementations:
+            future = Future()
+            future.set_exception(ValueError(f"Function '{name}' is not registered."))
+            return future
+        arguments = arguments or {}
+        if len(arguments) == 1 and "properties" in arguments:
+            arguments = arguments["properties"]  # un-nesting arguments
+
+        schema = next((schema for schema in self.schemas if schema['name'] == name), None)
+        return tool_cache.submit(
+            name,
+            self.implementations[name],
+            arguments,
+            ttl=getattr(schema, 'cache_ttl', None),
+            stale_ttl=getattr(schema, 'stale_ttl', None),
+            timeout=getattr(schema, 'timeout', None),
+            max_concurrency=getattr(schema, 'max_concurrency', None)
+        )
+
+    def complete(
+        self,
+        job_id: str,
+        name: str,
+        future: Future,
+        tag: tuple[str, str] = ("<tool_call>", "</tool_call>")
     ):
-        # Execute the function
+        """ Record the result of a finished tool call """
         try:
-            if name not in self.implementations:
-                raise ValueError(f"Function '{name}' is not registered.")
-            if len(arguments) == 1 and "properties" in arguments:
-                arguments = arguments["properties"]  # un-nesting arguments
-            result = self.implementations[name](**arguments)
+            result = future.result()
         except Exception as e:
             result = str(e)
+        tool_result_store.put(job_id, result)  # resolves the client-side placeholder on later turns
 
         # History and result handling
         with self.__queue_mutex:
@@ -177,8 +276,9 @@ class FunctionCallResult(list):
                 name=name, content=f"<cached_result:{job_id}>"
             ))), ensure_ascii=False) + "\n" + tag[1])  # for immediate response
 
-            # Increment the completed job count
+            # Increment the completed job count and wake up the waiting generator
             self.__completed_jobs += 1
+            self.__job_finished.notify_all()
 
 
 FunctionCalling.DISABLED = FunctionCalling(schemas=[], implementations={})
@@ -201,7 +301,8 @@ FunctionCalling.DEFAULT = FunctionCalling(
                     }
                 },
                 "required": ["location"]
-            }
+            },
+            cache_ttl=600
         ),
         FunctionSchema(
             name="get_weather_forecast",
@@ -226,7 +327,36 @@ FunctionCalling.DEFAULT = FunctionCalling(
                     }
                 },
                 "required": ["location"]
-            }
+            },
+            cache_ttl=1800
+        ),
+        FunctionSchema(
+            name="get_weather_multi",
+            description="Get current weather or forecasts for several locations at once (use it to compare cities)",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "locations": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Locations to compare (e.g., [\"Cheonan\", \"Seoul\", \"Busan\"]), up to 20"
+                    },
+                    "days": {
+                        "type": "integer",
+                        "description": "0 for the current weather (default), otherwise the number of days to forecast",
+                        "default": 0,
+                        "minimum": 0,
+                        "maximum": 15
+                    },
+                    "unit": {
+                        "type": "string",
+                        "enum": ["celsius", "fahrenheit"],
+                        "description": "Temperature unit"
+                    }
+                },
+                "required": ["locations"]
+            },
+            cache_ttl=600
         ),
         FunctionSchema(
             name="get_calendar_events",
@@ -245,7 +375,8 @@ FunctionCalling.DEFAULT = FunctionCalling(
                     }
                 },
                 "required": ["date"]
-            }
+            },
+            cache_ttl=86400
         ),
         FunctionSchema(
             name="get_upcoming_holidays",
@@ -267,7 +398,8 @@ FunctionCalling.DEFAULT = FunctionCalling(
                     }
                 },
                 "required": []
-            }
+            },
+            cache_ttl=3600
         ),
         FunctionSchema(
             name="get_exchange_rate",
@@ -288,24 +420,41 @@ FunctionCalling.DEFAULT = FunctionCalling(
                         "description": "Amount to convert (default: 1.0)",
                         "default": 1.0,
                         "minimum": 0.01
+                    },
+                    "amounts": {
+                        "type": "array",
+                        "items": {"type": "number", "minimum": 0.01},
+                        "description": "Several amounts to convert in one call (replaces amount)"
+                    },
+                    "to_currencies": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Further target currency codes to convert into in the same call (e.g. [\"EUR\", \"JPY\"])"
                     }
                 },
                 "required": ["from_currency", "to_currency"]
-            }
+            },
+            cache_ttl=3600
         ),
         FunctionSchema(
             name="calculate",
-            description="Perform mathematical calculations",
+            description="Perform mathematical calculations. Several steps can be computed in one call with `expressions`, where `name = expression` stores a result for the following steps",
             parameters={
                 "type": "object",
                 "properties": {
                     "expression": {
                         "type": "string",
                         "description": "Mathematical expression to evaluate"
+                    },
+                    "expressions": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Expressions to evaluate in order (e.g. [\"rent = 1200000 * 12\", \"rent * 1.1\"])"
                     }
                 },
-                "required": ["expression"]
-            }
+                "required": []
+            },
+            timeout=5
         ),
         FunctionSchema(
             name="search_web",
@@ -332,7 +481,8 @@ FunctionCalling.DEFAULT = FunctionCalling(
                     }
                 },
                 "required": ["query"]
-            }
+            },
+            cache_ttl=1800
         ),
         FunctionSchema(
             name="search_website",
@@ -357,7 +507,62 @@ FunctionCalling.DEFAULT = FunctionCalling(
                     }
                 },
                 "required": ["query"]
-            }
+            },
+            cache_ttl=1800
+        ),
+        FunctionSchema(
+            name="research",
+            description="Search the web and read the top result pages at once, returning the passages relevant to the query with numbered sources. Prefer this over search_web followed by fetch_webpage",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Research question or search query"
+                    },
+                    "top_k": {
+                        "type": "integer",
+                        "description": "Number of result pages to read (default: 3)",
+                        "default": 3,
+                        "minimum": 1,
+                        "maximum": 8
+                    },
+                    "max_passages": {
+                        "type": "integer",
+                        "description": "Maximum number of passages to return (default: 6)",
+                        "default": 6,
+                        "minimum": 1,
+                        "maximum": 20
+                    }
+                },
+                "required": ["query"]
+            },
+            timeout=45,
+            cache_ttl=1800
+        ),
+        FunctionSchema(
+            name="search_documents",
+            description="Search the indexed center documents (urban regeneration PDF reports, dashboard statistics such as budgets, aged and renewed homes, satisfaction, and the center homepage) and return the relevant passages",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Question or keywords"
+                    },
+                    "top_k": {
+                        "type": "integer",
+                        "description": "Number of passages to return (default: 5)",
+                        "default": 5,
+                        "minimum": 1,
+                        "maximum": 20
+                    }
+                },
+                "required": ["query"]
+            },
+            timeout=10,
+            cache_ttl=600,
+            available=lambda: len(embedding.document_search.index) > 0
         ),
         FunctionSchema(
             name="fetch_webpage",
@@ -376,19 +581,24 @@ FunctionCalling.DEFAULT = FunctionCalling(
                     }
                 },
                 "required": ["url"]
-            }
+            },
+            timeout=20,
+            cache_ttl=600
         )
     ],
 
     implementations=dict(
         get_weather=weather.get_weather,
         get_weather_forecast=weather.get_weather_forecast,
+        get_weather_multi=weather.get_weather_multi,
         get_calendar_events=calendar.get_calendar_events,
         get_upcoming_holidays=calendar.get_upcoming_holidays,
         get_exchange_rate=currency.get_exchange_rate,
         calculate=calculator.calculate,
         search_web=web_search.search_web,
         search_website=web_search.search_website,
+        research=web_search.research,
+        search_documents=embedding.search_documents,
         fetch_webpage=web_search.fetch_webpage
     )
 )
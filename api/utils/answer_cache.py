@@ -0,0 +1,316 @@
+"""
+Semantic answer cache placed in front of the chat model.
+
+A first-turn question is embedded and compared with the questions answered before; a near-duplicate
+is answered with the earlier answer as long as every tool result that answer was built on is still
+fresh and unchanged in the tool cache. Refreshes that change a tool result advance its data version
+(see `ToolCache.data_version`), which retires the answers that depended on it.
+
+    python -m api.utils.answer_cache tune    # hit and false-hit rate per threshold on data/eval/answer_cache.json
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import threading
+import hashlib
+import time
+import re
+import os
+
+try:
+    from .cache import ToolCache, tool_cache, is_error_result, normalize_value
+    from .embedding import Embedder, HashingEmbedder, get_embedder
+except ImportError:
+    from cache import ToolCache, tool_cache, is_error_result, normalize_value
+    from embedding import Embedder, HashingEmbedder, get_embedder
+
+
+# Numbers must match exactly: "2023년 예산" and "2024년 예산" are near-duplicates by vocabulary only
+_LITERAL = re.compile(r"\d+")
+
+# Default similarity thresholds, measured with `python -m api.utils.answer_cache tune` on data/eval/answer_cache.json.
+# The hashing embedder scores unrelated questions that share words ("최신 공지사항" vs "최신 뉴스") up to 0.79.
+HASHING_THRESHOLD = 0.82
+MODEL_THRESHOLD = 0.9
+
+TUNING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "eval", "answer_cache.json")
+
+# Marker added by `mark_stale` to results served from the last good value of a failing upstream
+STALE_MARKER = "외부 서비스에 접속할 수 없어"
+
+
+def tool_calls(history: Iterable[dict]) -> Iterable[Tuple[str, dict]]:
+    """ (name, arguments) of the tool calls in chat history messages, arguments un-nested like `FunctionCallResult.do` """
+    for message in history:
+        for call in message.get("tool_calls") or []:
+            function = call.get("function") or {}
+            arguments = function.get("arguments") or {}
+            if isinstance(arguments, dict) and len(arguments) == 1 and "properties" in arguments:
+                arguments = arguments["properties"]
+            yield function.get("name"), arguments
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    scope: str
+    vector: np.ndarray
+    literals: frozenset
+    words: List[str]
+    dependencies: Dict[str, Tuple[int, int, int]]
+    elapsed: float
+    expires_at: float
+    hits: int = 0
+
+
+@dataclass
+class AnswerCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    skipped: int = 0
+    invalidated: int = 0
+    saved_seconds: float = 0.0
+    lookup_ms: List[float] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        latencies = sorted(self.lookup_ms)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "skipped": self.skipped,
+            "invalidated": self.invalidated,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 1),
+            "lookup_p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else 0.0
+        }
+
+
+class AnswerCache:
+    """
+    Near-duplicate question cache for first-turn chat answers.
+
+    - Answers are partitioned by a scope (model, system prompt, tools, sampling and date), so a
+      cached answer is only served under the settings it was generated with.
+    - A question hits when the cosine similarity of its embedding to a cached question reaches
+      `threshold` and both contain the same numbers. Questions are embedded with sentence-transformers
+      when it is installed (ANSWER_CACHE_EMBEDDER overrides it). The hashing fallback compares
+      vocabulary only, so it catches rewordings ("센터 전화번호 알려줘요") but few paraphrases.
+    - Without an explicit `threshold` the one tuned for the embedder is used (HASHING_THRESHOLD or
+      MODEL_THRESHOLD).
+    - An answer records the data version of every tool call it used. Answers that used no tool
+      (they may quote the clock of the system prompt), an uncached tool, a failed call or a stale
+      fallback result are not stored, and an answer whose dependencies are no longer fresh or have
+      changed is dropped on lookup.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: Optional[float] = None,
+        ttl: float = 21600.0,
+        max_entries: int = 512,
+        cache: ToolCache = tool_cache,
+        enabled: bool = True
+    ):
+        self.__threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache = cache
+        self.enabled = enabled
+
+        self.__embedder = embedder
+        self.__lock = threading.Lock()
+        self.__entries: List[CachedAnswer] = []
+        self.__stats = AnswerCacheStats()
+
+    @property
+    def embedder(self) -> Embedder:
+        if self.__embedder is None:
+            self.__embedder = get_embedder(os.getenv("ANSWER_CACHE_EMBEDDER", "sentence-transformers"))
+        return self.__embedder
+
+    @property
+    def threshold(self) -> float:
+        if self.__threshold is not None:
+            return self.__threshold
+        return HASHING_THRESHOLD if isinstance(self.embedder, HashingEmbedder) else MODEL_THRESHOLD
+
+    @threshold.setter
+    def threshold(self, value: Optional[float]):
+        self.__threshold = value
+
+    @staticmethod
+    def scope(*parts: Any) -> str:
+        """ Partition key of the settings an answer depends on """
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    def __embed(self, question: str) -> Tuple[np.ndarray, frozenset]:
+        question = normalize_value(question)
+        return self.embedder.embed([question])[0], frozenset(_LITERAL.findall(question))
+
+    def similarity(self, question: str, cached: str) -> float:
+        """ Similarity `lookup` compares with `threshold` (0.0 when the numbers differ) """
+        (vector, literals), (cached_vector, cached_literals) = self.__embed(question), self.__embed(cached)
+        return float(vector @ cached_vector) if literals == cached_literals else 0.0
+
+    def dependencies(self, history: Iterable[dict], schemas: List[dict], implementations: dict) -> Optional[Dict[str, Tuple[int, int, int]]]:
+        """
+        Data versions of the tool calls in a slice of the chat history.
+
+        Returns:
+            Cache key -> data version, or None if the answer depends on a result that cannot be tracked
+        """
+        dependencies = {}
+        for message in history:
+            if message.get("role") == "tool":
+                content = message.get("content")
+                if is_error_result(content) or (isinstance(content, str) and STALE_MARKER in content):
+                    return None
+            for name, arguments in tool_calls([message]):
+                schema = next((schema for schema in schemas if schema["name"] == name), None)
+                if schema is None or not getattr(schema, "cache_ttl", None) or name not in implementations:
+                    return None
+                key = self.cache.make_key(name, implementations[name], arguments)
+                version = self.cache.data_version(key) if key is not None else None
+                if version is None:
+                    return None
+                dependencies[key] = version
+        return dependencies
+
+    def lookup(self, question: str, scope: str) -> Optional[List[str]]:
+        """ Words of the cached answer to a near-duplicate question, or None """
+        if not self.enabled or not question or not question.strip():
+            return None
+        started = time.perf_counter()
+        vector, literals = self.__embed(question)
+        threshold = self.threshold
+        now = time.monotonic()
+        with self.__lock:
+            self.__entries = [entry for entry in self.__entries if entry.expires_at > now]
+            candidates = [entry for entry in self.__entries if entry.scope == scope and entry.literals == literals]
+            best = None
+            if candidates:
+                similarities = np.stack([entry.vector for entry in candidates]) @ vector
+                index = int(np.argmax(similarities))
+                if similarities[index] >= threshold:
+                    best = candidates[index]
+            if best is not None and any(self.cache.data_version(key) != version for key, version in best.dependencies.items()):
+                self.__entries.remove(best)  # built on tool data that has been refreshed since
+                self.__stats.invalidated += 1
+                best = None
+            if best is None:
+                self.__stats.misses += 1
+            else:
+                best.hits += 1
+                self.__stats.hits += 1
+                self.__stats.saved_seconds += best.elapsed
+            self.__stats.lookup_ms = self.__stats.lookup_ms[-999:] + [(time.perf_counter() - started) * 1000]
+        return list(best.words) if best is not None else None
+
+    def store(self, question: str, scope: str, words: List[str], dependencies: Optional[Dict[str, Tuple[int, int, int]]], elapsed: float = 0.0) -> bool:
+        """ Cache an answer; returns False if no tool data backs it (`dependencies` is None or empty) """
+        if not self.enabled or not question or not question.strip() or not "".join(words).strip():
+            return False
+        if not dependencies:
+            with self.__lock:
+                self.__stats.skipped += 1
+            return False
+        vector, literals = self.__embed(question)
+        entry = CachedAnswer(question, scope, vector, literals, list(words), dict(dependencies), elapsed, time.monotonic() + self.ttl)
+        with self.__lock:
+            # Replace a cached answer to the same question instead of keeping both
+            self.__entries = [
+                cached for cached in self.__entries
+                if not (cached.scope == scope and cached.literals == literals and float(cached.vector @ vector) >= 0.999)
+            ]
+            self.__entries.append(entry)
+            del self.__entries[:-self.max_entries]
+            self.__stats.stores += 1
+        return True
+
+    def invalidate(self):
+        """ Drop every cached answer """
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """ Hit-rate counters and entry count """
+        with self.__lock:
+            embedder = self.__embedder  # not loaded just for the counters
+            return {
+                "enabled": self.enabled, "entries": len(self.__entries),
+                "embedder": embedder.name if embedder is not None else None,
+                "threshold": self.threshold if embedder is not None or self.__threshold is not None else None,
+                **self.__stats.as_dict()
+            }
+
+
+# Global answer cache instance
+answer_cache = AnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD")) if os.getenv("ANSWER_CACHE_THRESHOLD") else None,
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "21600")),
+    enabled=os.getenv("ANSWER_CACHE", "on").lower() not in ("0", "off", "false")
+)
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Semantic answer cache")
+    parser.add_argument("command", nargs="?", choices=["demo", "tune"], default="demo")
+    parser.add_argument("--embedder", choices=["hashing", "sentence-transformers"], default=None)
+    args = parser.parse_args()
+
+    if args.command == "tune":
+        # Hit rate (rewordings served from the cache) and false-hit rate (other questions served) per threshold
+        with open(TUNING_FILE, "r", encoding="utf-8") as file:
+            pairs = json.load(file)["pairs"]
+        cache = AnswerCache(embedder=get_embedder(args.embedder or os.getenv("ANSWER_CACHE_EMBEDDER", "sentence-transformers")))
+        scored = [(cache.similarity(pair["question"], pair["cached"]), pair["same"]) for pair in pairs]
+        same = sum(expected for _, expected in scored)
+        other = len(scored) - same
+        print(f"{cache.embedder.name}: {same} rewordings, {other} other questions (default threshold {cache.threshold})")
+        for threshold in np.arange(0.70, 0.99, 0.02):
+            hits = sum(score >= threshold for score, expected in scored if expected)
+            false_hits = sum(score >= threshold for score, expected in scored if not expected)
+            print(f"  {threshold:.2f}: hit rate {hits}/{same} ({hits / same:.0%}), false hits {false_hits}/{other}")
+        raise SystemExit
+
+    def get_center_contact(section: str = "all"):
+        return "천안시 도시재생지원센터 전화번호: 041-000-0000"
+
+    class Schema(dict):
+        cache_ttl = 3600
+
+    schemas = [Schema(name="get_center_contact")]
+    implementations = {"get_center_contact": get_center_contact}
+    history = [
+        {"role": "assistant", "content": "", "tool_calls": [{"id": "call_1", "function": {"name": "get_center_contact", "arguments": {}}}]},
+        {"role": "tool", "tool_call_id": "call_1", "content": get_center_contact()}
+    ]
+
+    cache = AnswerCache()
+    scope = cache.scope("model", "system prompt", ("get_center_contact",))
+    tool_cache.submit("get_center_contact", get_center_contact, {}, ttl=3600).result()
+
+    dependencies = cache.dependencies(history, schemas, implementations)
+    print("Dependencies:", dependencies)
+    cache.store("센터 전화번호 알려줘", scope, ["센터 ", "전화번호는 ", "041-000-0000", "입니다."], dependencies, elapsed=12.0)
+
+    for question in ["센터 전화번호 알려줘", "센터 전화번호 알려줘요", "센터 전화번호 좀 알려줘", "센터 위치 알려줘", "2024년 예산"]:
+        words = cache.lookup(question, scope)
+        print(f"{question!r}: {''.join(words) if words else 'miss'}")
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        cache.lookup("센터 전화번호 알려줘", scope)
+    print(f"Lookup: {(time.perf_counter() - started):.3f} ms per question")
+
+    tool_cache.invalidate("get_center_contact")  # e.g. the center page was re-mirrored
+    print("After invalidation:", cache.lookup("센터 전화번호 알려줘", scope))
+    print(cache.stats())
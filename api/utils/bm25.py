@@ -0,0 +1,138 @@
+"""
+In-memory BM25 index with a Korean-aware tokenizer.
+"""
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Tuple
+import threading
+import math
+import re
+
+
+_WORD = re.compile(r"[가-힣]+|[a-z0-9]+(?:\.[0-9]+)?")
+
+# Particles (조사) stripped from the end of Hangul words, longest first
+JOSA = tuple(sorted((
+    "에서는", "으로는", "에게서", "이라고", "에서", "으로", "에게", "까지", "부터", "보다", "처럼", "이나", "이랑",
+    "과는", "와는", "에는", "은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "도", "로", "만", "나", "랑"
+), key=len, reverse=True))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+
+    Latin words and numbers are lowercased. Hangul words lose a trailing particle and are
+    indexed both whole and as character bigrams, so that compounds written without spaces
+    ("도시재생지원센터") still match their parts ("도시재생", "지원").
+    """
+    terms = []
+    for word in _WORD.findall(text.casefold()):
+        if not "가" <= word[0] <= "힣":
+            terms.append(word)
+            continue
+        for josa in JOSA:
+            if len(word) > len(josa) + 1 and word.endswith(josa):
+                word = word[:-len(josa)]
+                break
+        terms.append(word)
+        if len(word) > 2:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an incrementally updated document set.
+
+    Documents are added, replaced and removed by id without rebuilding the index;
+    per-document term counts are kept so a replaced document's postings can be removed.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        self.__lock = threading.Lock()
+        self.__postings: Dict[str, Dict[Hashable, int]] = {}  # term -> {doc id: term frequency}
+        self.__documents: Dict[Hashable, Counter] = {}  # doc id -> term counts
+        self.__lengths: Dict[Hashable, int] = {}
+        self.__total_length = 0
+
+    def add(self, doc_id: Hashable, text: str):
+        """ Index a document (replacing the previous version with the same id) """
+        counts = Counter(tokenize(text))
+        with self.__lock:
+            self.__remove(doc_id)
+            self.__documents[doc_id] = counts
+            length = sum(counts.values())
+            self.__lengths[doc_id] = length
+            self.__total_length += length
+            for term, frequency in counts.items():
+                self.__postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, doc_id: Hashable):
+        with self.__lock:
+            self.__remove(doc_id)
+
+    def __remove(self, doc_id: Hashable):
+        counts = self.__documents.pop(doc_id, None)
+        if counts is None:
+            return
+        self.__total_length -= self.__lengths.pop(doc_id)
+        for term in counts:
+            postings = self.__postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.__postings[term]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Hashable, float]]:
+        """ Top `k` (doc id, score) pairs for a query """
+        terms = Counter(tokenize(query))
+        scores: Dict[Hashable, float] = {}
+        with self.__lock:
+            count = len(self.__documents)
+            if not count:
+                return []
+            average = self.__total_length / count
+            for term, weight in terms.items():
+                postings = self.__postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.__lengths[doc_id] / average)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def ids(self) -> Iterable[Hashable]:
+        with self.__lock:
+            return list(self.__documents)
+
+    def __len__(self) -> int:
+        return len(self.__documents)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self.__documents
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    import time
+
+    print(tokenize("천안시 도시재생지원센터에서 주민공모사업을 모집합니다 (2025년)"))
+
+    index = BM25Index()
+    index.add(1, "2025 도시재생 주민공모사업 모집 공고")
+    index.add(2, "천안역세권 도시재생 뉴딜사업 현장 투어 안내")
+    index.add(3, "센터 휴무 안내")
+    print(index.search("주민 공모사업"))
+    print(index.search("도시재생 투어"))
+    index.remove(2)
+    print(index.search("투어"))
+
+    for i in range(5000):
+        index.add(f"doc{i}", f"공지사항 {i}번 도시재생 마을 교육 프로그램 참여자 모집 안내 {i % 37}")
+    started = time.perf_counter()
+    for _ in range(100):
+        index.search("마을 교육 참여")
+    print(f"Search over {len(index)} documents: {(time.perf_counter() - started) * 10:.2f} ms per query")
@@ -0,0 +1,256 @@
+"""
+Cross-session cache for tool results with per-tool TTLs, stale-while-revalidate, single-flight calls
+and a last-good fallback for failing upstreams.
+"""
+from concurrent.futures import Future
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+from json import dumps
+import threading
+import hashlib
+import inspect
+import time
+
+from .executor import ToolExecutor, tool_executor
+
+
+# Results starting with these markers are failures and must not be cached
+ERROR_MARKERS = ("Error", "Search error", "홈페이지가 현재 접속되지 않아", "홈페이지 접속 오류")
+
+
+def is_error_result(result: Any) -> bool:
+    """ Check whether a tool result reports a failure """
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, str):
+        return result.startswith(ERROR_MARKERS)
+    return result is None
+
+
+def mark_stale(value: Any, age: float) -> Any:
+    """ Mark a last good result served in place of a failed call """
+    minutes = int(age // 60)
+    if isinstance(value, dict):
+        return {**value, "stale": True, "age": round(age)}
+    if isinstance(value, str):
+        when = f"{minutes}분 전" if minutes < 60 else f"{minutes // 60}시간 전"
+        return value + f"\n(외부 서비스에 접속할 수 없어 {when}에 조회한 정보를 제공합니다.)"
+    return value
+
+
+def normalize_value(value: Any) -> Any:
+    """ Normalize an argument value so that equivalent calls share a cache key """
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float
+    fresh_until: float
+    stale_until: float
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    refreshes: int = 0
+    stores: int = 0
+    fallbacks: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "stores": self.stores,
+            "fallbacks": self.fallbacks,
+            "hit_rate": round((self.hits + self.stale_hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
+
+
+class ToolCache:
+    """
+    Result cache placed in front of the tool executor.
+
+    - Fresh entries (younger than `ttl`) are returned without calling the tool.
+    - Stale entries (younger than `ttl + stale_ttl`) are returned immediately while
+      a single background call refreshes them (stale-while-revalidate).
+    - Concurrent identical calls share one in-flight future (single-flight).
+    - When a call fails (e.g. the upstream site is down or its circuit is open), the last good
+      result younger than `max_stale` is returned instead, marked stale by `mark_stale`.
+
+    Every cached call also has a data version that changes when a refresh stores a different
+    result or the tool is invalidated, so answers derived from tool results can be checked.
+    """
+
+    def __init__(self, executor: ToolExecutor = tool_executor, max_entries: int = 1024, max_stale: float = 86400.0):
+        self.executor = executor
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.__in_flight: Dict[str, Future] = {}
+        self.__stats: Dict[str, CacheStats] = {}
+        self.__versions: OrderedDict[str, Tuple[int, str]] = OrderedDict()  # key -> (version, digest)
+        self.__generations: Dict[str, int] = {}  # tool name -> invalidation count
+        self.__epoch = 0  # full invalidation count
+
+    @staticmethod
+    def make_key(name: str, func: Callable, arguments: dict) -> Optional[str]:
+        """ Build a normalized cache key, or None if the arguments do not fit the signature """
+        try:
+            bound = inspect.signature(func).bind(**arguments)
+        except (TypeError, ValueError):
+            return None
+        bound.apply_defaults()
+        arguments = {k: normalize_value(v) for k, v in bound.arguments.items()}
+        return name + ":" + dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+
+    def submit(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        arguments: Optional[dict] = None,
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None
+    ) -> Future:
+        """
+        Call a tool through the cache.
+
+        Args:
+            name: Tool name
+            func: Tool implementation
+            arguments: Keyword arguments for the implementation
+            ttl: Seconds a result stays fresh. Calls are not cached when None or 0.
+            stale_ttl: Extra seconds a stale result may be served while refreshing (defaults to `ttl`)
+            timeout: Deadline passed to the executor
+            max_concurrency: Concurrency limit passed to the executor
+
+        Returns:
+            Future resolving to the (possibly cached) tool result
+        """
+        arguments = arguments or {}
+        key = self.make_key(name, func, arguments) if ttl else None
+        if key is None:
+            return self.executor.submit(name, func, arguments, timeout=timeout, max_concurrency=max_concurrency)
+        stale_ttl = ttl if stale_ttl is None else stale_ttl
+
+        with self.__lock:
+            stats = self.__stats.setdefault(name, CacheStats())
+            now = time.monotonic()
+            entry = self.__entries.get(key)
+            if entry is not None and now < entry.stale_until:
+                self.__entries.move_to_end(key)
+                future = Future()
+                future.set_result(entry.value)
+                if now < entry.fresh_until:
+                    stats.hits += 1
+                    return future
+                stats.stale_hits += 1
+                if key in self.__in_flight:
+                    return future
+                stats.refreshes += 1  # Serve the stale value and refresh it in the background
+            elif key in self.__in_flight:
+                stats.coalesced += 1
+                return self.__in_flight[key]
+            else:
+                stats.misses += 1
+                future = None
+
+            call = self.executor.submit(name, func, arguments, timeout=timeout, max_concurrency=max_concurrency)
+            in_flight = Future()  # the call's result, or the last good one if the call fails
+            self.__in_flight[key] = in_flight
+
+        call.add_done_callback(lambda done: self.__store(name, key, done, in_flight, ttl, stale_ttl))
+        return future or in_flight
+
+    def __store(self, name: str, key: str, call: Future, in_flight: Future, ttl: float, stale_ttl: float):
+        try:
+            result, error = call.result(), None
+        except Exception as e:
+            result, error = None, e
+        with self.__lock:
+            self.__in_flight.pop(key, None)
+            now = time.monotonic()
+            if not is_error_result(result):
+                self.__entries[key] = CacheEntry(result, now, now + ttl, now + ttl + stale_ttl)
+                self.__entries.move_to_end(key)
+                self.__stats.setdefault(name, CacheStats()).stores += 1
+                while len(self.__entries) > self.max_entries:
+                    self.__entries.popitem(last=False)
+                self.__bump(key, result)
+            else:
+                entry = self.__entries.get(key)
+                if entry is not None and now - entry.stored_at < self.max_stale:
+                    self.__stats.setdefault(name, CacheStats()).fallbacks += 1
+                    result, error = mark_stale(entry.value, now - entry.stored_at), None  # kept unmarked in the cache
+
+        if error is not None:
+            in_flight.set_exception(error)
+        else:
+            in_flight.set_result(result)
+
+    def __bump(self, key: str, result: Any):
+        """ Advance the data version of a call when its stored result changed (lock held) """
+        digest = hashlib.sha1(dumps(result, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+        version, previous = self.__versions.pop(key, (0, None))
+        self.__versions[key] = (version + (digest != previous), digest)
+        while len(self.__versions) > self.max_entries * 4:
+            self.__versions.popitem(last=False)
+
+    def data_version(self, key: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Data version of a cached call (a key from `make_key`).
+
+        Returns:
+            (full invalidations, invalidations of the tool, result changes of the call),
+            or None if the call has no fresh cached result to depend on
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or time.monotonic() >= entry.fresh_until or key not in self.__versions:
+                return None
+            return self.__epoch, self.__generations.get(key.split(":", 1)[0], 0), self.__versions[key][0]
+
+    def invalidate(self, name: Optional[str] = None):
+        """ Drop the cached results of one tool (or of every tool) and advance their data versions """
+        with self.__lock:
+            if name is None:
+                self.__entries.clear()
+                self.__epoch += 1
+            else:
+                for key in [key for key in self.__entries if key.startswith(name + ":")]:
+                    del self.__entries[key]
+                self.__generations[name] = self.__generations.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """ Hit-rate counters of every tool """
+        with self.__lock:
+            tools = {name: stats.as_dict() for name, stats in self.__stats.items()}
+            entries = len(self.__entries)
+        return {"entries": entries, "tools": tools}
+
+
+# Global tool cache instance
+tool_cache = ToolCache()
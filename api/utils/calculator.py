@@ -1,80 +1,290 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Union
+import operator
 import math
+import ast
 import re
-from typing import Union
 
 
-def calculate(expression: str) -> str:
+Number = Union[int, float]
+
+
+class CalculatorError(ValueError):
+    """ Invalid expression or a resource limit hit while evaluating it """
+
+
+@dataclass(frozen=True)
+class CalculatorLimits:
+    """ Bounds that keep the worst-case evaluation time of one expression small """
+    max_length: int = 1000  # characters of one expression
+    max_steps: int = 2000  # evaluated AST nodes per call (all expressions of a batch)
+    max_int_bits: int = 4096  # bit length of any integer (about 1200 digits)
+    max_exponent: int = 10000  # absolute exponent of a power
+    max_batch: int = 50  # expressions per call
+
+
+DEFAULT_LIMITS = CalculatorLimits()
+
+CONSTANTS: Dict[str, Number] = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+class _Context:
+    """ State of one evaluation: step budget and the variables of a batch """
+
+    def __init__(self, limits: CalculatorLimits, variables: Optional[Dict[str, Number]] = None):
+        self.limits = limits
+        self.variables = variables if variables is not None else {}
+        self.steps = 0
+
+    def step(self):
+        self.steps += 1
+        if self.steps > self.limits.max_steps:
+            raise CalculatorError(f"Too many operations (limit {self.limits.max_steps})")
+
+    def check(self, value: Number) -> Number:
+        """ Reject results outside of the limits """
+        if isinstance(value, complex):
+            raise CalculatorError("Result is not a real number")
+        if isinstance(value, int) and value.bit_length() > self.limits.max_int_bits:
+            raise OverflowError()
+        if isinstance(value, float) and math.isinf(value):
+            raise OverflowError()
+        return value
+
+
+def _power(ctx: _Context, base: Number, exponent: Number) -> Number:
+    if abs(exponent) > ctx.limits.max_exponent:
+        if isinstance(base, (int, float)) and abs(base) in (0, 1):
+            return ctx.check(base ** exponent)
+        raise CalculatorError(f"Exponent too large (limit {ctx.limits.max_exponent})")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if (abs(base).bit_length() - 1) * exponent > ctx.limits.max_int_bits:
+            raise OverflowError()  # Checked before computing the power
+    return ctx.check(base ** exponent)
+
+
+def _multiply(ctx: _Context, a: Number, b: Number) -> Number:
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > ctx.limits.max_int_bits + 1:
+        raise OverflowError()
+    return ctx.check(a * b)
+
+
+def _factorial(ctx: _Context, n: Number) -> int:
+    if isinstance(n, float) and n.is_integer():
+        n = int(n)
+    if not isinstance(n, int) or n < 0:
+        raise ValueError("Factorial is only defined for non-negative integers")
+    if n > 1 and math.lgamma(n + 1) / math.log(2) > ctx.limits.max_int_bits:
+        raise OverflowError()  # Checked before computing the factorial
+    return math.factorial(n)
+
+
+def _log(ctx: _Context, x: Number, base: Optional[Number] = None) -> float:
+    return math.log(x) if base is None else math.log(x, base)
+
+
+def _round(ctx: _Context, x: Number, digits: Optional[int] = None) -> Number:
+    if digits is not None and (not isinstance(digits, int) or abs(digits) > 100):
+        raise ValueError("round() digits must be an integer between -100 and 100")
+    return round(x, digits) if digits is not None else round(x)
+
+
+def _unary(func: Callable[[Number], Number]) -> Callable[..., Number]:
+    return lambda ctx, x: func(x)
+
+
+# Functions callable from expressions: name -> (implementation taking the context, min args, max args)
+FUNCTIONS: Dict[str, tuple] = {
+    "abs": (_unary(abs), 1, 1),
+    "round": (_round, 1, 2),
+    "pow": (_power, 2, 2),
+    "sqrt": (_unary(math.sqrt), 1, 1),
+    "sin": (_unary(math.sin), 1, 1),
+    "cos": (_unary(math.cos), 1, 1),
+    "tan": (_unary(math.tan), 1, 1),
+    "log": (_log, 1, 2),
+    "log10": (_unary(math.log10), 1, 1),
+    "log2": (_unary(math.log2), 1, 1),
+    "exp": (_unary(math.exp), 1, 1),
+    "floor": (_unary(math.floor), 1, 1),
+    "ceil": (_unary(math.ceil), 1, 1),
+    "factorial": (_factorial, 1, 1),
+    "min": (lambda ctx, *args: min(args), 1, 20),
+    "max": (lambda ctx, *args: max(args), 1, 20),
+}
+
+_BINARY = {
+    ast.Add: lambda ctx, a, b: ctx.check(a + b),
+    ast.Sub: lambda ctx, a, b: ctx.check(a - b),
+    ast.Mult: _multiply,
+    ast.Div: lambda ctx, a, b: ctx.check(a / b),
+    ast.FloorDiv: lambda ctx, a, b: ctx.check(a // b),
+    ast.Mod: lambda ctx, a, b: ctx.check(a % b),
+    ast.Pow: _power,
+}
+
+_UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+Compiled = Callable[[_Context], Number]
+
+
+def _compile(node: ast.AST, limits: CalculatorLimits) -> Compiled:
+    """ Turn an expression AST into nested closures (only arithmetic on numbers is allowed) """
+    if isinstance(node, ast.Expression):
+        return _compile(node.body, limits)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise CalculatorError(f"Unsupported value: {value!r}")
+        if isinstance(value, int) and value.bit_length() > limits.max_int_bits:
+            raise OverflowError()
+
+        def constant(ctx: _Context) -> Number:
+            ctx.step()
+            return value
+        return constant
+
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def variable(ctx: _Context) -> Number:
+            ctx.step()
+            if name in ctx.variables:
+                return ctx.variables[name]
+            if name in CONSTANTS:
+                return CONSTANTS[name]
+            raise CalculatorError(f"Unknown name '{name}'")
+        return variable
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+        op, operand = _UNARY[type(node.op)], _compile(node.operand, limits)
+
+        def unary(ctx: _Context) -> Number:
+            ctx.step()
+            return op(operand(ctx))
+        return unary
+
+    if isinstance(node, ast.BinOp):
+        if isinstance(node.op, ast.BitXor):
+            raise CalculatorError("Use ** for powers (^ is not supported)")
+        if type(node.op) not in _BINARY:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        op, left, right = _BINARY[type(node.op)], _compile(node.left, limits), _compile(node.right, limits)
+
+        def binary(ctx: _Context) -> Number:
+            ctx.step()
+            return op(ctx, left(ctx), right(ctx))
+        return binary
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise CalculatorError(f"Unknown function: {ast.unparse(node.func)}")
+        if node.keywords:
+            raise CalculatorError("Keyword arguments are not supported")
+        func, low, high = FUNCTIONS[node.func.id]
+        if not low <= len(node.args) <= high:
+            raise CalculatorError(f"{node.func.id}() takes {low}{'' if low == high else f' to {high}'} arguments")
+        args = [_compile(arg, limits) for arg in node.args]
+
+        def call(ctx: _Context) -> Number:
+            ctx.step()
+            return ctx.check(func(ctx, *(arg(ctx) for arg in args)))
+        return call
+
+    raise CalculatorError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str, limits: CalculatorLimits = DEFAULT_LIMITS) -> Compiled:
+    """ Parse and compile an expression (memoised, so repeated expressions skip parsing) """
+    if len(expression) > limits.max_length:
+        raise CalculatorError(f"Expression too long (limit {limits.max_length} characters)")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        raise CalculatorError("Invalid syntax") from None
+    return _compile(tree, limits)
+
+
+def format_result(result: Number) -> str:
+    if isinstance(result, float):
+        # Round to avoid floating point precision issues
+        if result.is_integer():
+            return str(int(result))
+        return f"{result:.10g}"  # Remove trailing zeros
+    return str(result)
+
+
+_ASSIGNMENT = re.compile(r"^\s*([A-Za-z_]\w*)\s*=(?!=)(.*)$")
+
+
+def evaluate(expression: str, ctx: _Context) -> Number:
+    """ Evaluate one expression, or bind `name = expression` to a variable of the batch """
+    assignment = _ASSIGNMENT.match(expression)
+    if assignment:
+        name, expression = assignment.groups()
+        if name in CONSTANTS or name in FUNCTIONS:
+            raise CalculatorError(f"'{name}' is a reserved name")
+    value = compile_expression(expression, ctx.limits)(ctx)
+    if assignment:
+        ctx.variables[name] = value
+    return value
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ZeroDivisionError):
+        return "Error: Division by zero"
+    if isinstance(error, OverflowError):
+        return "Error: Result too large"
+    if isinstance(error, CalculatorError):
+        return f"Error: {str(error)}"
+    if isinstance(error, (ValueError, TypeError)):
+        return f"Error: Invalid value - {str(error)}"
+    return f"Error: {str(error)}"
+
+
+def calculate(expression: str = "", expressions: Optional[List[str]] = None) -> str:
     """
     Evaluate a mathematical expression and return the result as a string.
     Supports basic arithmetic, parentheses, and common mathematical functions.
 
+    Expressions are parsed into an AST and compiled once (memoised); only numbers, arithmetic
+    operators and the functions in `FUNCTIONS` are allowed, and integer size, exponents and the
+    number of operations are bounded by `CalculatorLimits`.
+
+    Several expressions can be evaluated in one call with `expressions`; an item written as
+    `name = expression` stores its result for the following items (e.g. multi-step budgets).
+
     Args:
         expression (str): The mathematical expression to evaluate.
+        expressions (list[str], optional): Expressions to evaluate in order.
 
     Returns:
         str: The result of the evaluation or an error message if the expression is invalid.
+             For several expressions, one "expression = result" line per expression.
     """
-    try:
-        # Clean the expression
-        expression = expression.replace(' ', '')
-        
-        # Define safe operations
-        safe_dict = {
-            "__builtins__": {},
-            "abs": abs,
-            "round": round,
-            "pow": pow,
-            "sqrt": math.sqrt,
-            "sin": math.sin,
-            "cos": math.cos,
-            "tan": math.tan,
-            "log": math.log,
-            "log10": math.log10,
-            "exp": math.exp,
-            "pi": math.pi,
-            "e": math.e,
-        }
-        
-        # Check for dangerous patterns
-        dangerous_patterns = [
-            r'__.*__',  # dunder methods
-            r'import',  # import statements
-            r'exec',    # exec function
-            r'eval',    # eval function
-            r'open',    # file operations
-            r'input',   # input function
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, expression, re.IGNORECASE):
-                return "Error: Invalid expression contains forbidden operations"
-        
-        # Validate that expression only contains allowed characters
-        allowed_chars = set('0123456789+-*/().abcdeghilmnopqrstu_')  # includes function names
-        if not all(c in allowed_chars for c in expression.lower()):
-            return "Error: Expression contains invalid characters"
-        
-        # Evaluate the expression
-        result = eval(expression, safe_dict, {})
-        
-        # Handle different result types
-        if isinstance(result, float):
-            # Round to avoid floating point precision issues
-            if result.is_integer():
-                return str(int(result))
-            else:
-                return f"{result:.10g}"  # Remove trailing zeros
-        else:
-            return str(result)
-            
-    except ZeroDivisionError:
-        return "Error: Division by zero"
-    except ValueError as e:
-        return f"Error: Invalid value - {str(e)}"
-    except OverflowError:
-        return "Error: Result too large"
-    except Exception as e:
-        return f"Error: {str(e)}"
+    items = list(expressions or [])
+    if expression:
+        items.insert(0, expression)
+    if not items:
+        return "Error: No expression given"
+    if len(items) > DEFAULT_LIMITS.max_batch:
+        return f"Error: Too many expressions (limit {DEFAULT_LIMITS.max_batch})"
+
+    ctx = _Context(DEFAULT_LIMITS)
+    lines = []
+    for item in items:
+        try:
+            result = format_result(evaluate(str(item), ctx))
+        except Exception as e:
+            result = _error_message(e)
+        lines.append(result)
+
+    if len(items) == 1:
+        return lines[0]
+    return "\n".join(f"{item} = {line}" for item, line in zip(items, lines))
 
 
 def add(a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
@@ -135,3 +345,13 @@ if __name__ == '__main__':
     for expr in test_expressions:
         result = calculate(expr)
         print(f"{expr} = {result}")
+
+    print("\nResource limits:")
+    import time
+    for expr in ["9**9**9", "factorial(100000)", "10**5000", "2**4000 * 2**4000", "(-8) ** 0.5", "__import__('os')", "2 ^ 3", "1/0"]:
+        started = time.perf_counter()
+        result = calculate(expr)
+        print(f"{expr} = {result}  ({(time.perf_counter() - started) * 1000:.2f} ms)")
+
+    print("\nBatch evaluation:")
+    print(calculate(expressions=["rent = 1200000 * 12", "staff = 3 * 2800000 * 12", "total = rent + staff", "total * 1.1", "total / 4"]))
@@ -1,37 +1,74 @@
-import requests
 import json
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
+try:
+    from .http_client import http_client, HTTPError
+    from .holidays import HolidayStore
+except ImportError:
+    from http_client import http_client, HTTPError
+    from holidays import HolidayStore
+
+
 
 class CalendarAPI:
     """Calendar API wrapper using free public holiday APIs."""
     
     def __init__(self):
         """Initialize Calendar API client."""
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        }
         # Using date.nager.at (completely free, no API key required)
         self.base_url = "https://date.nager.at/api/v3"
+        self.holiday_store = HolidayStore(self._fetch_holidays)
     
     def get_holidays_data(self, country: str, year: int, month: int = None) -> Dict[str, Any]:
         """
-        Get holidays data from free public holiday API.
+        Get holidays data from the offline holiday store (downloaded once per country and year).
         
         Args:
             country: ISO country code (e.g., 'US', 'KR', 'JP')
             year: Year to get holidays for
             month: Optional month (1-12)
             
+        Returns:
+            Dict containing holidays data or error
+        """
+        calendar, error = self.holiday_store.calendar(country, year)
+        if calendar is None:
+            return {"error": error}
+        
+        if month:
+            start = f'{year}-{month:02d}-01'
+            holidays = calendar.between(start, f'{year}-{month:02d}-31')
+        else:
+            holidays = calendar.holidays
+        
+        return {
+            'country': country.upper(),
+            'year': year,
+            'month': month,
+            'holidays': list(holidays),
+            'total_count': len(holidays),
+            'source': calendar.source
+        }
+    
+    def _fetch_holidays(self, country: str, year: int) -> Dict[str, Any]:
+        """
+        Get holidays data from free public holiday API.
+        
+        Args:
+            country: ISO country code (e.g., 'US', 'KR', 'JP')
+            year: Year to get holidays for
+            
         Returns:
             Dict containing holidays data or error
         """
         try:
             # Get public holidays from date.nager.at API
             url = f"{self.base_url}/PublicHolidays/{year}/{country.upper()}"
-            response = self.session.get(url, timeout=10)
+            response = http_client.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             
             holidays_data = response.json()
@@ -53,21 +90,15 @@ class CalendarAPI:
                 }
                 formatted_holidays.append(holiday_data)
             
-            # Filter by month if specified
-            if month:
-                month_str = f'{year}-{month:02d}'
-                formatted_holidays = [h for h in formatted_holidays if h['date'].startswith(month_str)]
-            
             return {
                 'country': country.upper(),
                 'year': year,
-                'month': month,
                 'holidays': formatted_holidays,
                 'total_count': len(formatted_holidays),
                 'source': 'Nager.Date API'
             }
             
-        except requests.exceptions.RequestException as e:
+        except HTTPError as e:
             return {"error": f"Failed to fetch holiday data: {str(e)}"}
         except json.JSONDecodeError:
             return {"error": "Invalid response from holiday API"}
@@ -92,7 +123,7 @@ class CalendarAPI:
         """
         try:
             url = f"{self.base_url}/AvailableCountries"
-            response = self.session.get(url, timeout=10)
+            response = http_client.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             
             countries_data = response.json()
@@ -103,7 +134,7 @@ class CalendarAPI:
                 'source': 'Nager.Date API'
             }
             
-        except requests.exceptions.RequestException as e:
+        except HTTPError as e:
             return {"error": f"Failed to fetch countries: {str(e)}"}
         except Exception as e:
             return {"error": f"Failed to get available countries: {str(e)}"}
@@ -173,8 +204,8 @@ def get_calendar_events(date: str, country: str = "US") -> str:
         year = date_obj.year
         month = date_obj.month
         
-        # Get holidays for the year (API returns all holidays for the year)
-        holidays_data = calendar_api.get_holidays_data(country, year)
+        # Holidays of the date (binary search in the stored holidays of the year)
+        holidays_data = calendar_api.holiday_store.between(country, date_obj.date(), date_obj.date())
         
         if "error" in holidays_data:
             return f"Error getting calendar events: {holidays_data['error']}"
@@ -182,11 +213,7 @@ def get_calendar_events(date: str, country: str = "US") -> str:
         # Get special events for the specific date
         special_events = calendar_api.get_special_events(date)
         
-        # Find holidays matching the specific date
-        matching_holidays = [
-            h for h in holidays_data.get('holidays', [])
-            if h['date'] == date
-        ]
+        matching_holidays = holidays_data['holidays']
         
         # Format response
         formatted_date = date_obj.strftime('%A, %B %d, %Y')
@@ -246,39 +273,20 @@ def get_upcoming_holidays(country: str = "US", days: int = 30) -> str:
         today = datetime.now().date()
         end_date = today + timedelta(days=days)
         
-        # Get holidays for current year
-        current_year = today.year
-        holidays_data = calendar_api.get_holidays_data(country, current_year)
+        # Holidays in the window, across the year boundary if needed (no network for stored years)
+        holidays_data = calendar_api.holiday_store.between(country, today, end_date)
         
         if "error" in holidays_data:
             return f"Error getting upcoming holidays: {holidays_data['error']}"
         
-        all_holidays = holidays_data.get('holidays', [])
-        
-        # If we need to check next year (for dates that cross year boundary)
-        if end_date.year != current_year:
-            next_year_data = calendar_api.get_holidays_data(country, end_date.year)
-            if "error" not in next_year_data:
-                all_holidays.extend(next_year_data.get('holidays', []))
-        
-        # Filter holidays within the date range
         upcoming_holidays = []
-        for holiday in all_holidays:
-            try:
-                holiday_date = datetime.strptime(holiday['date'], '%Y-%m-%d').date()
-                if today <= holiday_date <= end_date:
-                    days_until = (holiday_date - today).days
-                    upcoming_holidays.append({
-                        **holiday,
-                        'days_until': days_until,
-                        'date_obj': holiday_date
-                    })
-            except ValueError:
-                # Skip holidays with invalid date format
-                continue
-        
-        # Sort by date
-        upcoming_holidays.sort(key=lambda x: x['date_obj'])
+        for holiday in holidays_data['holidays']:
+            holiday_date = datetime.strptime(holiday['date'], '%Y-%m-%d').date()
+            upcoming_holidays.append({
+                **holiday,
+                'days_until': (holiday_date - today).days,
+                'date_obj': holiday_date
+            })
         
         # Format response
         response = f"Upcoming holidays in {country.upper()} (next {days} days):\n\n"
@@ -391,6 +399,7 @@ if __name__ == '__main__':
     
     upcoming = get_upcoming_holidays('KR', 360)
     print(upcoming)
+    print('Holiday store stats:', calendar_api.holiday_store.stats())
     
     print('\n' + '=' * 60)
     print('Error Handling Tests:')
@@ -0,0 +1,238 @@
+"""
+Splits the documents served by the assistant (PDF reports, mirrored center pages, dashboard JSON) into retrieval chunks.
+"""
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from hashlib import sha256
+import json
+import os
+import re
+
+try:
+    from .extract import CAPTURE_DIR, html_extractor, strip_boilerplate, load_fixtures
+except ImportError:
+    from extract import CAPTURE_DIR, html_extractor, strip_boilerplate, load_fixtures
+
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data"))
+PDF_DIR = os.path.join(DATA_DIR, "pdf")
+MIRROR_FILE = os.getenv("SITE_MIRROR_FILE", os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions", ".cache", "mirror.json")))
+
+# Dashboard datasets and their descriptions (the other JSON files in data/ are UI template samples)
+DASHBOARD_FILES = {
+    "monthlyBudget.json": "월별 예산 배정액(allocated)과 집행액(spent)",
+    "monthlyRegeneration.json": "월별 도시재생 사업 착수(started)와 완료(completed) 건수",
+    "agedHomes.json": "노후주택 현황: 전체(total), 신고(reported), 점검(inspected), 해결(resolved)",
+    "renewedHomes.json": "주택 정비 실적: 리모델링(renovation), 재건축(reconstruction), 공동체(community), 소형주택(tinyHomes), 에너지 효율 개선(energyEfficiency), 내진 보강(seismicReinforcement)",
+    "satisfaction.json": "주민 만족도 조사: 만족(like), 불만족(dislike), 보통(neutral) 비율",
+}
+
+
+@dataclass
+class Chunk:
+    """ A retrievable piece of a document """
+    id: str  # "<source>#<n>", stable while the document is unchanged
+    source: str  # file path or URL
+    title: str
+    text: str
+    kind: str  # "pdf", "page" or "json"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_SENTENCE = re.compile(r"\n\s*\n|(?<=[.!?。])\s+|\n")
+
+
+def split_text(text: str, size: int = 800, overlap: int = 120) -> List[str]:
+    """
+    Split text into chunks of about `size` characters at paragraph and sentence boundaries.
+
+    Consecutive chunks share up to `overlap` characters (whole sentences), so a fact cut
+    at a boundary is still found in one piece.
+    """
+    sentences = [" ".join(s.split()) for s in _SENTENCE.split(text)]
+    sentences = [s for s in sentences if s]
+    chunks, current = [], []
+    length = 0
+    for sentence in sentences:
+        while len(sentence) > size:  # Unpunctuated text (tables, lists)
+            head, sentence = sentence[:size], sentence[size:]
+            if current:
+                chunks.append(" ".join(current))
+                current, length = [], 0
+            chunks.append(head)
+        if current and length + len(sentence) > size:
+            chunks.append(" ".join(current))
+            kept, length = [], 0
+            for previous in reversed(current):
+                if length + len(previous) > overlap:
+                    break
+                kept.insert(0, previous)
+                length += len(previous) + 1
+            current = kept
+        current.append(sentence)
+        length += len(sentence) + 1
+    if current and (not chunks or " ".join(current) not in chunks[-1]):
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def chunk_text(source: str, title: str, text: str, kind: str, size: int = 800, overlap: int = 120) -> List[Chunk]:
+    return [Chunk(f"{source}#{i}", source, title, part, kind) for i, part in enumerate(split_text(text, size, overlap))]
+
+
+def chunk_pdf(path: str, size: int = 800, overlap: int = 120) -> List[Chunk]:
+    """
+    Chunks of a PDF, page by page (titles carry the page number).
+
+    Raises:
+        ImportError: If pypdf is not installed
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("pypdf is required to index PDF files. Install with: pip install pypdf") from None
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    chunks = []
+    for number, page in enumerate(PdfReader(path).pages, 1):
+        text = page.extract_text() or ""
+        for i, part in enumerate(split_text(text, size, overlap)):
+            chunks.append(Chunk(f"{path}#p{number}.{i}", path, f"{name} (p. {number})", part, "pdf"))
+    return chunks
+
+
+def _flatten(value: Any, prefix: str = "") -> Iterator[str]:
+    """ "key key: value" lines of nested JSON """
+    if isinstance(value, dict):
+        if value and all(not isinstance(v, (dict, list)) for v in value.values()):
+            yield f"{prefix}: " + ", ".join(f"{k} {v}" for k, v in value.items())
+            return
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix} {key}".strip())
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from _flatten(item, f"{prefix} {i}".strip())
+    else:
+        yield f"{prefix}: {value}"
+
+
+def chunk_json(path: str) -> List[Chunk]:
+    """
+    Chunks of a dashboard dataset: one chunk per year (or other second-level key) with one line per month.
+
+    {"2025": {"January": {"allocated": 50000000, ...}}} in monthlyBudget.json becomes the chunk
+    "monthlyBudget 2025년" plus the Korean description of the dataset, with the line
+    "January: allocated 50000000, spent 30000000".
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    name = os.path.splitext(os.path.basename(path))[0]
+    description = DASHBOARD_FILES.get(os.path.basename(path), "")
+    if isinstance(data, dict) and len(data) == 1:
+        (key, value), = data.items()
+        if not key.isdigit() and isinstance(value, dict):
+            data = value  # {"agedHomes": {"2022": ...}} wrappers
+
+    chunks = []
+    groups = data.items() if isinstance(data, dict) else enumerate(data)
+    for key, value in groups:
+        title = f"{name} {key}" + ("년" if str(key).isdigit() else "")
+        text = f"{title} {description}".strip() + "\n" + "\n".join(_flatten(value))
+        chunks.extend(Chunk(f"{path}#{key}.{i}", path, title, part, "json") for i, part in enumerate(split_text(text, size=1500, overlap=0)))
+    return chunks
+
+
+def load_mirror_pages(path: str = MIRROR_FILE) -> List[Dict[str, Any]]:
+    """ Pages saved by the center site mirror (empty if it has not run yet) """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return [page for page in json.load(file).get("pages", []) if page.get("text_content")]
+    except (OSError, ValueError):
+        return []
+
+
+def load_fixture_pages(path: str = CAPTURE_DIR) -> List[Dict[str, Any]]:
+    """ Saved pages (captures of the center site by default) in the shape of the mirrored pages, for offline evaluation """
+    pages = []
+    for url, body in load_fixtures(path):
+        extracted = html_extractor.extract(body)
+        text = strip_boilerplate(url, extracted["text_content"])
+        if text:
+            pages.append({"url": url, "title": extracted["title"], "text_content": text})
+    return pages
+
+
+def chunk_pages(path: str = MIRROR_FILE, size: int = 800, overlap: int = 120) -> List[Chunk]:
+    """ Chunks of the mirrored center pages """
+    chunks = []
+    for page in load_mirror_pages(path):
+        chunks.extend(chunk_text(page["url"], page.get("title") or page["url"], page["text_content"], "page", size, overlap))
+    return chunks
+
+
+@dataclass
+class Document:
+    """ An indexable document: its chunks are only produced when its fingerprint has changed """
+    source: str
+    kind: str
+    fingerprint: str  # size and modification time of files, content hash of pages
+    load: Callable[[], List[Chunk]]
+
+
+def _file_fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def list_documents(pdf_dir: str = PDF_DIR, data_dir: str = DATA_DIR, mirror_file: str = MIRROR_FILE, pages: Optional[List[Dict[str, Any]]] = None) -> List[Document]:
+    """
+    Every known document (PDFs under `pdf_dir`, dashboard datasets and mirrored pages) without reading its content.
+
+    `pages` replaces the mirrored pages of `mirror_file` (e.g. with `load_fixture_pages()`).
+    """
+    documents = []
+    for root, _, files in os.walk(pdf_dir):
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                path = os.path.join(root, name)
+                documents.append(Document(path, "pdf", _file_fingerprint(path), lambda path=path: chunk_pdf(path)))
+    for name in DASHBOARD_FILES:
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            documents.append(Document(path, "json", _file_fingerprint(path), lambda path=path: chunk_json(path)))
+    for page in load_mirror_pages(mirror_file) if pages is None else pages:
+        title, text = page.get("title") or page["url"], page["text_content"]
+        fingerprint = sha256(f"{title}\n{text}".encode("utf-8")).hexdigest()
+        documents.append(Document(page["url"], "page", fingerprint, lambda url=page["url"], title=title, text=text: chunk_text(url, title, text, "page")))
+    return documents
+
+
+def collect_chunks(pdf_dir: str = PDF_DIR, data_dir: str = DATA_DIR, mirror_file: str = MIRROR_FILE) -> Dict[str, Any]:
+    """
+    Chunks of every known document.
+
+    Returns:
+        Dict with `chunks` and `skipped` (path -> reason) for documents that could not be read
+    """
+    chunks: List[Chunk] = []
+    skipped: Dict[str, str] = {}
+    for document in list_documents(pdf_dir, data_dir, mirror_file):
+        try:
+            chunks.extend(document.load())
+        except Exception as e:
+            skipped[document.source] = str(e)
+    return {"chunks": chunks, "skipped": skipped}
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    sample = "천안시 도시재생지원센터는 주민 역량강화 교육을 운영합니다. 교육은 매년 3월에 시작합니다.\n\n" * 20
+    for part in split_text(sample, size=200, overlap=60)[:3]:
+        print(len(part), part[:80])
+
+    collected = collect_chunks()
+    print(f"{len(collected['chunks'])} chunks, skipped: {collected['skipped']}")
+    for chunk in collected["chunks"][:3]:
+        print(chunk.id, "|", chunk.title, "|", chunk.text[:100].replace("\n", " / "))
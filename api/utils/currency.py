@@ -1,7 +1,207 @@
-import requests
 import json
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, asdict
 from datetime import datetime
+import threading
+import time
+import os
+
+import numpy as np
+
+try:
+    from .http_client import http_client, HTTPError
+except ImportError:
+    from http_client import http_client, HTTPError
+
+
+RATE_CACHE_FILE = os.getenv("EXCHANGE_RATE_CACHE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "exchange_rates.json"))
+
+
+@dataclass
+class RateSnapshot:
+    """ Rates of every currency against one base currency """
+    base: str
+    date: str
+    rates: Dict[str, float]
+    fetched_at: float
+    source: str = "ExchangeRate-API"
+
+
+class RateTable:
+    """
+    Local exchange rate table refreshed from a single base currency.
+
+    The upstream table of `base` is fetched at most once per `refresh_interval` and every other
+    pair is derived locally as a cross rate (rate[to] / rate[from]), vectorised over a NumPy
+    array of the rates. Upstream calls are counted per calendar month; once `monthly_quota`
+    (minus `reserve`) is used up, or while the upstream is unreachable, the last snapshot is
+    served and reported as stale. The snapshot and the quota counter survive restarts.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Dict[str, Any]],
+        base: str = "USD",
+        refresh_interval: float = 12 * 3600,
+        retry_interval: float = 300,
+        monthly_quota: int = 1500,
+        reserve: int = 50,
+        path: str = RATE_CACHE_FILE
+    ):
+        self.fetch = fetch
+        self.base = base
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.monthly_quota = monthly_quota
+        self.reserve = reserve
+        self.path = path
+
+        self.__lock = threading.Lock()
+        self.__refresh_lock = threading.Lock()  # single-flight refresh
+        self.__snapshot: Optional[RateSnapshot] = None
+        self.__codes: Dict[str, int] = {}
+        self.__vector = np.zeros(0)
+        self.__quota = {"month": "", "used": 0}
+        self.__failed_at = 0.0
+        self.__last_error = ""
+        self.__stats = {"lookups": 0, "refreshes": 0, "failures": 0, "stale": 0}
+        self.__load()
+
+    def __load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+            self.__quota = saved.get("quota", self.__quota)
+            if saved.get("snapshot"):
+                self.__install(RateSnapshot(**saved["snapshot"]))
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def __save(self):
+        """ Atomic write of the snapshot and the quota counter (called with the lock held) """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(temp, "w", encoding="utf-8") as file:
+                json.dump({"snapshot": asdict(self.__snapshot) if self.__snapshot else None, "quota": self.__quota}, file)
+            os.replace(temp, self.path)
+        except OSError:
+            pass
+
+    def __install(self, snapshot: RateSnapshot):
+        rates = dict(snapshot.rates)
+        rates[snapshot.base] = 1.0
+        codes = sorted(code for code, rate in rates.items() if rate)
+        self.__snapshot = snapshot
+        self.__codes = {code: i for i, code in enumerate(codes)}
+        self.__vector = np.array([rates[code] for code in codes], dtype=np.float64)
+
+    def __month(self) -> str:
+        return datetime.now().strftime("%Y-%m")
+
+    def quota_left(self) -> int:
+        with self.__lock:
+            used = self.__quota["used"] if self.__quota["month"] == self.__month() else 0
+        return max(0, self.monthly_quota - self.reserve - used)
+
+    def snapshot(self) -> Tuple[Optional[RateSnapshot], Optional[str]]:
+        """
+        Current rate table, refreshing it if it is older than `refresh_interval`.
+
+        Returns:
+            (snapshot or None if no table was ever fetched, reason the table is stale or None)
+        """
+        with self.__lock:
+            self.__stats["lookups"] += 1
+        if self.__due():
+            with self.__refresh_lock:
+                if self.__due():  # Not refreshed by another thread in the meantime
+                    self.__refresh()
+        with self.__lock:
+            snapshot = self.__snapshot
+            fresh = snapshot is not None and time.time() - snapshot.fetched_at < self.refresh_interval
+            if not fresh and snapshot is not None:
+                self.__stats["stale"] += 1
+            return snapshot, None if fresh else self.__last_error
+
+    def __due(self) -> bool:
+        with self.__lock:
+            now = time.time()
+            if self.__snapshot is not None and now - self.__snapshot.fetched_at < self.refresh_interval:
+                return False
+            return now - self.__failed_at >= self.retry_interval  # Do not hammer a failing upstream
+
+    def __refresh(self):
+        if self.quota_left() <= 0:
+            with self.__lock:
+                self.__failed_at = time.time()
+                self.__last_error = "monthly quota of the exchange rate service is used up"
+            return
+
+        with self.__lock:
+            month = self.__month()
+            if self.__quota["month"] != month:
+                self.__quota = {"month": month, "used": 0}
+            self.__quota["used"] += 1
+            self.__stats["refreshes"] += 1
+        data = self.fetch(self.base)
+
+        with self.__lock:
+            if "error" in data or not data.get("rates"):
+                self.__stats["failures"] += 1
+                self.__failed_at = time.time()
+                self.__last_error = "the exchange rate service could not be reached"
+                print(f"Exchange rate refresh failed: {data.get('error', 'empty rate table')}")
+                self.__save()
+                return
+            self.__install(RateSnapshot(
+                base=data.get("base", self.base),
+                date=data.get("date", datetime.now().strftime("%Y-%m-%d")),
+                rates=data["rates"],
+                fetched_at=time.time(),
+                source=data.get("source", "ExchangeRate-API")
+            ))
+            self.__failed_at, self.__last_error = 0.0, ""
+            self.__save()
+
+    def index(self, codes: Sequence[str]) -> np.ndarray:
+        """ Positions of currency codes in the rate vector (-1 for unknown codes) """
+        with self.__lock:
+            return np.array([self.__codes.get(code.upper(), -1) for code in codes], dtype=np.int64)
+
+    def convert(self, amounts: Sequence[float], from_currencies: Sequence[str], to_currencies: Sequence[str]) -> np.ndarray:
+        """
+        Convert many amounts at once (the three sequences are broadcast against each other).
+
+        Returns:
+            Converted amounts (NaN where a currency is unknown)
+        """
+        from_index = self.index(from_currencies)
+        to_index = self.index(to_currencies)
+        with self.__lock:
+            vector = np.append(self.__vector, np.nan)  # index -1 selects NaN
+        return np.asarray(amounts, dtype=np.float64) * vector[to_index] / vector[from_index]
+
+    def cross_rates(self, from_currency: str, to_currencies: Sequence[str]) -> np.ndarray:
+        """ Rates from one currency to many (NaN where a currency is unknown) """
+        return self.convert(1.0, [from_currency], to_currencies)
+
+    def currencies(self) -> List[str]:
+        with self.__lock:
+            return list(self.__codes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.__lock:
+            snapshot = self.__snapshot
+            stats = dict(self.__stats)
+            used = self.__quota["used"] if self.__quota["month"] == self.__month() else 0
+        stats.update(
+            quota_used=used,
+            quota_left=max(0, self.monthly_quota - self.reserve - used),
+            age=round(time.time() - snapshot.fetched_at) if snapshot else None,
+            currencies=len(self.__codes)
+        )
+        return stats
 
 
 class CurrencyAPI:
@@ -9,14 +209,44 @@ class CurrencyAPI:
     
     def __init__(self):
         """Initialize Currency API client."""
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        }
         # Using exchangerate-api.com (free tier: 1500 requests/month)
         self.base_url = "https://api.exchangerate-api.com/v4/latest"
+        self.rate_table = RateTable(self._fetch_table)
     
     def get_exchange_rates(self, base_currency: str) -> Dict[str, Any]:
+        """
+        Get exchange rates for a base currency, derived from the cached rate table.
+        
+        Args:
+            base_currency: Base currency code (e.g., 'USD', 'EUR', 'KRW')
+            
+        Returns:
+            Dict containing exchange rates (with a `stale` reason if the table could not be refreshed) or error
+        """
+        snapshot, stale = self.rate_table.snapshot()
+        if snapshot is None:
+            return {"error": f"Failed to fetch exchange rates: {stale}"}
+        
+        codes = self.rate_table.currencies()
+        rates = self.rate_table.cross_rates(base_currency, codes)
+        if np.isnan(rates).all():
+            return {"error": f"Currency '{base_currency.upper()}' not found in exchange rates"}
+        
+        result = {
+            "base": base_currency.upper(),
+            "date": snapshot.date,
+            "rates": dict(zip(codes, rates.tolist())),
+            "timestamp": datetime.fromtimestamp(snapshot.fetched_at).isoformat(),
+            "source": snapshot.source
+        }
+        if stale:
+            result["stale"] = stale
+        return result
+    
+    def _fetch_table(self, base_currency: str) -> Dict[str, Any]:
         """
         Get exchange rates from the free API.
         
@@ -29,7 +259,7 @@ class CurrencyAPI:
         try:
             # Try primary free API (exchangerate-api.com)
             url = f"{self.base_url}/{base_currency.upper()}"
-            response = self.session.get(url, timeout=10)
+            response = http_client.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -42,7 +272,7 @@ class CurrencyAPI:
                 "source": "ExchangeRate-API"
             }
             
-        except requests.exceptions.RequestException as e:
+        except HTTPError as e:
             return {"error": f"Failed to fetch exchange rates: {str(e)}"}
         except json.JSONDecodeError:
             return {"error": "Invalid response from exchange rate service"}
@@ -62,35 +292,61 @@ class CurrencyAPI:
             Dict with conversion result
         """
         try:
-            # Get exchange rates with from_currency as base
-            rates_data = self.get_exchange_rates(from_currency)
+            # Cross rate from the cached table (no upstream call per pair)
+            snapshot, stale = self.rate_table.snapshot()
+            if snapshot is None:
+                return {"error": f"Failed to fetch exchange rates: {stale}"}
             
-            if "error" in rates_data:
-                return rates_data
+            exchange_rate, = self.rate_table.cross_rates(from_currency, [to_currency]).tolist()
+            if exchange_rate != exchange_rate:  # NaN
+                unknown = from_currency if self.rate_table.index([from_currency])[0] < 0 else to_currency
+                return {"error": f"Currency '{unknown}' not found in exchange rates"}
             
-            rates = rates_data.get("rates", {})
-            
-            # Check if target currency is available
-            if to_currency.upper() not in rates:
-                return {"error": f"Currency '{to_currency}' not found in exchange rates"}
-            
-            # Perform conversion
-            exchange_rate = rates[to_currency.upper()]
-            converted_amount = amount * exchange_rate
-            
-            return {
+            result = {
                 "original_amount": amount,
                 "from_currency": from_currency.upper(),
                 "to_currency": to_currency.upper(),
                 "exchange_rate": exchange_rate,
-                "converted_amount": round(converted_amount, 2),
-                "date": rates_data.get("date"),
-                "source": rates_data.get("source")
+                "converted_amount": round(amount * exchange_rate, 2),
+                "date": snapshot.date,
+                "source": snapshot.source
             }
+            if stale:
+                result["stale"] = stale
+            return result
             
         except Exception as e:
             return {"error": f"Currency conversion failed: {str(e)}"}
     
+    def convert_bulk(self, amounts: Sequence[float], from_currency: str, to_currencies: Sequence[str]) -> Dict[str, Any]:
+        """
+        Convert many amounts into many currencies with one vectorised operation.
+        
+        Args:
+            amounts: Amounts in `from_currency`
+            from_currency: Source currency code
+            to_currencies: Target currency codes
+            
+        Returns:
+            Dict with a `converted` matrix (one row per amount, one column per target, None if unknown)
+        """
+        snapshot, stale = self.rate_table.snapshot()
+        if snapshot is None:
+            return {"error": f"Failed to fetch exchange rates: {stale}"}
+        
+        amounts = np.asarray(amounts, dtype=np.float64)[:, None]
+        converted = np.round(self.rate_table.convert(amounts, [from_currency], to_currencies), 2)
+        result = {
+            "from_currency": from_currency.upper(),
+            "to_currencies": [code.upper() for code in to_currencies],
+            "converted": [[None if value != value else value for value in row] for row in converted.tolist()],
+            "date": snapshot.date,
+            "source": snapshot.source
+        }
+        if stale:
+            result["stale"] = stale
+        return result
+    
     def get_popular_currencies(self) -> List[Dict[str, str]]:
         """Get list of popular currencies with their info."""
         return [
@@ -116,7 +372,13 @@ class CurrencyAPI:
 currency_api = CurrencyAPI()
 
 
-def get_exchange_rate(from_currency: str, to_currency: str, amount: float = 1.0) -> str:
+def get_exchange_rate(
+    from_currency: str,
+    to_currency: str,
+    amount: float = 1.0,
+    amounts: Optional[List[float]] = None,
+    to_currencies: Optional[List[str]] = None
+) -> str:
     """
     Get exchange rate and convert currency amount.
     Uses free exchange rate APIs - no API key required.
@@ -125,18 +387,24 @@ def get_exchange_rate(from_currency: str, to_currency: str, amount: float = 1.0)
         from_currency (str): Source currency code (e.g., 'USD', 'EUR', 'KRW')
         to_currency (str): Target currency code (e.g., 'USD', 'EUR', 'KRW')
         amount (float): Amount to convert (default: 1.0)
+        amounts (List[float]): Several amounts to convert at once (replaces `amount`)
+        to_currencies (List[str]): Further target currencies converted in the same call
         
     Returns:
         str: Formatted string with exchange rate and conversion result
     """
     try:
         # Validate inputs
-        if amount <= 0:
+        if amount <= 0 or any(value <= 0 for value in amounts or []):
             return "Error: Amount must be greater than 0"
         
-        if len(from_currency) != 3 or len(to_currency) != 3:
+        targets = [to_currency] + [code for code in to_currencies or [] if code.upper() != to_currency.upper()]
+        if any(len(code) != 3 for code in [from_currency, *targets]):
             return "Error: Currency codes must be 3 letters (e.g., USD, EUR, KRW)"
         
+        if amounts or len(targets) > 1:
+            return format_conversion_table(amounts or [amount], from_currency, targets)
+        
         # Perform conversion
         conversion_result = currency_api.convert_currency(amount, from_currency, to_currency)
         
@@ -172,6 +440,8 @@ def get_exchange_rate(from_currency: str, to_currency: str, amount: float = 1.0)
         # Rate date and source
         response += f"📅 Rate Date: {conversion_result.get('date', 'Unknown')}\n"
         response += f"📡 Source: {conversion_result.get('source', 'Exchange Rate API')}"
+        if conversion_result.get("stale"):
+            response += f"\n⚠️ Rates from the last saved table ({conversion_result['stale']})"
         
         return response
         
@@ -179,6 +449,30 @@ def get_exchange_rate(from_currency: str, to_currency: str, amount: float = 1.0)
         return f"Error getting exchange rate: {str(e)}"
 
 
+def format_conversion_table(amounts: Sequence[float], from_currency: str, to_currencies: Sequence[str]) -> str:
+    """ Every amount converted into every target currency (one vectorised `convert_bulk` call) """
+    result = currency_api.convert_bulk(amounts, from_currency, to_currencies)
+    if "error" in result:
+        return f"Error: {result['error']}"
+    
+    symbols = {curr["code"]: curr["symbol"] for curr in currency_api.get_popular_currencies()}
+    source = result["from_currency"]
+    
+    response = f"Currency Conversion from {source}:\n\n"
+    for value, row in zip(amounts, result["converted"]):
+        converted = [
+            f"{symbols.get(code, '')}{amount:,.2f} {code}" if amount is not None else f"❌ {code} not available"
+            for code, amount in zip(result["to_currencies"], row)
+        ]
+        response += f"💱 {symbols.get(source, '')}{value:,.2f} {source} = " + " | ".join(converted) + "\n"
+    
+    response += f"\n📅 Rate Date: {result.get('date', 'Unknown')}\n"
+    response += f"📡 Source: {result.get('source', 'Exchange Rate API')}"
+    if result.get("stale"):
+        response += f"\n⚠️ Rates from the last saved table ({result['stale']})"
+    return response
+
+
 def get_currency_list() -> str:
     """
     Get list of popular supported currencies.
@@ -222,20 +516,21 @@ def get_multiple_rates(base_currency: str, target_currencies: List[str]) -> str:
         if "error" in rates_data:
             return f"Error: {rates_data['error']}"
         
-        rates = rates_data.get("rates", {})
+        rates = currency_api.rate_table.cross_rates(base_currency, target_currencies).tolist()  # all pairs at once
         
         response = f"Exchange Rates from {base_currency.upper()}:\n"
         response += f"📅 Date: {rates_data.get('date', 'Unknown')}\n\n"
         
-        for target_currency in target_currencies:
+        for target_currency, rate in zip(target_currencies, rates):
             target = target_currency.upper()
-            if target in rates:
-                rate = rates[target]
+            if rate == rate:  # not NaN
                 response += f"💱 1 {base_currency.upper()} = {rate:.4f} {target}\n"
             else:
                 response += f"❌ {target} - Rate not available\n"
         
         response += f"\n📡 Source: {rates_data.get('source', 'Exchange Rate API')}"
+        if rates_data.get("stale"):
+            response += f"\n⚠️ Rates from the last saved table ({rates_data['stale']})"
         
         return response
         
@@ -278,6 +573,10 @@ if __name__ == '__main__':
     multiple_rates = get_multiple_rates("USD", ["EUR", "GBP", "JPY", "KRW", "CNY"])
     print(multiple_rates)
     
+    print("\nBulk conversion (one vectorised operation):")
+    print(get_exchange_rate("KRW", "USD", amounts=[1, 10, 1000], to_currencies=["EUR", "JPY", "XXX"]))
+    print("Rate table stats:", currency_api.rate_table.stats())
+    
     print("\n" + "=" * 60)
     print("Error Handling Tests:")
     print("=" * 60)
@@ -1,38 +1,447 @@
-def rag_search(full_document, query):
+"""
+CPU-only retrieval over the center documents: embedders, the `search_documents` tool and an indexing CLI.
 
-    # 2. RAG 처리 (Function 내부에서)
-    # - 문서를 청크로 나누기
-    chunks = split_document(full_document)
+    python -m api.utils.embedding index           # index new and changed PDFs, dashboard JSON and mirrored pages
+    python -m api.utils.embedding search "질문"    # top chunks of a query
+    python -m api.utils.embedding bench           # retrieval latency
+    python -m api.utils.embedding eval            # recall@k and latency on data/eval/retrieval.json (captured pages or --live)
 
-    # - 임베딩 생성
-    embeddings = create_embeddings(chunks)
+The default embedder hashes the BM25 terms, so "dense" and "hybrid" retrieval are lexical as well
+until the index is built with --backend sentence-transformers.
+"""
+from typing import Any, Dict, List, Optional
+import numpy as np
+import traceback
+import threading
+import time
+import zlib
+import os
 
-    # - 쿼리와 유사한 청크 찾기
-    relevant_chunks = find_similar_chunks(query, embeddings)
+try:
+    from .bm25 import tokenize
+    from .chunking import Chunk, Document, list_documents, load_fixture_pages
+    from .vector_index import VectorIndex, EmbeddingCache, INDEX_DIR, content_digest
+    from .retrieval import HybridRetriever
+except ImportError:
+    from bm25 import tokenize
+    from chunking import Chunk, Document, list_documents, load_fixture_pages
+    from vector_index import VectorIndex, EmbeddingCache, INDEX_DIR, content_digest
+    from retrieval import HybridRetriever
 
-    # 3. 컨텍스트 길이에 맞게 반환
-    return combine_chunks(relevant_chunks, max_tokens=1000)
 
+class Embedder:
+    """ Turns texts into unit-length float32 vectors """
+    name: str = ""
+    dim: int = 0
 
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
 
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader
-from llama_index.llms.llama_cpp import LlamaCPP
 
-# 1. 모델 로드
-llm = LlamaCPP(
-    model_path="./models/llama-2-7b-chat.q4_0.bin",
-    temperature=0.1,
-    max_new_tokens=256,
-)
+class HashingEmbedder(Embedder):
+    """
+    Dependency-free embedder: signed feature hashing of the BM25 terms (Hangul words, their
+    bigrams and Latin words) with sublinear term frequencies.
 
-# 2. 문서 로드 & 인덱싱 (한 줄!)
-documents = SimpleDirectoryReader("./data").load_data()
-index = VectorStoreIndex.from_documents(documents)
+    It matches documents by shared vocabulary only, but is deterministic, needs no model
+    download and embeds thousands of chunks per second on one core.
+    """
 
-# 3. 검색 엔진 생성
-query_engine = index.as_query_engine(llm=llm)
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
 
-# 4. 질문하기
-response = query_engine.query("학사 규정에서 졸업 요건은?")
-print(response)
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            counts: Dict[int, float] = {}
+            for term in tokenize(text):
+                hashed = zlib.crc32(term.encode("utf-8"))
+                column, sign = hashed % self.dim, 1.0 if hashed >> 31 else -1.0
+                counts[column] = counts.get(column, 0.0) + sign
+            for column, count in counts.items():
+                rows.append(row)
+                columns.append(column)
+                values.append(np.sign(count) * (1 + np.log(abs(count))) if count else 0.0)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), np.array(values, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
 
+
+class SentenceTransformerEmbedder(Embedder):
+    """ Multilingual sentence-transformers model on the CPU (pip install sentence-transformers) """
+
+    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", batch_size: int = 32):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.astype(np.float32, copy=False)
+
+
+def get_embedder(backend: Optional[str] = None) -> Embedder:
+    """
+    Embedder selected by `backend` or the EMBEDDING_BACKEND environment variable:
+    "hashing" (default) or "sentence-transformers" (model from EMBEDDING_MODEL).
+    Falls back to hashing when sentence-transformers is not installed.
+    """
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "hashing")
+    if backend == "sentence-transformers":
+        try:
+            model = os.getenv("EMBEDDING_MODEL")
+            return SentenceTransformerEmbedder(model) if model else SentenceTransformerEmbedder()
+        except ImportError:
+            pass
+    return HashingEmbedder()
+
+
+class DocumentSearch:
+    """
+    Embedder, vector index and hybrid retriever, loaded on first use.
+
+    `refresh` keeps the index in step with the documents: only documents whose fingerprint
+    changed are re-chunked, only chunks whose text is new are embedded (content-hash cache),
+    and the index is updated in place, so a refresh costs time proportional to what changed.
+    """
+
+    def __init__(self, path: str = INDEX_DIR, backend: Optional[str] = None):
+        self.path = path
+        self.backend = backend
+
+        self.__lock = threading.Lock()
+        self.__embedder: Optional[Embedder] = None
+        self.__index: Optional[VectorIndex] = None
+        self.__retriever: Optional[HybridRetriever] = None
+        self.__cache: Optional[EmbeddingCache] = None
+        self.__refresh_lock = threading.Lock()
+        self.__worker: Optional[threading.Thread] = None
+        self.__pending = False
+
+    @property
+    def embedder(self) -> Embedder:
+        with self.__lock:
+            if self.__embedder is None:
+                self.__embedder = get_embedder(self.backend)
+            return self.__embedder
+
+    @property
+    def index(self) -> VectorIndex:
+        with self.__lock:
+            if self.__index is None:
+                self.__index = VectorIndex(self.path)
+                self.__index.load()
+            return self.__index
+
+    @property
+    def retriever(self) -> HybridRetriever:
+        index, embedder = self.index, self.embedder
+        with self.__lock:
+            if self.__retriever is None:
+                self.__retriever = HybridRetriever(index, lambda query: embedder.embed([query])[0])
+            return self.__retriever
+
+    @property
+    def embedding_cache(self) -> EmbeddingCache:
+        embedder = self.embedder
+        with self.__lock:
+            if self.__cache is None:
+                self.__cache = EmbeddingCache(self.path, embedder.name, embedder.dim)
+            return self.__cache
+
+    def embed_chunks(self, chunks: List[Chunk], batch_size: int = 64) -> np.ndarray:
+        """ Vectors of `chunks`, embedding only texts that are not in the embedding cache """
+        digests = [content_digest(chunk) for chunk in chunks]
+        found, missing = self.embedding_cache.lookup(digests)
+        texts = {digest: f"{chunk.title}\n{chunk.text}" for digest, chunk in zip(digests, chunks) if digest in missing}
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = self.embedder.embed([texts[digest] for digest in batch])
+            self.embedding_cache.store(batch, vectors)
+            found.update(zip(batch, vectors))
+        if not chunks:
+            return np.zeros((0, self.embedder.dim), np.float32)
+        return np.stack([found[digest] for digest in digests]).astype(np.float32, copy=False)
+
+    def refresh(self, documents: Optional[List[Document]] = None, rebuild: bool = False, batch_size: int = 64) -> Dict[str, Any]:
+        """
+        Index added and changed documents and drop removed ones.
+
+        Args:
+            documents: Documents to index (default: every document found by `list_documents`)
+            rebuild: Rewrite the whole index (embeddings still come from the cache)
+            batch_size: Texts embedded at once
+
+        Returns:
+            Counts of the refresh (documents added, changed, removed and skipped, chunks embedded, ...)
+        """
+        with self.__refresh_lock:
+            started = time.perf_counter()
+            index, embedder = self.index, self.embedder
+            documents = list_documents() if documents is None else documents
+            rebuild = rebuild or index.meta.get("embedder") != embedder.name
+            known = {} if rebuild else index.meta.get("documents", {})
+            current = {document.source: document for document in documents}
+
+            changed = [document for document in documents if known.get(document.source) != document.fingerprint]
+            removed = [source for source in known if source not in current]
+            fingerprints = {source: fingerprint for source, fingerprint in known.items() if source in current}
+            replaced, skipped = {}, {}
+            for document in changed:
+                try:
+                    replaced[document.source] = document.load()
+                    fingerprints[document.source] = document.fingerprint
+                except Exception as e:
+                    skipped[document.source] = str(e)  # Keep the indexed version, if any
+
+            cache_before = self.embedding_cache.stats()
+            chunks = [chunk for source_chunks in replaced.values() for chunk in source_chunks]
+            vectors = self.embed_chunks(chunks, batch_size)
+            cache_after = self.embedding_cache.stats()
+
+            result = {
+                "documents": len(fingerprints),
+                "added": sum(source not in known for source in replaced),
+                "changed": sum(source in known for source in replaced),
+                "removed": len(removed),
+                "skipped": skipped,
+                "chunks": len(chunks),
+                "embedded": cache_after["misses"] - cache_before["misses"],
+                "cached": cache_after["hits"] - cache_before["hits"],
+                "rebuilt": rebuild,
+                "compacted": False
+            }
+            if rebuild:
+                index.rewrite(chunks, vectors, embedder.name, embedder.dim, fingerprints)
+            elif replaced or removed:
+                per_source, offset = {}, 0
+                for source, source_chunks in replaced.items():
+                    per_source[source] = (source_chunks, vectors[offset:offset + len(source_chunks)])
+                    offset += len(source_chunks)
+                result.update(index.update(per_source, removed, fingerprints))
+            if index.needs_compaction():
+                index.compact()
+                result["compacted"] = True
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result
+
+    def refresh_in_background(self):
+        """ Run `refresh` on a background thread (requests made while it runs are folded into one more refresh) """
+        with self.__lock:
+            self.__pending = True
+            if self.__worker is None:
+                self.__worker = threading.Thread(target=self.__refresh_pending, name="document-index", daemon=True)
+                self.__worker.start()
+
+    def __refresh_pending(self):
+        while True:
+            with self.__lock:
+                if not self.__pending:
+                    self.__worker = None
+                    return
+                self.__pending = False
+            try:
+                self.refresh()
+            except Exception:  # keep serving the current index; the next request retries
+                traceback.print_exc()
+
+    def build(self, chunks: Optional[List[Chunk]] = None, batch_size: int = 64) -> Dict[str, Any]:
+        """ Rewrite the index from `chunks`, or from every known document """
+        if chunks is None:
+            return self.refresh(rebuild=True, batch_size=batch_size)
+        return self.index.rewrite(chunks, self.embed_chunks(chunks, batch_size), self.embedder.name, self.embedder.dim)
+
+    def search(self, query: str, k: int = 5, mode: str = "hybrid", rerank: bool = True) -> List[tuple]:
+        """
+        Top `k` (chunk, score) pairs for a query.
+
+        Args:
+            query: Question or keywords
+            k: Number of chunks
+            mode: "hybrid" (BM25 and dense fused), "bm25" or "dense"
+            rerank: Rerank the fused candidates
+
+        Raises:
+            ValueError: If the index was built with another embedder
+        """
+        index = self.index
+        built_with = index.meta.get("embedder")
+        if built_with and built_with != self.embedder.name and mode != "bm25":
+            raise ValueError(f"The index was built with '{built_with}' but the embedder is '{self.embedder.name}'. Rebuild it.")
+        return self.retriever.search(query, k, mode=mode, rerank=rerank)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.index.stats()
+
+
+# Global document search instance
+document_search = DocumentSearch()
+
+
+def search_documents(query: str, top_k: int = 5, max_chars: int = 3000) -> str:
+    """
+    Search the indexed center documents (PDF reports, dashboard data and center pages).
+
+    Args:
+        query (str): Question or keywords
+        top_k (int): Number of passages to return (default: 5)
+        max_chars (int): Character budget of the returned passages (default: 3000)
+
+    Returns:
+        str: Cited passages or an error message
+    """
+    if not query.strip():
+        return "Error: Search query cannot be empty"
+    top_k = min(max(top_k, 1), 20)
+
+    try:
+        if not len(document_search.index):
+            return "Error: The document index is empty. Build it with: python -m api.utils.embedding index"
+        hits = document_search.search(query, top_k)
+        if not hits:
+            return f"No documents found for: {query}"
+
+        output = f"Document search results for: '{query}'\n"
+        output += "=" * 50 + "\n\n"
+        budget = max_chars
+        for number, (chunk, _) in enumerate(hits, 1):
+            text = chunk.text[:budget]
+            if not text:
+                break
+            source = chunk.source if chunk.kind == "page" else os.path.basename(chunk.source)
+            output += f"[{number}] {chunk.title} ({source})\n{text}\n\n"
+            budget -= len(text)
+        return output.rstrip() + "\n"
+
+    except Exception as e:
+        return f"Error searching documents: {str(e)}"
+
+
+# Indexing CLI, search, retrieval benchmark and evaluation
+if __name__ == '__main__':
+    import argparse
+    import json
+    import re
+
+    parser = argparse.ArgumentParser(description="Center document index")
+    parser.add_argument("--backend", choices=["hashing", "sentence-transformers"], default=None)
+    parser.add_argument("--path", default=INDEX_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    index_parser = commands.add_parser("index", help="index new and changed documents, drop removed ones")
+    index_parser.add_argument("--rebuild", action="store_true", help="rewrite the whole index")
+    search_parser = commands.add_parser("search", help="top chunks of a query")
+    search_parser.add_argument("query")
+    search_parser.add_argument("-k", type=int, default=5)
+    search_parser.add_argument("--mode", choices=["hybrid", "bm25", "dense"], default="hybrid")
+    bench_parser = commands.add_parser("bench", help="retrieval latency of the saved index and of a synthetic one")
+    bench_parser.add_argument("--queries", type=int, default=200)
+    bench_parser.add_argument("--synthetic", type=int, default=100000, help="rows of the synthetic index")
+    eval_parser = commands.add_parser("eval", help="recall@k, MRR and latency of every retrieval mode")
+    eval_parser.add_argument("--live", action="store_true", help="evaluate the saved index instead of one built from the saved center pages")
+    eval_parser.add_argument("--set", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "eval", "retrieval.json"))
+    args = parser.parse_args()
+
+    document_search = DocumentSearch(args.path, args.backend)
+
+    if args.command == "index":
+        result = document_search.refresh(rebuild=args.rebuild)
+        print(f"{result['documents']} documents: {result['added']} added, {result['changed']} changed, {result['removed']} removed; "
+              f"{result['chunks']} chunks ({result['embedded']} embedded, {result['cached']} from the cache) in {result['seconds']}s")
+        print("Index:", document_search.index.stats())
+        for path, reason in result["skipped"].items():
+            print(f"Skipped {path}: {reason}")
+
+    elif args.command == "search":
+        for chunk, score in document_search.search(args.query, args.k, mode=args.mode):
+            print(f"{score:.4f}  {chunk.title}  ({chunk.source})\n        {chunk.text[:160]}")
+
+    elif args.command == "bench":
+        def report(label: str, timings: List[float]):
+            timings = np.sort(np.array(timings) * 1000)
+            print(f"{label}: p50 {np.percentile(timings, 50):.3f} ms, p95 {np.percentile(timings, 95):.3f} ms, max {timings[-1]:.3f} ms")
+
+        queries = ["2025년 예산 집행", "노후주택 점검 현황", "도시재생 사업 만족도", "주민 역량강화 교육", "energy efficiency renovation"]
+        if len(document_search.index):
+            timings = []
+            for i in range(args.queries):
+                started = time.perf_counter()
+                document_search.search(queries[i % len(queries)], 5)
+                timings.append(time.perf_counter() - started)
+            report(f"Saved index ({len(document_search.index)} chunks, embed + search)", timings)
+
+        import tempfile
+        rng = np.random.default_rng(0)
+        dim = document_search.embedder.dim
+        synthetic = VectorIndex(tempfile.mkdtemp())
+        chunks = [Chunk(f"synthetic#{i}", "synthetic", f"chunk {i}", "", "json") for i in range(args.synthetic)]
+
+        class RandomEmbedder(Embedder):
+            name, dim = "random", dim
+
+            def embed(self, texts: List[str]) -> np.ndarray:
+                vectors = rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+                return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        embedder = RandomEmbedder()
+        synthetic.build(chunks, embedder, batch_size=4096)
+        timings = []
+        for _ in range(args.queries):
+            query = embedder.embed([""])[0]
+            started = time.perf_counter()
+            synthetic.search(query, 5)
+            timings.append(time.perf_counter() - started)
+        report(f"Synthetic index ({args.synthetic} x {dim}, search only)", timings)
+
+    elif args.command == "eval":
+        smoke = False
+        if not args.live:
+            import tempfile
+            from .extract import SYNTHETIC_DIR
+            pages = load_fixture_pages()
+            smoke = not pages
+            if smoke:
+                pages = load_fixture_pages(SYNTHETIC_DIR)
+                print("Smoke test: no captured center pages (python -m api.utils.extract --capture), so the synthetic pages are indexed.\n"
+                      "They are made up and contain the wording of the questions: only latency is reported, not retrieval quality.")
+            document_search = DocumentSearch(tempfile.mkdtemp(), args.backend)
+            result = document_search.refresh(list_documents(pages=pages))
+            print(f"Index of the {'synthetic' if smoke else 'captured'} pages, dashboard data and PDFs: {result['documents']} documents, {result['chunks']} chunks")
+            for path, reason in result["skipped"].items():
+                print(f"Skipped {path}: {reason}")
+        embedder = document_search.embedder
+        print(f"Embedder: {embedder.name}" + (" (hashed BM25 terms: dense and hybrid are lexical too)" if isinstance(embedder, HashingEmbedder) else ""))
+
+        with open(args.set, "r", encoding="utf-8") as file:
+            questions = json.load(file)["questions"]
+        if smoke:
+            answerable = questions
+        else:
+            sources = {chunk.source for chunk in document_search.index.chunks()}
+            answerable = [q for q in questions if any(re.search(p, source) for p in q["relevant"] for source in sources)]
+            print(f"{len(answerable)} of {len(questions)} questions have a relevant document in the index ({len(sources)} sources)")
+            for q in questions:
+                if q not in answerable:
+                    print(f"  not in the index: {q['question']} -> {q['relevant']}")
+
+        for mode, rerank in [("bm25", False), ("dense", False), ("hybrid", False), ("hybrid", True)]:
+            ranks, timings = [], []
+            for q in answerable:
+                started = time.perf_counter()
+                hits = document_search.search(q["question"], 10, mode=mode, rerank=rerank)
+                timings.append(time.perf_counter() - started)
+                rank = next((i for i, (chunk, _) in enumerate(hits, 1) if any(re.search(p, chunk.source) for p in q["relevant"])), None)
+                ranks.append(rank)
+            if not ranks:
+                break
+            label = mode + (" + rerank" if rerank else "")
+            latency = f"p50 {np.percentile(timings, 50) * 1000:.2f} ms, p95 {np.percentile(timings, 95) * 1000:.2f} ms"
+            if smoke:
+                print(f"{label:>16}: {len(ranks)} queries, {latency}")
+                continue
+            recall = {k: sum(r is not None and r <= k for r in ranks) / len(ranks) for k in (1, 3, 5, 10)}
+            mrr = sum(1 / r for r in ranks if r) / len(ranks)
+            print(f"{label:>16}: " + ", ".join(f"recall@{k} {v:.2f}" for k, v in recall.items()) + f", MRR {mrr:.3f}, {latency}")
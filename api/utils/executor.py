@@ -0,0 +1,342 @@
+"""
+Process-wide executor for tool calls with per-tool concurrency limits and deadlines.
+"""
+from concurrent.futures import ThreadPoolExecutor, Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+from collections import deque
+import itertools
+import threading
+import heapq
+import time
+import os
+
+
+@dataclass
+class ToolStats:
+    """ Counters for a single tool """
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    rejected: int = 0
+    queued: int = 0
+    running: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    total_wait: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=256))
+
+    def record(self, wait: float, latency: float, failed: bool):
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self.total_wait += wait
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.latencies.append(latency)
+
+    def as_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "rejected": self.rejected,
+            "queued": self.queued,
+            "running": self.running,
+            "avg_wait": round(self.total_wait / finished, 4) if finished else 0.0,
+            "avg_latency": round(self.total_latency / finished, 4) if finished else 0.0,
+            "p50_latency": round(percentile(0.50), 4),
+            "p95_latency": round(percentile(0.95), 4),
+            "max_latency": round(self.max_latency, 4),
+        }
+
+
+class _Job:
+    __slots__ = ("name", "func", "arguments", "timeout", "future", "submitted_at", "started_at", "deadline", "cancelled")
+
+    def __init__(self, name: str, func: Callable, arguments: dict, timeout: float):
+        self.name = name
+        self.func = func
+        self.arguments = arguments
+        self.timeout = timeout
+        self.future: Future = Future()
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.deadline = self.submitted_at + timeout
+        self.cancelled = threading.Event()
+
+
+# The call running in the current worker thread (read by the HTTP client to honor the deadline)
+_current = threading.local()
+
+
+def remaining_time() -> Optional[float]:
+    """ Seconds left before the deadline of the tool call running in this thread (None outside tool calls) """
+    job: Optional[_Job] = getattr(_current, "job", None)
+    if job is None:
+        return None
+    return 0.0 if job.cancelled.is_set() else max(0.0, job.deadline - time.monotonic())
+
+
+def is_cancelled() -> bool:
+    """ Whether the tool call running in this thread has missed its deadline and should stop """
+    job: Optional[_Job] = getattr(_current, "job", None)
+    return job is not None and job.cancelled.is_set()
+
+
+def propagate(func: Callable) -> Callable:
+    """
+    `func` bound to the tool call running in this thread, for work handed to another thread pool:
+    `remaining_time` and `is_cancelled` then answer for that call in the other thread as well.
+    """
+    job: Optional[_Job] = getattr(_current, "job", None)
+    if job is None:
+        return func
+
+    def run(*args, **kwargs):
+        previous = getattr(_current, "job", None)
+        _current.job = job
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.job = previous
+    return run
+
+
+def timeout_result(name: str, timeout: float) -> Dict[str, Any]:
+    """ Structured result returned to the model when a tool misses its deadline """
+    return {
+        "error": "timeout",
+        "tool": name,
+        "timeout": timeout,
+        "message": f"Tool '{name}' did not respond within {timeout:g} seconds. "
+                   f"The upstream service may be slow or unavailable; answer with what is known or try again later."
+    }
+
+
+def busy_result(name: str, queued: int) -> Dict[str, Any]:
+    """ Structured result returned to the model when a tool queue is full """
+    return {
+        "error": "busy",
+        "tool": name,
+        "queued": queued,
+        "message": f"Tool '{name}' is overloaded ({queued} calls waiting). Try again later."
+    }
+
+
+class ToolExecutor:
+    """
+    Shared, bounded thread pool for tool calls.
+
+    Every tool gets a concurrency limit; calls beyond the limit wait in a per-tool queue
+    instead of occupying a worker thread. Every call gets a deadline that covers both the
+    queueing and the running time. When the deadline passes, the returned future resolves
+    with `timeout_result` and the call is cancelled cooperatively: Python threads cannot be
+    killed, so the running tool is signalled instead (`is_cancelled`), and the shared HTTP client
+    caps every request at `remaining_time` and aborts requests in flight at the deadline (work
+    handed to other thread pools carries the call along with `propagate`). Until
+    the tool returns it keeps its concurrency slot; its late result is discarded and only counted
+    as timed out.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        default_timeout: float = 30.0,
+        default_concurrency: int = 4,
+        max_queue: int = 64
+    ):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.default_timeout = default_timeout
+        self.default_concurrency = default_concurrency
+        self.max_queue = max_queue
+
+        self.__pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        self.__lock = threading.Lock()
+        self.__deadline_changed = threading.Condition(self.__lock)
+        self.__deadlines: list[tuple[float, int, _Job]] = []
+        self.__sequence = itertools.count()
+        self.__limits: Dict[str, int] = {}
+        self.__timeouts: Dict[str, float] = {}
+        self.__queues: Dict[str, deque[_Job]] = {}
+        self.__stats: Dict[str, ToolStats] = {}
+        self.__watchdog: Optional[threading.Thread] = None
+        self.__shutdown = False
+
+    def configure(self, name: str, timeout: Optional[float] = None, max_concurrency: Optional[int] = None):
+        """ Set the default deadline and concurrency limit of a tool """
+        with self.__lock:
+            if timeout is not None:
+                self.__timeouts[name] = timeout
+            if max_concurrency is not None:
+                self.__limits[name] = max(1, max_concurrency)
+
+    def submit(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        arguments: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None
+    ) -> Future:
+        """
+        Schedule a tool call.
+
+        Args:
+            name: Tool name, used for limits and statistics
+            func: Tool implementation
+            arguments: Keyword arguments for the implementation
+            timeout: Deadline in seconds (queueing included). Defaults to the configured one.
+            max_concurrency: Concurrency limit for this tool. Defaults to the configured one.
+
+        Returns:
+            Future resolving to the tool result, `timeout_result(...)` or `busy_result(...)`.
+            Exceptions raised by the tool are set on the future.
+        """
+        rejected = None
+        with self.__lock:
+            if self.__shutdown:
+                raise RuntimeError("Tool executor is shut down.")
+            if max_concurrency is not None:
+                self.__limits[name] = max(1, max_concurrency)
+            limit = self.__limits.get(name, self.default_concurrency)
+            timeout = timeout if timeout is not None else self.__timeouts.get(name, self.default_timeout)
+
+            job = _Job(name, func, arguments or {}, timeout)
+            stats = self.__stats.setdefault(name, ToolStats())
+            queue = self.__queues.setdefault(name, deque())
+            stats.submitted += 1
+
+            if stats.running < limit:
+                stats.running += 1
+                self.__pool.submit(self.__run, job)
+            elif len(queue) < self.max_queue:
+                stats.queued += 1
+                queue.append(job)
+            else:
+                stats.rejected += 1
+                rejected = busy_result(name, len(queue))
+
+            if rejected is None:
+                heapq.heappush(self.__deadlines, (job.deadline, next(self.__sequence), job))
+                self.__ensure_watchdog()
+                self.__deadline_changed.notify()
+
+        if rejected is not None:
+            job.future.set_result(rejected)
+        return job.future
+
+    def __run(self, job: _Job):
+        job.started_at = time.monotonic()
+        result, error = None, None
+        if not job.future.done():
+            _current.job = job
+            try:
+                result = job.func(**job.arguments)
+            except Exception as e:
+                error = e
+            finally:
+                _current.job = None
+        finished_at = time.monotonic()
+
+        with self.__lock:
+            stats = self.__stats[job.name]
+            stats.running -= 1
+            if not job.cancelled.is_set():  # timed out calls are only counted as timed out
+                stats.record(job.started_at - job.submitted_at, finished_at - job.started_at, error is not None)
+            self.__dispatch_next(job.name)
+
+        try:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+        except InvalidStateError:
+            pass  # The deadline has already resolved this call
+
+    def __dispatch_next(self, name: str):
+        """ Start the next queued call of a tool (lock must be held) """
+        queue = self.__queues[name]
+        stats = self.__stats[name]
+        limit = self.__limits.get(name, self.default_concurrency)
+        while queue and stats.running < limit:
+            job = queue.popleft()
+            stats.queued -= 1
+            if job.future.done():  # Timed out or cancelled while waiting
+                continue
+            stats.running += 1
+            self.__pool.submit(self.__run, job)
+
+    def __ensure_watchdog(self):
+        if self.__watchdog is None or not self.__watchdog.is_alive():
+            self.__watchdog = threading.Thread(target=self.__watch_deadlines, name="tool-watchdog", daemon=True)
+            self.__watchdog.start()
+
+    def __watch_deadlines(self):
+        while True:
+            expired = []
+            with self.__lock:
+                while not self.__shutdown:
+                    if not self.__deadlines:
+                        self.__deadline_changed.wait()
+                        continue
+                    deadline, _, job = self.__deadlines[0]
+                    if job.future.done():
+                        heapq.heappop(self.__deadlines)
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        self.__deadline_changed.wait(remaining)
+                        continue
+                    heapq.heappop(self.__deadlines)
+                    job.cancelled.set()  # signals the running tool and its HTTP requests
+                    stats = self.__stats[job.name]
+                    stats.timed_out += 1
+                    queue = self.__queues[job.name]
+                    if job.started_at is None and job in queue:
+                        queue.remove(job)
+                        stats.queued -= 1
+                    expired.append(job)
+                    if not self.__deadlines or self.__deadlines[0][0] > time.monotonic():
+                        break
+                if self.__shutdown and not expired:
+                    return
+
+            for job in expired:  # Resolve outside the lock: callbacks may submit new calls
+                try:
+                    job.future.set_result(timeout_result(job.name, job.timeout))
+                except InvalidStateError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """ Queue depth, concurrency and latency counters of every tool """
+        with self.__lock:
+            tools = {name: stats.as_dict() for name, stats in self.__stats.items()}
+        return {
+            "max_workers": self.max_workers,
+            "queued": sum(tool["queued"] for tool in tools.values()),
+            "running": sum(tool["running"] for tool in tools.values()),
+            "tools": tools
+        }
+
+    def shutdown(self, wait: bool = False):
+        """ Stop accepting calls and release the worker threads """
+        with self.__lock:
+            self.__shutdown = True
+            self.__deadline_changed.notify_all()
+        self.__pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global tool executor instance
+tool_executor = ToolExecutor()
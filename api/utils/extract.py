@@ -0,0 +1,381 @@
+"""
+Pluggable HTML-to-text extractors and site-specific boilerplate rules.
+"""
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import codecs
+import json
+import os
+import re
+
+
+# Saved pages (pages.json maps each file to its URL): made-up pages in the center site layout under
+# example.invalid URLs, and live captures of the center site written by `--capture`
+FIXTURE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "fixtures"))
+SYNTHETIC_DIR = os.path.join(FIXTURE_DIR, "synthetic")
+CAPTURE_DIR = os.path.join(FIXTURE_DIR, "captured")
+CAPTURE_URLS = [f"https://www.cheonanurc.or.kr/{path}" for path in ("131", "133", "68", "41", "64", "35", "new")]
+
+
+# Start and end tags of block elements: table cells, list items and paragraphs are separated by a space
+# ("<td>58</td><td>제목</td>" reads "58 제목", not "58제목"), inline elements (<b>, <a>, <span>) are not
+_BLOCK_TAG = re.compile(rb"<(?=/?(?:td|th|tr|li|p|div|br|h[1-6]|table|thead|tbody|ul|ol|dt|dd|section|article|header|footer|main|nav)\b)", re.IGNORECASE)
+
+
+def separate_blocks(body: bytes) -> bytes:
+    """ Insert a space before every block element tag so that adjacent blocks do not run together """
+    return _BLOCK_TAG.sub(b" <", body)
+
+
+def normalize_text(text: str) -> str:
+    """ Collapse the text of a page the way every extractor reports it """
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+class HTMLExtractor:
+    """
+    Extracts the title, meta description and visible text of an HTML page.
+
+    The text is every text node outside of <script> and <style> concatenated in document
+    order (block elements separated by a space, see `separate_blocks`) and collapsed by
+    `normalize_text`, so all backends produce the same output for well-formed pages.
+
+    `max_chars` lets a backend stop once that much text has been extracted (the returned
+    text may be longer). Tree based backends parse the whole (byte-capped) body in one C pass;
+    the pure Python backend parses incrementally and stops early.
+    """
+    name = "base"
+    version = 2  # bumped when the extracted text changes, so page cache entries are recomputed
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @property
+    def cache_name(self) -> str:
+        """ Name of the extraction in the page cache (results of different backends are kept apart) """
+        return f"text.{self.name}.v{self.version}"
+
+    def extract(self, body: bytes, max_chars: Optional[int] = None) -> Dict[str, str]:
+        raise NotImplementedError
+
+
+class SelectolaxExtractor(HTMLExtractor):
+    """ Lexbor based parser (fastest) """
+    name = "selectolax"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+            return True
+        except ImportError:
+            return False
+
+    def extract(self, body: bytes, max_chars: Optional[int] = None) -> Dict[str, str]:
+        from selectolax.lexbor import LexborHTMLParser
+        tree = LexborHTMLParser(decode_body(separate_blocks(body)))
+        title = tree.css_first("title")
+        meta = tree.css_first('meta[name="description"]')
+        tree.strip_tags(["script", "style"])
+        return {
+            "title": title.text(strip=True) if title is not None else "",
+            "description": (meta.attributes.get("content") or "") if meta is not None else "",
+            "text_content": normalize_text(tree.root.text(deep=True, separator="", strip=False) if tree.root else "")
+        }
+
+
+class LxmlExtractor(HTMLExtractor):
+    """ libxml2 based parser """
+    name = "lxml"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import lxml.html
+            return True
+        except ImportError:
+            return False
+
+    def extract(self, body: bytes, max_chars: Optional[int] = None) -> Dict[str, str]:
+        from lxml import etree, html
+        try:
+            tree = html.document_fromstring(separate_blocks(body))
+        except (etree.ParserError, ValueError):  # Empty document
+            return {"title": "", "description": "", "text_content": ""}
+        title = tree.find(".//title")
+        description = tree.xpath('//meta[@name="description"]/@content')
+        etree.strip_elements(tree, "script", "style", etree.Comment, etree.ProcessingInstruction, with_tail=False)
+        return {
+            "title": "".join(title.itertext()).strip() if title is not None else "",
+            "description": description[0] if description else "",
+            "text_content": normalize_text("".join(tree.itertext()))
+        }
+
+
+class SoupExtractor(HTMLExtractor):
+    """ BeautifulSoup with `html.parser` (the reference output) """
+    name = "soup"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import bs4
+            return True
+        except ImportError:
+            return False
+
+    def extract(self, body: bytes, max_chars: Optional[int] = None) -> Dict[str, str]:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(separate_blocks(body), 'html.parser')
+        title = soup.find('title')
+        meta = soup.find('meta', attrs={'name': 'description'})
+        for script in soup(["script", "style"]):
+            script.decompose()
+        return {
+            "title": title.get_text(strip=True) if title else "",
+            "description": meta.get('content', '') if meta else "",
+            "text_content": normalize_text(soup.get_text())
+        }
+
+
+class _TextCollector(HTMLParser):
+    __SKIP = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks: List[str] = []
+        self.size = 0
+        self.title: List[str] = []
+        self.description = ""
+        self.__skip = 0
+        self.__in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.__SKIP:
+            self.__skip += 1
+        elif tag == "title":
+            self.__in_title = True
+        elif tag == "meta" and not self.description:
+            attrs = dict(attrs)
+            if attrs.get("name") == "description":
+                self.description = attrs.get("content") or ""
+
+    def handle_endtag(self, tag):
+        if tag in self.__SKIP:
+            self.__skip = max(0, self.__skip - 1)
+        elif tag == "title":
+            self.__in_title = False
+
+    def handle_data(self, data):
+        if self.__skip:
+            return
+        self.chunks.append(data)
+        self.size += len(data)
+        if self.__in_title:
+            self.title.append(data)
+
+
+class StdlibExtractor(HTMLExtractor):
+    """ Streaming `html.parser` tokenizer without building a tree (pure Python fallback) """
+    name = "stdlib"
+    chunk_size = 16384
+
+    def extract(self, body: bytes, max_chars: Optional[int] = None) -> Dict[str, str]:
+        collector = _TextCollector()
+        body = separate_blocks(body)
+        encoding, offset = detect_encoding(body)
+        decoder = codecs.getincrementaldecoder(encoding)("replace")
+        for start in range(offset, len(body), self.chunk_size):
+            collector.feed(decoder.decode(body[start:start + self.chunk_size]))
+            if max_chars is not None and collector.size >= max_chars and len(normalize_text("".join(collector.chunks))) >= max_chars:
+                break  # Enough text: skip the rest of the document
+        else:
+            collector.feed(decoder.decode(b"", final=True))
+            collector.close()
+        return {
+            "title": "".join(collector.title).strip(),
+            "description": collector.description,
+            "text_content": normalize_text("".join(collector.chunks))
+        }
+
+
+def detect_encoding(body: bytes) -> Tuple[str, int]:
+    """ Encoding of an HTML body from its BOM or <meta charset> (default UTF-8) and the BOM length """
+    if body.startswith(codecs.BOM_UTF8):
+        return "utf-8", len(codecs.BOM_UTF8)
+    head = body[:2048].lower()
+    index = head.find(b"charset=")
+    if index >= 0:
+        charset = head[index + 8:index + 40].strip(b"\"' ").split(b'"')[0].split(b"'")[0].split(b";")[0].split(b">")[0].split(b" ")[0]
+        try:
+            return codecs.lookup(charset.decode("ascii")).name, 0
+        except (LookupError, UnicodeDecodeError):
+            pass
+    return "utf-8", 0
+
+
+def decode_body(body: bytes) -> str:
+    """ Decode an HTML body using its BOM or <meta charset>, defaulting to UTF-8 """
+    encoding, offset = detect_encoding(body)
+    return body[offset:].decode(encoding, "replace")
+
+
+# Backends in order of preference
+EXTRACTORS = {extractor.name: extractor for extractor in (SelectolaxExtractor, LxmlExtractor, StdlibExtractor, SoupExtractor)}
+
+
+def get_extractor(name: Optional[str] = None) -> HTMLExtractor:
+    """ Extractor by name (or `HTML_EXTRACTOR`), defaulting to the fastest installed backend """
+    name = name or os.getenv("HTML_EXTRACTOR")
+    if name:
+        if name not in EXTRACTORS or not EXTRACTORS[name].available():
+            raise ValueError(f"HTML extractor '{name}' is not available.")
+        return EXTRACTORS[name]()
+    for extractor in EXTRACTORS.values():
+        if extractor.available():
+            return extractor()
+    return StdlibExtractor()
+
+
+@dataclass
+class BoilerplateRule:
+    """ Site navigation and footer text to cut from the pages of a site """
+    host: str
+    path_prefix: str = ""
+    end_before: Tuple[str, ...] = ()  # the text is cut at the first of these markers
+    start_after: Tuple[str, ...] = ()  # then everything up to the last of these markers is dropped
+
+
+BOILERPLATE_RULES = [
+    BoilerplateRule("www.cheonanurc.or.kr", end_before=("Copyrightⓒ",), start_after=("천안시 도시재생지원센터 site search",)),
+    BoilerplateRule("www.cheonanurc.or.kr", "/new", end_before=("검색어 입력 Previous",)),  # notice board pagination
+    # Synthetic pages in the center site layout (data/fixtures/synthetic)
+    BoilerplateRule("example.invalid", end_before=("Copyrightⓒ",), start_after=("천안시 도시재생지원센터 site search",)),
+    BoilerplateRule("example.invalid", "/new", end_before=("검색어 입력 Previous",)),
+]
+
+
+def strip_boilerplate(url: str, text: str) -> str:
+    """ Apply the boilerplate rules matching a URL to its extracted text """
+    parsed = urlparse(url)
+    stripped = False
+    for rule in BOILERPLATE_RULES:
+        if parsed.netloc == rule.host and parsed.path.startswith(rule.path_prefix):
+            for marker in rule.end_before:
+                text = text.split(marker)[0]
+            for marker in rule.start_after:
+                text = text.split(marker)[-1]
+            stripped = True
+    return text.strip() if stripped else text
+
+
+def load_fixtures(path: str) -> List[Tuple[str, bytes]]:
+    """ (URL, HTML body) of the saved pages listed in `path`/pages.json (empty if there are none) """
+    try:
+        with open(os.path.join(path, "pages.json"), "r", encoding="utf-8") as file:
+            pages = json.load(file)["pages"]
+    except (OSError, ValueError, KeyError):
+        return []
+    fixtures = []
+    for page in pages:
+        try:
+            with open(os.path.join(path, page["file"]), "rb") as file:
+                fixtures.append((page["url"], file.read()))
+        except OSError:
+            continue
+    return fixtures
+
+
+# Global HTML extractor instance
+html_extractor = get_extractor()
+
+
+# Benchmark: python -m api.utils.extract [HTML files or directories ...]
+# (defaults to the synthetic and captured pages in data/fixtures and the page cache bodies, plus a generated page)
+# python -m api.utils.extract --capture saves live captures of the center pages to data/fixtures/captured
+if __name__ == '__main__':
+    from difflib import SequenceMatcher
+    import time
+    import sys
+
+    def synthetic_page(items: int = 400) -> bytes:
+        nav = "".join(f'<li><a href="/{i}">메뉴 {i}</a></li>' for i in range(60))
+        rows = "".join(
+            f'<div class="item"><h3>{i}번째 도시재생 프로그램 &amp; 주민 참여 안내</h3>'
+            f'<p>모집기간 2025.05.{i % 28 + 1:02d} ~ 06.06 <b>천안시</b> 도시재생지원센터에서   운영합니다.</p>'
+            f'<!-- comment {i} --><script>var x{i} = "<p>not text</p>";</script></div>\n'
+            for i in range(items)
+        )
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title> 천안시 도시재생지원센터 </title>'
+            '<meta name="description" content="도시재생 소식"><style>.item { color: red; }</style></head>'
+            f'<body><ul>{nav}</ul>천안시 도시재생지원센터 site search {rows}<footer>Copyrightⓒ 2025</footer></body></html>'
+        ).encode("utf-8")
+
+    if sys.argv[1:] == ["--capture"]:
+        from datetime import date
+        from .http_client import http_client
+        os.makedirs(CAPTURE_DIR, exist_ok=True)
+        pages = []
+        for url in CAPTURE_URLS:
+            response = http_client.get(url, timeout=30)
+            response.raise_for_status()
+            file = f"{urlparse(url).path.strip('/') or 'index'}.html"
+            with open(os.path.join(CAPTURE_DIR, file), "wb") as f:
+                f.write(response.content)
+            pages.append({"file": file, "url": url})
+            print(f"Captured {url} -> {file} ({len(response.content) / 1024:.0f} KiB)")
+        with open(os.path.join(CAPTURE_DIR, "pages.json"), "w", encoding="utf-8") as f:
+            json.dump({"description": f"Live captures of the center website ({date.today().isoformat()})", "pages": pages}, f, ensure_ascii=False, indent=2)
+        sys.exit(0)
+
+    fixtures: List[Tuple[str, bytes]] = [] if sys.argv[1:] else load_fixtures(SYNTHETIC_DIR) + load_fixtures(CAPTURE_DIR)
+    from .page_cache import CACHE_DIR
+    paths = sys.argv[1:] or [CACHE_DIR]
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        for file in files:
+            if file.endswith((".html", ".htm", ".body")):
+                with open(file, "rb") as f:
+                    fixtures.append((os.path.basename(file), f.read()))
+    fixtures.append(("generated", synthetic_page()))
+
+    size = sum(len(body) for _, body in fixtures)
+    print(f"{len(fixtures)} fixtures, {size / 1024:.0f} KiB")
+    reference = SoupExtractor() if SoupExtractor.available() else StdlibExtractor()
+    expected = [reference.extract(body) for _, body in fixtures]
+
+    for name, extractor in EXTRACTORS.items():
+        if not extractor.available():
+            print(f"{name:>10}: not installed")
+            continue
+        extractor = extractor()
+        rounds = 5
+        started = time.perf_counter()
+        for _ in range(rounds):
+            outputs = [extractor.extract(body) for _, body in fixtures]
+        elapsed = (time.perf_counter() - started) / rounds
+        exact = sum(output == wanted for output, wanted in zip(outputs, expected))
+        similarity = sum(
+            SequenceMatcher(None, output["text_content"][:20000], wanted["text_content"][:20000], autojunk=False).ratio()
+            for output, wanted in zip(outputs, expected)
+        ) / len(fixtures)
+        print(
+            f"{name:>10}: {elapsed * 1000:8.2f} ms/round  {size / elapsed / 1024 / 1024:7.2f} MiB/s  "
+            f"identical to {reference.name}: {exact}/{len(fixtures)}  text similarity: {similarity:.4f}"
+        )
+
+    # Early termination: the `fetch_webpage` tool keeps only `length_limit` (5000) characters
+    extractor = StdlibExtractor()
+    started = time.perf_counter()
+    for _, body in fixtures:
+        extractor.extract(body, max_chars=5000)
+    print(f"{'stdlib':>10}: {(time.perf_counter() - started) * 1000:8.2f} ms/round  (stopping after 5000 characters)")
+    print("Selected backend:", html_extractor.name)
@@ -0,0 +1,249 @@
+"""
+Parallel fetch orchestration with jittered exponential backoff, hedged requests and a deadline.
+"""
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from collections import deque
+from urllib.parse import urlparse
+import threading
+import random
+import time
+
+from .cache import is_error_result
+from .executor import propagate, remaining_time, is_cancelled
+
+
+@dataclass
+class RetryPolicy:
+    """ Full-jitter exponential backoff: the n-th retry waits uniform(0, min(max_delay, base_delay * 2^n)) """
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 4.0
+
+    def delay(self, retry: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+
+@dataclass
+class Outcome:
+    """ Result of one key of a fan-out """
+    key: Hashable
+    value: Any = None
+    error: Optional[str] = None
+    attempts: int = 0
+    hedged: bool = False
+    latency: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class LatencyTracker:
+    """ Rolling latency samples per host, used to decide when a request is slow enough to hedge """
+
+    def __init__(self, window: int = 128, min_samples: int = 8):
+        self.window = window
+        self.min_samples = min_samples
+        self.__lock = threading.Lock()
+        self.__samples: Dict[str, deque] = {}
+
+    def record(self, host: str, latency: float):
+        with self.__lock:
+            self.__samples.setdefault(host, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, host: str, p: float) -> Optional[float]:
+        with self.__lock:
+            samples = sorted(self.__samples.get(host, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+@dataclass
+class _State:
+    outcome: Outcome
+    futures: Dict[Future, float] = field(default_factory=dict)  # running attempt -> start time
+    retry_at: Optional[float] = None
+    hedge_at: Optional[float] = None
+
+
+class FanOut:
+    """
+    Runs a blocking fetch function for many keys (usually URLs) at once.
+
+    - Every key is started immediately on a shared pool.
+    - A failed attempt (exception or error result) is retried after a jittered exponential backoff.
+    - When an attempt runs longer than the `hedge_percentile` latency of its host, one duplicate
+      attempt is started and whichever finishes first wins.
+    - At the deadline the keys that have not finished are reported as failed, so callers always
+      get the partial results within the deadline.
+    """
+
+    def __init__(self, max_workers: int = 16):
+        self.max_workers = max_workers
+        self.latencies = LatencyTracker()
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fanout")
+        self.__lock = threading.Lock()
+        self.__stats = {"keys": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_misses": 0}
+
+    def __count(self, name: str, value: int = 1):
+        with self.__lock:
+            self.__stats[name] += value
+
+    def run(
+        self,
+        func: Callable[[Hashable], Any],
+        keys: List[Hashable],
+        deadline: float = 30.0,
+        retry: RetryPolicy = RetryPolicy(),
+        hedge_percentile: Optional[float] = 0.95,
+        is_failure: Callable[[Any], bool] = is_error_result,
+        host: Callable[[Hashable], str] = lambda key: urlparse(str(key)).netloc
+    ) -> Dict[Hashable, Outcome]:
+        """
+        Call `func(key)` for every key.
+
+        Args:
+            func: Blocking fetch function
+            keys: Keys to fetch (duplicates are fetched once)
+            deadline: Seconds after which unfinished keys are given up (capped by the deadline of the calling tool)
+            retry: Retry policy of failed attempts
+            hedge_percentile: Latency percentile after which a duplicate attempt is sent (None disables hedging)
+            is_failure: Whether a returned value is a failure to retry
+            host: Latency bucket of a key
+
+        Returns:
+            Outcome of every key, in the order of `keys`
+        """
+        started = time.monotonic()
+        remaining = remaining_time()
+        deadline = deadline if remaining is None else min(deadline, remaining)
+        end = started + deadline
+        func = propagate(func)  # Attempts honor the tool call's deadline and cancellation in the pool threads
+        states = {key: _State(Outcome(key)) for key in dict.fromkeys(keys)}
+        owners: Dict[Future, Hashable] = {}
+        self.__count("keys", len(states))
+
+        def launch(key: Hashable, hedge: bool = False):
+            state = states[key]
+            future = self.__pool.submit(func, key)
+            owners[future] = key
+            now = time.monotonic()
+            state.futures[future] = now
+            state.outcome.attempts += 1
+            state.outcome.hedged |= hedge
+            self.__count("hedges" if hedge else "attempts")
+            if not hedge and hedge_percentile is not None:
+                threshold = self.latencies.percentile(host(key), hedge_percentile)
+                state.hedge_at = now + threshold if threshold is not None else None
+
+        for key in states:
+            launch(key)
+
+        pending = set(states)
+        while pending:
+            now = time.monotonic()
+            if now >= end or is_cancelled():
+                break
+            for key in list(pending):  # Due retries and hedges
+                state = states[key]
+                if state.retry_at is not None and now >= state.retry_at:
+                    state.retry_at = None
+                    self.__count("retries")
+                    launch(key)
+                elif state.hedge_at is not None and now >= state.hedge_at and len(state.futures) == 1:
+                    state.hedge_at = None
+                    launch(key, hedge=True)
+
+            running = [future for key in pending for future in states[key].futures]
+            timers = [t for key in pending for t in (states[key].retry_at, states[key].hedge_at) if t is not None]
+            timeout = max(0.0, min(timers + [end]) - time.monotonic())
+            if not running:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                key = owners.pop(future)
+                state = states[key]
+                attempt_started = state.futures.pop(future)
+                if key not in pending:
+                    continue
+                latency = time.monotonic() - attempt_started
+                try:
+                    value, error = future.result(), None
+                    if is_failure(value):
+                        error = str(value.get("error", value)) if isinstance(value, dict) else str(value)
+                except Exception as e:
+                    value, error = None, f"{type(e).__name__}: {e}"
+
+                if error is None:
+                    self.latencies.record(host(key), latency)
+                    state.outcome.value, state.outcome.error = value, None
+                    state.outcome.latency = time.monotonic() - started
+                    if state.outcome.hedged and state.futures:
+                        self.__count("hedge_wins")  # The other attempt is still running
+                    pending.discard(key)
+                    continue
+
+                state.outcome.error = error
+                if state.futures:  # The hedged twin may still succeed
+                    continue
+                retries = state.outcome.attempts - state.outcome.hedged
+                if retries < retry.attempts:
+                    state.retry_at = time.monotonic() + retry.delay(retries - 1)
+                    state.hedge_at = None
+                    if state.retry_at < end:
+                        continue
+                pending.discard(key)
+                state.outcome.latency = time.monotonic() - started
+
+        for key in pending:
+            states[key].outcome.error = states[key].outcome.error or f"No response within {deadline:g} seconds"
+            states[key].outcome.latency = deadline
+        self.__count("deadline_misses", len(pending))
+        return {key: state.outcome for key, state in states.items()}
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return dict(self.__stats)
+
+
+# Global fan-out instance
+fanout = FanOut()
+
+
+def fetch_all(func: Callable[[Hashable], Any], keys: List[Hashable], **kwargs) -> Dict[Hashable, Outcome]:
+    """ `fanout.run` shortcut """
+    return fanout.run(func, keys, **kwargs)
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    calls: Dict[str, int] = {}
+
+    def flaky(url: str):
+        calls[url] = calls.get(url, 0) + 1
+        if url.endswith("/flaky") and calls[url] < 3:
+            return {"error": "503 Service Unavailable"}
+        if url.endswith("/slow") and calls[url] == 1:
+            time.sleep(2.0)  # The hedged duplicate answers first
+        if url.endswith("/hang"):
+            time.sleep(10)
+        time.sleep(0.05)
+        return {"url": url, "text_content": f"page {url}"}
+
+    for i in range(10):  # Warm up the latency tracker
+        flaky(f"https://example.org/warm{i}")
+        fanout.latencies.record("example.org", 0.05)
+
+    urls = ["https://example.org/ok", "https://example.org/flaky", "https://example.org/slow", "https://example.org/hang"]
+    started = time.perf_counter()
+    outcomes = fetch_all(flaky, urls, deadline=3.0, retry=RetryPolicy(attempts=3, base_delay=0.1))
+    print(f"Finished in {time.perf_counter() - started:.2f}s")
+    for outcome in outcomes.values():
+        print(f"{outcome.key}: ok={outcome.ok} attempts={outcome.attempts} hedged={outcome.hedged} "
+              f"latency={outcome.latency:.2f}s error={outcome.error}")
+    print("Fan-out stats:", fanout.stats())
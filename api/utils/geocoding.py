@@ -0,0 +1,178 @@
+"""
+Persistent location -> coordinates cache with a built-in gazetteer of Korean cities.
+"""
+from typing import Any, Callable, Dict, Optional
+import threading
+import json
+import time
+import os
+import re
+
+
+CACHE_FILE = os.getenv("GEOCODE_CACHE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "geocode.json"))
+
+# name, admin1, latitude, longitude, aliases
+_KOREAN_CITIES = [
+    ("Seoul", "Seoul", 37.5665, 126.9780, ("서울", "서울특별시")),
+    ("Busan", "Busan", 35.1796, 129.0756, ("부산", "부산광역시", "pusan")),
+    ("Incheon", "Incheon", 37.4563, 126.7052, ("인천", "인천광역시")),
+    ("Daegu", "Daegu", 35.8714, 128.6014, ("대구", "대구광역시")),
+    ("Daejeon", "Daejeon", 36.3504, 127.3845, ("대전", "대전광역시")),
+    ("Gwangju", "Gwangju", 35.1595, 126.8526, ("광주", "광주광역시")),
+    ("Ulsan", "Ulsan", 35.5384, 129.3114, ("울산", "울산광역시")),
+    ("Sejong", "Sejong", 36.4800, 127.2890, ("세종", "세종특별자치시", "sejong city")),
+    ("Cheonan", "Chungcheongnam-do", 36.8151, 127.1139, ("천안", "천안시", "cheonan-si", "chonan")),
+    ("Dongnam-gu, Cheonan", "Chungcheongnam-do", 36.8073, 127.1500, ("천안시 동남구", "동남구")),
+    ("Seobuk-gu, Cheonan", "Chungcheongnam-do", 36.8782, 127.1548, ("천안시 서북구", "서북구")),
+    ("Asan", "Chungcheongnam-do", 36.7898, 127.0019, ("아산", "아산시")),
+    ("Gongju", "Chungcheongnam-do", 36.4465, 127.1190, ("공주", "공주시")),
+    ("Dangjin", "Chungcheongnam-do", 36.8898, 126.6459, ("당진", "당진시")),
+    ("Seosan", "Chungcheongnam-do", 36.7848, 126.4503, ("서산", "서산시")),
+    ("Hongseong", "Chungcheongnam-do", 36.6012, 126.6608, ("홍성", "홍성군")),
+    ("Nonsan", "Chungcheongnam-do", 36.1872, 127.0987, ("논산", "논산시")),
+    ("Boryeong", "Chungcheongnam-do", 36.3334, 126.6128, ("보령", "보령시")),
+    ("Cheongju", "Chungcheongbuk-do", 36.6424, 127.4890, ("청주", "청주시")),
+    ("Chungju", "Chungcheongbuk-do", 36.9910, 127.9259, ("충주", "충주시")),
+    ("Suwon", "Gyeonggi-do", 37.2636, 127.0286, ("수원", "수원시")),
+    ("Seongnam", "Gyeonggi-do", 37.4200, 127.1267, ("성남", "성남시")),
+    ("Yongin", "Gyeonggi-do", 37.2411, 127.1776, ("용인", "용인시")),
+    ("Goyang", "Gyeonggi-do", 37.6584, 126.8320, ("고양", "고양시")),
+    ("Pyeongtaek", "Gyeonggi-do", 36.9921, 127.1129, ("평택", "평택시")),
+    ("Chuncheon", "Gangwon-do", 37.8813, 127.7298, ("춘천", "춘천시")),
+    ("Wonju", "Gangwon-do", 37.3422, 127.9202, ("원주", "원주시")),
+    ("Gangneung", "Gangwon-do", 37.7519, 128.8761, ("강릉", "강릉시")),
+    ("Jeonju", "Jeollabuk-do", 35.8242, 127.1480, ("전주", "전주시")),
+    ("Mokpo", "Jeollanam-do", 34.8118, 126.3922, ("목포", "목포시")),
+    ("Yeosu", "Jeollanam-do", 34.7604, 127.6622, ("여수", "여수시")),
+    ("Suncheon", "Jeollanam-do", 34.9507, 127.4872, ("순천", "순천시")),
+    ("Pohang", "Gyeongsangbuk-do", 36.0190, 129.3435, ("포항", "포항시")),
+    ("Gyeongju", "Gyeongsangbuk-do", 35.8562, 129.2247, ("경주", "경주시")),
+    ("Andong", "Gyeongsangbuk-do", 36.5684, 128.7294, ("안동", "안동시")),
+    ("Changwon", "Gyeongsangnam-do", 35.2281, 128.6811, ("창원", "창원시")),
+    ("Gimhae", "Gyeongsangnam-do", 35.2285, 128.8894, ("김해", "김해시")),
+    ("Jinju", "Gyeongsangnam-do", 35.1800, 128.1076, ("진주", "진주시")),
+    ("Jeju", "Jeju-do", 33.4996, 126.5312, ("제주", "제주시", "jeju city", "제주도")),
+    ("Seogwipo", "Jeju-do", 33.2541, 126.5600, ("서귀포", "서귀포시")),
+]
+
+# Built-in gazetteer: normalized name or alias -> coordinates record
+GAZETTEER: Dict[str, Dict[str, Any]] = {}
+
+
+def normalize_location(location: str) -> str:
+    """ Lookup key of a location name ("Cheonan, South Korea" -> "cheonan", "천안시" -> "천안시") """
+    text = " ".join(location.casefold().replace(",", " ").split())
+    text = re.sub(r"\s+(?:south korea|korea|republic of korea|대한민국|한국|kr)$", "", text)
+    return text.strip()
+
+
+for _name, _admin1, _latitude, _longitude, _aliases in _KOREAN_CITIES:
+    _record = {"latitude": _latitude, "longitude": _longitude, "name": _name, "country": "South Korea", "admin1": _admin1}
+    for _alias in (_name, *_aliases):
+        GAZETTEER.setdefault(normalize_location(_alias), _record)
+
+
+class GeocodeCache:
+    """
+    Location name -> coordinates lookups that survive restarts.
+
+    Names are answered from the built-in gazetteer of Korean cities first, then from the
+    persisted results of earlier geocoding calls. Only unknown names reach the geocoder;
+    "not found" answers are remembered for `negative_ttl` seconds so typos are not retried
+    on every turn, and failures (network errors) are never stored.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, negative_ttl: float = 86400.0, max_entries: int = 4096):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self.__lock = threading.Lock()
+        self.__entries: Optional[Dict[str, Dict[str, Any]]] = None  # loaded on first use
+        self.__stats = {"gazetteer": 0, "hits": 0, "misses": 0, "not_found": 0}
+
+    def __load(self) -> Dict[str, Dict[str, Any]]:
+        if self.__entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self.__entries = json.load(file)
+            except (OSError, ValueError):
+                self.__entries = {}
+        return self.__entries
+
+    def __save(self):
+        """ Atomic write of the whole cache (called with the lock held) """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump(self.__entries, file, ensure_ascii=False)
+        os.replace(temp, self.path)
+
+    def get(self, location: str) -> Optional[Dict[str, Any]]:
+        """ Known coordinates (or a remembered "not found" error) of a location, None if unknown """
+        key = normalize_location(location)
+        if key in GAZETTEER:
+            with self.__lock:
+                self.__stats["gazetteer"] += 1
+            return dict(GAZETTEER[key])
+        with self.__lock:
+            entry = self.__load().get(key)
+            if entry is None or ("error" in entry and time.time() - entry.get("stored_at", 0) > self.negative_ttl):
+                return None
+            self.__stats["hits"] += 1
+            return {k: v for k, v in entry.items() if k != "stored_at"}
+
+    def put(self, location: str, result: Dict[str, Any]):
+        """ Remember a geocoding result ("not found" errors included, other errors are skipped) """
+        if "error" in result and not result.get("not_found"):
+            return
+        with self.__lock:
+            entries = self.__load()
+            entries[normalize_location(location)] = {**result, "stored_at": time.time()}
+            while len(entries) > self.max_entries:
+                entries.pop(next(iter(entries)))
+            self.__save()
+
+    def lookup(self, location: str, geocode: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """ Coordinates of a location, calling `geocode(location)` only when it is not known yet """
+        cached = self.get(location)
+        if cached is not None:
+            return cached
+        with self.__lock:
+            self.__stats["misses"] += 1
+        result = geocode(location)
+        if result.get("not_found"):
+            with self.__lock:
+                self.__stats["not_found"] += 1
+        self.put(location, result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {**self.__stats, "entries": len(self.__load()), "gazetteer_names": len(GAZETTEER)}
+
+
+# Global geocode cache instance
+geocode_cache = GeocodeCache()
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    import tempfile
+
+    calls = []
+
+    def fake_geocode(location: str) -> Dict[str, Any]:
+        calls.append(location)
+        if location.startswith("Nowhere"):
+            return {"error": f"Location '{location}' not found", "not_found": True}
+        return {"latitude": 48.8566, "longitude": 2.3522, "name": "Paris", "country": "France", "admin1": "Île-de-France"}
+
+    cache = GeocodeCache(os.path.join(tempfile.mkdtemp(), "geocode.json"))
+    for name in ["Cheonan", "천안시", "Cheonan, South Korea", "Paris", "paris", "Nowhere123", "nowhere123"]:
+        print(f"{name!r:>25} -> {cache.lookup(name, fake_geocode)}")
+    print("Geocoder calls:", calls)
+
+    reloaded = GeocodeCache(cache.path)
+    print("After restart:", reloaded.get("PARIS"))
+    print("Geocode cache stats:", cache.stats())
@@ -0,0 +1,270 @@
+"""
+Offline holiday store: holidays per (country, year) persisted once and queried by binary search.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import date
+import threading
+import bisect
+import json
+import time
+import os
+
+
+CACHE_DIR = os.getenv("HOLIDAY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "holidays"))
+
+# Public holidays of South Korea (관공서의 공휴일에 관한 규정), including substitute and temporary holidays
+_KR_HOLIDAYS: Dict[int, List[Tuple[str, str, str]]] = {
+    2024: [
+        ("2024-01-01", "새해", "New Year's Day"),
+        ("2024-02-09", "설날", "Korean New Year"),
+        ("2024-02-10", "설날", "Korean New Year"),
+        ("2024-02-11", "설날", "Korean New Year"),
+        ("2024-02-12", "대체공휴일", "Substitute Holiday"),
+        ("2024-03-01", "삼일절", "Independence Movement Day"),
+        ("2024-04-10", "제22대 국회의원 선거일", "National Assembly Election Day"),
+        ("2024-05-05", "어린이날", "Children's Day"),
+        ("2024-05-06", "대체공휴일", "Substitute Holiday"),
+        ("2024-05-15", "부처님 오신 날", "Buddha's Birthday"),
+        ("2024-06-06", "현충일", "Memorial Day"),
+        ("2024-08-15", "광복절", "Liberation Day"),
+        ("2024-09-16", "추석", "Chuseok"),
+        ("2024-09-17", "추석", "Chuseok"),
+        ("2024-09-18", "추석", "Chuseok"),
+        ("2024-10-01", "임시공휴일 (국군의 날)", "Temporary Holiday (Armed Forces Day)"),
+        ("2024-10-03", "개천절", "National Foundation Day"),
+        ("2024-10-09", "한글날", "Hangul Day"),
+        ("2024-12-25", "기독탄신일", "Christmas Day"),
+    ],
+    2025: [
+        ("2025-01-01", "새해", "New Year's Day"),
+        ("2025-01-27", "임시공휴일", "Temporary Holiday"),
+        ("2025-01-28", "설날", "Korean New Year"),
+        ("2025-01-29", "설날", "Korean New Year"),
+        ("2025-01-30", "설날", "Korean New Year"),
+        ("2025-03-01", "삼일절", "Independence Movement Day"),
+        ("2025-03-03", "대체공휴일", "Substitute Holiday"),
+        ("2025-05-05", "어린이날", "Children's Day"),
+        ("2025-05-05", "부처님 오신 날", "Buddha's Birthday"),
+        ("2025-05-06", "대체공휴일", "Substitute Holiday"),
+        ("2025-06-03", "제21대 대통령 선거일", "Presidential Election Day"),
+        ("2025-06-06", "현충일", "Memorial Day"),
+        ("2025-08-15", "광복절", "Liberation Day"),
+        ("2025-10-03", "개천절", "National Foundation Day"),
+        ("2025-10-05", "추석", "Chuseok"),
+        ("2025-10-06", "추석", "Chuseok"),
+        ("2025-10-07", "추석", "Chuseok"),
+        ("2025-10-08", "대체공휴일", "Substitute Holiday"),
+        ("2025-10-09", "한글날", "Hangul Day"),
+        ("2025-12-25", "기독탄신일", "Christmas Day"),
+    ],
+    2026: [
+        ("2026-01-01", "새해", "New Year's Day"),
+        ("2026-02-16", "설날", "Korean New Year"),
+        ("2026-02-17", "설날", "Korean New Year"),
+        ("2026-02-18", "설날", "Korean New Year"),
+        ("2026-03-01", "삼일절", "Independence Movement Day"),
+        ("2026-03-02", "대체공휴일", "Substitute Holiday"),
+        ("2026-05-05", "어린이날", "Children's Day"),
+        ("2026-05-24", "부처님 오신 날", "Buddha's Birthday"),
+        ("2026-05-25", "대체공휴일", "Substitute Holiday"),
+        ("2026-06-03", "전국동시지방선거일", "Local Election Day"),
+        ("2026-06-06", "현충일", "Memorial Day"),
+        ("2026-08-15", "광복절", "Liberation Day"),
+        ("2026-08-17", "대체공휴일", "Substitute Holiday"),
+        ("2026-09-24", "추석", "Chuseok"),
+        ("2026-09-25", "추석", "Chuseok"),
+        ("2026-09-26", "추석", "Chuseok"),
+        ("2026-10-03", "개천절", "National Foundation Day"),
+        ("2026-10-05", "대체공휴일", "Substitute Holiday"),
+        ("2026-10-09", "한글날", "Hangul Day"),
+        ("2026-12-25", "기독탄신일", "Christmas Day"),
+    ],
+    2027: [
+        ("2027-01-01", "새해", "New Year's Day"),
+        ("2027-02-06", "설날", "Korean New Year"),
+        ("2027-02-07", "설날", "Korean New Year"),
+        ("2027-02-08", "설날", "Korean New Year"),
+        ("2027-02-09", "대체공휴일", "Substitute Holiday"),
+        ("2027-03-01", "삼일절", "Independence Movement Day"),
+        ("2027-05-05", "어린이날", "Children's Day"),
+        ("2027-05-13", "부처님 오신 날", "Buddha's Birthday"),
+        ("2027-06-06", "현충일", "Memorial Day"),
+        ("2027-08-15", "광복절", "Liberation Day"),
+        ("2027-08-16", "대체공휴일", "Substitute Holiday"),
+        ("2027-09-14", "추석", "Chuseok"),
+        ("2027-09-15", "추석", "Chuseok"),
+        ("2027-09-16", "추석", "Chuseok"),
+        ("2027-10-03", "개천절", "National Foundation Day"),
+        ("2027-10-04", "대체공휴일", "Substitute Holiday"),
+        ("2027-10-09", "한글날", "Hangul Day"),
+        ("2027-10-11", "대체공휴일", "Substitute Holiday"),
+        ("2027-12-25", "기독탄신일", "Christmas Day"),
+        ("2027-12-27", "대체공휴일", "Substitute Holiday"),
+    ],
+}
+
+BUNDLED = {"KR": _KR_HOLIDAYS}
+BUNDLED_SOURCE = "Offline holiday dataset"
+
+
+def bundled_holidays(country: str, year: int) -> Optional[List[Dict[str, Any]]]:
+    """ Holidays of the bundled offline dataset (None if the year is not covered) """
+    rows = BUNDLED.get(country, {}).get(year)
+    if rows is None:
+        return None
+    return [
+        {
+            'date': day,
+            'name': name,
+            'type': 'National holiday',
+            'local_name': local_name,
+            'country_code': country,
+            'global': True,
+            'counties': None
+        }
+        for day, local_name, name in rows
+    ]
+
+
+class HolidayCalendar:
+    """ Holidays of one country and year sorted by date (range queries by bisect on ISO dates) """
+
+    def __init__(self, country: str, year: int, holidays: List[Dict[str, Any]], source: str):
+        self.country = country
+        self.year = year
+        self.source = source
+        self.holidays = sorted(holidays, key=lambda holiday: holiday['date'])
+        self.__dates = [holiday['date'] for holiday in self.holidays]
+
+    def between(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """ Holidays from `start` to `end` (inclusive ISO dates) """
+        return self.holidays[bisect.bisect_left(self.__dates, start):bisect.bisect_right(self.__dates, end)]
+
+    def on(self, day: str) -> List[Dict[str, Any]]:
+        return self.between(day, day)
+
+    def __len__(self) -> int:
+        return len(self.holidays)
+
+
+class HolidayStore:
+    """
+    Holidays per (country, year) kept in memory as `HolidayCalendar`s.
+
+    A year is loaded once from, in order: the bundled offline dataset (KR), the on-disk
+    cache of earlier downloads, or `fetch(country, year)` whose result is persisted. After that
+    every query is a dictionary lookup plus a binary search, without network access.
+    Failed downloads are not retried for `retry_interval` seconds.
+    """
+
+    def __init__(self, fetch: Callable[[str, int], Dict[str, Any]], cache_dir: str = CACHE_DIR, retry_interval: float = 3600):
+        self.fetch = fetch
+        self.cache_dir = cache_dir
+        self.retry_interval = retry_interval
+
+        self.__lock = threading.Lock()
+        self.__calendars: Dict[Tuple[str, int], HolidayCalendar] = {}
+        self.__failures: Dict[Tuple[str, int], Tuple[float, str]] = {}  # -> (time, error)
+        self.__stats = {"bundled": 0, "disk": 0, "downloads": 0, "failures": 0}
+
+    def __path(self, country: str, year: int) -> str:
+        return os.path.join(self.cache_dir, f"{country}-{year}.json")
+
+    def __count(self, name: str):
+        with self.__lock:
+            self.__stats[name] += 1
+
+    def calendar(self, country: str, year: int) -> Tuple[Optional[HolidayCalendar], Optional[str]]:
+        """
+        Holidays of a country and year.
+
+        Returns:
+            (calendar or None, error message if the year is not available)
+        """
+        country = country.upper()
+        key = (country, year)
+        with self.__lock:
+            if key in self.__calendars:
+                return self.__calendars[key], None
+            failure = self.__failures.get(key)
+            if failure is not None and time.time() - failure[0] < self.retry_interval:
+                return None, failure[1]
+
+        calendar = self.__load(country, year)
+        if calendar is None:
+            result = self.fetch(country, year)
+            if "error" in result:
+                self.__count("failures")
+                with self.__lock:
+                    self.__failures[key] = (time.time(), result["error"])
+                return None, result["error"]
+            self.__count("downloads")
+            calendar = HolidayCalendar(country, year, result["holidays"], result.get("source", ""))
+            self.__persist(calendar)
+
+        with self.__lock:
+            self.__failures.pop(key, None)
+            return self.__calendars.setdefault(key, calendar), None
+
+    def __load(self, country: str, year: int) -> Optional[HolidayCalendar]:
+        holidays = bundled_holidays(country, year)
+        if holidays is not None:
+            self.__count("bundled")
+            return HolidayCalendar(country, year, holidays, BUNDLED_SOURCE)
+        try:
+            with open(self.__path(country, year), "r", encoding="utf-8") as file:
+                saved = json.load(file)
+            self.__count("disk")
+            return HolidayCalendar(country, year, saved["holidays"], saved.get("source", ""))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def __persist(self, calendar: HolidayCalendar):
+        """ Atomic write of a downloaded year """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self.__path(calendar.country, calendar.year)
+            temp = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp, "w", encoding="utf-8") as file:
+                json.dump({"holidays": calendar.holidays, "source": calendar.source, "stored_at": time.time()}, file, ensure_ascii=False)
+            os.replace(temp, path)
+        except OSError:
+            pass
+
+    def between(self, country: str, start: date, end: date) -> Dict[str, Any]:
+        """
+        Holidays of a country from `start` to `end` (inclusive), spanning as many years as needed.
+
+        Returns:
+            Dict with `holidays` and `source`, or `error` if none of the years is available
+        """
+        holidays, sources, errors = [], [], []
+        for year in range(start.year, end.year + 1):
+            calendar, error = self.calendar(country, year)
+            if calendar is None:
+                errors.append(error)
+                continue
+            holidays.extend(calendar.between(start.isoformat(), end.isoformat()))
+            if calendar.source not in sources:
+                sources.append(calendar.source)
+        if errors and not sources:
+            return {"error": errors[0]}
+        return {"holidays": holidays, "source": ", ".join(sources)}
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {**self.__stats, "calendars": len(self.__calendars)}
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    store = HolidayStore(lambda country, year: {"error": f"No network in this example ({country} {year})"})
+    print(store.between("KR", date(2026, 9, 20), date(2027, 2, 10))["holidays"][:3])
+    print(store.between("KR", date(2025, 10, 1), date(2025, 10, 10)))
+    print(store.between("US", date(2026, 1, 1), date(2026, 12, 31)))
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        store.between("KR", date(2026, 10, 19), date(2027, 10, 19))
+    print(f"Upcoming holidays over a year boundary: {(time.perf_counter() - started) * 100:.2f} µs per query")
+    print("Holiday store stats:", store.stats())
@@ -0,0 +1,578 @@
+"""
+Shared HTTP client for every tool (async core with a sync facade).
+"""
+from typing import Any, Dict, Iterator, Optional, Tuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+import ipaddress
+import threading
+import asyncio
+import socket
+import time
+import ssl
+
+import httpx
+import httpcore
+
+try:
+    from .executor import remaining_time
+except ImportError:
+    from executor import remaining_time
+
+
+# Every tool catches this to handle network failures (timeouts, connection and HTTP status errors)
+HTTPError = httpx.HTTPError
+Response = httpx.Response
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """ Raised without sending the request while the circuit of a host is open """
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+
+class DNSCachingBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that caches name resolution results.
+
+    Only the TCP connect uses the cached address: TLS is still negotiated (SNI and
+    certificate check) against the original host name by the connection pool.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, ttl: float = 300.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.__addresses: Dict[Tuple[str, int], Tuple[str, float]] = {}
+
+    async def resolve(self, host: str, port: int) -> str:
+        try:
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+
+        cached = self.__addresses.get((host, port))
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e  # surfaces as httpx.ConnectError
+        address = infos[0][4][0]
+        self.__addresses[(host, port)] = (address, time.monotonic() + self.ttl)
+        return address
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        address = await self.resolve(host, port)
+        try:
+            return await self.backend.connect_tcp(
+                address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+            )
+        except Exception:
+            self.__addresses.pop((host, port), None)  # The address may have changed
+            raise
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self.backend.sleep(seconds)
+
+
+@dataclass
+class Circuit:
+    """ Failure state of one host """
+    host: str
+    failures: int = 0  # consecutive failures
+    opened_at: Optional[float] = None
+    probes: int = 0  # failed recovery probes since the circuit opened
+    last_error: str = ""
+    rejected: int = 0
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive failures (network errors and 5xx responses) the
+    circuit of the host opens and requests fail immediately with `CircuitOpenError` instead of
+    waiting for their timeouts. The client then probes the host in the background after
+    `reset_timeout` seconds (doubling up to `max_reset_timeout` while it keeps failing) and
+    closes the circuit on the first successful probe.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 15.0, max_reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.__lock = threading.Lock()
+        self.__circuits: Dict[str, Circuit] = {}
+
+    def check(self, host: str):
+        """ Raise `CircuitOpenError` if requests to the host must not be sent """
+        with self.__lock:
+            circuit = self.__circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return
+            circuit.rejected += 1
+            error = circuit.last_error
+        raise CircuitOpenError(f"Circuit open for {host} (last error: {error})")
+
+    def is_open(self, host: str) -> bool:
+        with self.__lock:
+            circuit = self.__circuits.get(host)
+            return circuit is not None and circuit.opened_at is not None
+
+    def success(self, host: str):
+        with self.__lock:
+            circuit = self.__circuits.get(host)
+            if circuit is not None:
+                circuit.failures, circuit.opened_at, circuit.probes = 0, None, 0
+
+    def failure(self, host: str, error: str) -> bool:
+        """ Record a failure and return True if it opened the circuit """
+        with self.__lock:
+            circuit = self.__circuits.setdefault(host, Circuit(host))
+            circuit.failures += 1
+            circuit.last_error = error
+            if circuit.opened_at is None and circuit.failures >= self.failure_threshold:
+                circuit.opened_at = time.monotonic()
+                return True
+            return False
+
+    def probe_delay(self, host: str, failed: bool = False) -> float:
+        """ Seconds until the next recovery probe (backs off after a failed probe) """
+        with self.__lock:
+            circuit = self.__circuits.setdefault(host, Circuit(host))
+            if failed:
+                circuit.probes += 1
+            return min(self.max_reset_timeout, self.reset_timeout * 2 ** circuit.probes)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self.__lock:
+            return {
+                host: {
+                    "state": "open" if circuit.opened_at is not None else "closed",
+                    "failures": circuit.failures,
+                    "rejected": circuit.rejected,
+                    "last_error": circuit.last_error
+                }
+                for host, circuit in self.__circuits.items() if circuit.failures or circuit.rejected
+            }
+
+
+class StreamedResponse:
+    """
+    Response whose body is read chunk by chunk from the calling thread.
+
+    Every chunk is pulled from the client's event loop on demand, so at most one chunk is
+    buffered and an abandoned download stops as soon as the response is closed.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, response: httpx.Response, close):
+        self.__loop = loop
+        self.__response = response
+        self.__close = close
+        self.__chunks = None
+        self.truncated = False  # the body was cut at `max_bytes`
+
+    @property
+    def status_code(self) -> int:
+        return self.__response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.__response.headers
+
+    @property
+    def url(self) -> httpx.URL:
+        return self.__response.url
+
+    def raise_for_status(self):
+        self.__response.raise_for_status()
+
+    def __run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop).result()
+
+    def iter_bytes(self, max_bytes: Optional[int] = None) -> Iterator[bytes]:
+        """ Yield the decoded (decompressed) body, stopping once `max_bytes` have been read """
+        async def next_chunk():
+            if self.__chunks is None:
+                self.__chunks = self.__response.aiter_bytes()
+            return await self.__chunks.__anext__()
+
+        received = 0
+        while True:
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                raise httpx.TimeoutException("The tool call deadline has passed.")
+            try:
+                chunk = self.__run(next_chunk())
+            except StopAsyncIteration:
+                return
+            if max_bytes is not None and received + len(chunk) > max_bytes:
+                self.truncated = True
+                chunk = chunk[:max_bytes - received]
+            if chunk:
+                received += len(chunk)
+                yield chunk
+            if self.truncated:
+                return
+
+    def read(self, max_bytes: Optional[int] = None) -> bytes:
+        """ Read the body (at most `max_bytes` of it) and close the response """
+        try:
+            return b"".join(self.iter_bytes(max_bytes))
+        finally:
+            self.close()
+
+    def close(self):
+        if self.__close is not None:
+            close, self.__close = self.__close, None
+            self.__run(close())
+
+    def __enter__(self) -> 'StreamedResponse':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class HTTPClient:
+    """
+    Process-wide HTTP client used by every tool in `api/utils` and `api/functions`.
+
+    One `httpx.AsyncClient` runs on a dedicated event loop thread and keeps a keep-alive
+    connection pool, so repeated requests to the same host reuse TCP and TLS connections.
+    A single SSL context is shared by all connections, name resolution is cached, and the
+    number of concurrent connections per host is limited. A per-host `CircuitBreaker` makes
+    requests to an unreachable host fail fast until a background probe sees it recover.
+
+    Coroutines (`arequest`, `aget`, `apost`) can be awaited from any event loop; the blocking
+    facade (`request`, `get`, `post`) is meant for tool implementations running in worker threads.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 64,
+        max_connections_per_host: int = 6,
+        keepalive_expiry: float = 30.0,
+        dns_ttl: float = 300.0,
+        timeout: float = 15.0,
+        headers: Optional[Dict[str, str]] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self.breaker = breaker or CircuitBreaker()
+
+        self.__lock = threading.Lock()
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__client: Optional[httpx.AsyncClient] = None
+        self.__host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.__probes: Dict[str, asyncio.Task] = {}
+        self.__requests = 0
+        self.__errors = 0
+
+    def __start(self) -> asyncio.AbstractEventLoop:
+        """ Start the event loop thread and the client on first use """
+        with self.__lock:
+            if self.__loop is None or self.__loop.is_closed():
+                ready = threading.Event()
+
+                def run():
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    self.__loop = loop
+                    self.__client = self.__create_client()
+                    ready.set()
+                    loop.run_forever()
+
+                self.__thread = threading.Thread(target=run, name="http-client", daemon=True)
+                self.__thread.start()
+                ready.wait()
+            return self.__loop
+
+    def __create_client(self) -> httpx.AsyncClient:
+        transport = httpx.AsyncHTTPTransport(
+            verify=ssl.create_default_context(),  # loaded once, shared by every connection
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            retries=0
+        )
+        pool = getattr(transport, "_pool", None)
+        if isinstance(pool, httpcore.AsyncConnectionPool) and hasattr(pool, "_network_backend"):
+            pool._network_backend = DNSCachingBackend(pool._network_backend, self.dns_ttl)
+        return httpx.AsyncClient(
+            transport=transport,
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True
+        )
+
+    def __failed(self, host: str, url: str, error: str):
+        """ Count a failure towards the circuit of the host and start probing once it opens """
+        self.__errors += 1
+        if self.breaker.failure(host, error) and host not in self.__probes:
+            task = asyncio.get_running_loop().create_task(self.__probe(host, url))
+            self.__probes[host] = task
+            task.add_done_callback(lambda done: self.__probes.pop(host, None))
+
+    def __settle(self, host: str, url: str, response: httpx.Response):
+        if response.status_code >= 500:
+            self.__failed(host, url, f"{response.status_code} {response.reason_phrase}")
+        else:
+            self.breaker.success(host)
+
+    async def __probe(self, host: str, url: str):
+        """ Retry an open host in the background until it answers again """
+        delay = self.breaker.probe_delay(host)
+        while self.breaker.is_open(host):
+            await asyncio.sleep(delay)
+            try:
+                response = await self.__client.request("GET", url, timeout=self.timeout)
+                recovered = response.status_code < 500
+            except HTTPError:
+                recovered = False
+            if recovered:
+                self.breaker.success(host)
+                return
+            delay = self.breaker.probe_delay(host, failed=True)
+
+    async def __request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = httpx.URL(url).host
+        self.breaker.check(host)
+        limit = self.__host_limits.get(host)
+        if limit is None:
+            limit = self.__host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        async with limit:
+            self.__requests += 1
+            try:
+                response = await self.__client.request(method, url, **kwargs)
+            except HTTPError as e:
+                self.__failed(host, url, f"{type(e).__name__}: {e}")
+                raise
+        self.__settle(host, url, response)
+        return response
+
+    async def __open_stream(self, method: str, url: str, **kwargs):
+        host = httpx.URL(url).host
+        self.breaker.check(host)
+        limit = self.__host_limits.get(host)
+        if limit is None:
+            limit = self.__host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        await limit.acquire()  # held until the stream is closed
+        self.__requests += 1
+        context = self.__client.stream(method, url, **kwargs)
+        try:
+            response = await context.__aenter__()
+        except BaseException as e:
+            limit.release()
+            if isinstance(e, HTTPError):
+                self.__failed(host, url, f"{type(e).__name__}: {e}")
+            raise
+        self.__settle(host, url, response)
+
+        async def close():
+            try:
+                await context.__aexit__(None, None, None)
+            finally:
+                limit.release()
+
+        return response, close
+
+    async def arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request and read the whole response body.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: `httpx.AsyncClient.request` arguments (params, data, json, headers, timeout, ...)
+
+        Returns:
+            httpx.Response
+
+        Raises:
+            HTTPError: On network errors and timeouts
+        """
+        loop = self.__start()
+        if asyncio.get_running_loop() is loop:
+            return await self.__request(method, url, **kwargs)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.__request(method, url, **kwargs), loop))
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("POST", url, **kwargs)
+
+    def submit(self, method: str, url: str, **kwargs) -> Future:
+        """ Start a request from any thread and return a concurrent future """
+        loop = self.__start()
+        return asyncio.run_coroutine_threadsafe(self.__request(method, url, **kwargs), loop)
+
+    def __bound(self, kwargs: dict) -> Optional[float]:
+        """ Cap the timeout of a request sent from a tool call at the call's remaining deadline """
+        remaining = remaining_time()
+        if remaining is None:
+            return None
+        if remaining <= 0:
+            raise httpx.TimeoutException("The tool call deadline has passed.")
+        timeout = kwargs.get("timeout", self.timeout)
+        if isinstance(timeout, httpx.Timeout):
+            timeout = timeout.read
+        kwargs["timeout"] = remaining if timeout is None else min(timeout, remaining)
+        return remaining
+
+    def __wait(self, future: Future, remaining: Optional[float]):
+        """ Wait for a request future; at the tool call deadline the request is cancelled on the loop """
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            # Cancelling the task aborts the request and frees its connection
+            if future.cancel() or not future.done():
+                raise httpx.TimeoutException("The tool call deadline has passed.")
+            return future.result()  # finished just in time
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Blocking facade of `arequest` (must not be called from the client's event loop).
+
+        Inside a tool call the request is bounded by the call's deadline (see `ToolExecutor`).
+        """
+        remaining = self.__bound(kwargs)
+        future = self.submit(method, url, **kwargs)
+        if threading.current_thread() is self.__thread:
+            future.cancel()
+            raise RuntimeError("The blocking HTTP facade cannot be used inside the HTTP client loop.")
+        return self.__wait(future, remaining)
+
+    def stream(self, method: str, url: str, **kwargs) -> StreamedResponse:
+        """
+        Send a request and return as soon as the headers arrive (blocking facade).
+
+        The body is then read with `iter_bytes` / `read`, optionally capped at a byte budget.
+        Use it as a context manager (or call `close`) to release the connection.
+        """
+        loop = self.__start()
+        if threading.current_thread() is self.__thread:
+            raise RuntimeError("The blocking HTTP facade cannot be used inside the HTTP client loop.")
+        remaining = self.__bound(kwargs)
+        future = asyncio.run_coroutine_threadsafe(self.__open_stream(method, url, **kwargs), loop)
+        response, close = self.__wait(future, remaining)
+        return StreamedResponse(loop, response, close)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = getattr(getattr(self.__client, "_transport", None), "_pool", None)
+        return {
+            "requests": self.__requests,
+            "errors": self.__errors,
+            "connections": len(getattr(pool, "connections", [])),
+            "hosts": len(self.__host_limits),
+            "circuits": self.breaker.stats()
+        }
+
+    def close(self):
+        """ Close pooled connections and stop the event loop thread """
+        with self.__lock:
+            loop, client = self.__loop, self.__client
+            self.__loop = self.__client = None
+        if loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+
+# Global HTTP client instance
+http_client = HTTPClient()
+
+
+# Example usage and test cases (against a local stub server)
+if __name__ == '__main__':
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from concurrent.futures import ThreadPoolExecutor
+
+    peers = set()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            peers.add(self.client_address)
+            time.sleep(0.05)
+            body = f"hello {self.path}".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    client = HTTPClient(max_connections_per_host=4)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(16) as pool:
+        bodies = list(pool.map(lambda i: client.get(f"{base}/{i}").text, range(64)))
+    elapsed = time.perf_counter() - started
+
+    print(f"64 requests in {elapsed:.2f}s over {len(peers)} connections (limit 4 per host)")
+    print("First response:", bodies[0])
+
+    async def fetch_async():
+        responses = await asyncio.gather(*(client.aget(f"{base}/async/{i}") for i in range(8)))
+        return [response.status_code for response in responses]
+
+    print("Async status codes:", asyncio.run(fetch_async()))
+
+    with client.stream("GET", f"{base}/stream") as response:
+        print("Streamed (capped at 8 bytes):", response.read(max_bytes=8), "truncated:", response.truncated)
+
+    # Circuit breaker: a host that keeps failing is rejected immediately, then probed back
+    down = {"on": True}
+
+    class FlakyHandler(StubHandler):
+        def do_GET(self):
+            if down["on"]:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            super().do_GET()
+
+    flaky = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=flaky.serve_forever, daemon=True).start()
+    flaky_url = f"http://localhost:{flaky.server_address[1]}/status"
+    client.breaker.reset_timeout = 0.2
+    for i in range(5):
+        try:
+            print("Flaky host:", client.get(flaky_url).status_code)
+        except CircuitOpenError as e:
+            print("Flaky host:", e)
+    down["on"] = False
+    time.sleep(0.5)
+    print("After recovery:", client.get(flaky_url).status_code)
+    print("Client stats:", client.stats())
+    client.close()
+    server.shutdown()
+    flaky.shutdown()
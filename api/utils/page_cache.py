@@ -0,0 +1,282 @@
+"""
+On-disk HTTP cache for scraped pages with conditional revalidation (ETag / Last-Modified).
+"""
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional
+from email.utils import parsedate_to_datetime
+from hashlib import sha256
+import threading
+import json
+import time
+import os
+import re
+
+try:
+    from .http_client import http_client, HTTPClient
+except ImportError:
+    from http_client import http_client, HTTPClient
+
+
+CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "pages"))
+MAX_BODY_BYTES = 2 * 1024 * 1024  # default download budget of a page
+
+
+@dataclass
+class CachedPage:
+    """ Metadata of a cached response (the body is stored next to it) """
+    url: str
+    final_url: str
+    status_code: int
+    digest: str
+    content_length: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fresh_until: float = 0.0  # from Cache-Control max-age / Expires (wall clock)
+    checked_at: float = 0.0
+    truncated: bool = False  # the body was cut at the byte budget of the request
+
+
+def freshness_lifetime(headers) -> float:
+    """ Seconds a response may be reused without revalidation """
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0.0
+    match = re.search(r"max-age\s*=\s*(\d+)", cache_control)
+    if match:
+        return float(match.group(1))
+    if "expires" in headers and "date" in headers:
+        try:
+            return max(0.0, (parsedate_to_datetime(headers["expires"]) - parsedate_to_datetime(headers["date"])).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    return 0.0
+
+
+class PageCache:
+    """
+    Stores response bodies and validators on disk and revalidates them with conditional requests.
+
+    For every URL three files are kept under `cache_dir`:
+        <key>.json          - `CachedPage` metadata (validators, body digest)
+        <key>.body          - raw response body
+        <key>.<name>.json   - results of `extract(...)` tied to the body digest
+
+    An unchanged page costs one `304 Not Modified` (or nothing while `max-age` holds) and
+    its extracted text is read back instead of re-parsing the HTML. Servers that send no
+    validators still skip parsing when the downloaded body has the same digest as before.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, client: HTTPClient = http_client, max_pages: int = 512):
+        self.cache_dir = cache_dir
+        self.client = client
+        self.max_pages = max_pages
+
+        self.__lock = threading.Lock()
+        self.__url_locks: Dict[str, threading.Lock] = {}
+        self.__stats = {"requests": 0, "not_modified": 0, "unchanged": 0, "downloads": 0, "fresh": 0, "extract_hits": 0, "extract_misses": 0}
+
+    @staticmethod
+    def key(url: str) -> str:
+        return sha256(url.encode("utf-8")).hexdigest()[:32]
+
+    def __path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def __url_lock(self, key: str) -> threading.Lock:
+        with self.__lock:
+            return self.__url_locks.setdefault(key, threading.Lock())
+
+    def __count(self, name: str):
+        with self.__lock:
+            self.__stats[name] += 1
+
+    def __write(self, path: str, data: bytes):
+        """ Atomic write (readers never see a partial file) """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as file:
+            file.write(data)
+        os.replace(temp, path)
+
+    def __load(self, key: str) -> Optional[CachedPage]:
+        try:
+            with open(self.__path(key, ".json"), "r", encoding="utf-8") as file:
+                page = CachedPage(**json.load(file))
+            if os.path.exists(self.__path(key, ".body")):
+                return page
+        except (OSError, ValueError, TypeError):
+            pass
+        return None
+
+    def __save(self, key: str, page: CachedPage):
+        self.__write(self.__path(key, ".json"), json.dumps(asdict(page), ensure_ascii=False).encode("utf-8"))
+
+    def fetch(self, url: str, timeout: float = 15.0, headers: Optional[Dict[str, str]] = None, max_bytes: Optional[int] = MAX_BODY_BYTES) -> CachedPage:
+        """
+        Fetch a page, revalidating the cached copy if there is one.
+
+        The body is streamed and the download stops after `max_bytes` (the page is then marked
+        `truncated`, None disables the budget); a truncated copy is downloaded again when a
+        larger budget is requested.
+
+        Returns:
+            CachedPage of the current body (read it with `body(page)`)
+
+        Raises:
+            HTTPError: On network errors and non-2xx responses
+        """
+        key = self.key(url)
+        with self.__url_lock(key):
+            cached = self.__load(key)
+        if cached is not None and cached.truncated and (max_bytes is None or max_bytes > cached.content_length):
+            cached = None  # Too short for this request
+        now = time.time()
+        if cached is not None and now < cached.fresh_until:
+            self.__count("fresh")
+            return cached
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+
+        # The request itself runs outside of the URL lock, so a hedged duplicate is a real second request
+        self.__count("requests")
+        with self.client.stream("GET", url, headers=request_headers, timeout=timeout) as response:
+            lifetime = freshness_lifetime(response.headers)
+            if not (response.status_code == 304 and cached is not None):
+                response.raise_for_status()
+                body = response.read(max_bytes)
+
+        with self.__url_lock(key):
+            if response.status_code == 304 and cached is not None:
+                self.__count("not_modified")
+                cached.etag = response.headers.get("etag", cached.etag)
+                cached.last_modified = response.headers.get("last-modified", cached.last_modified)
+                cached.fresh_until = now + lifetime
+                cached.checked_at = now
+                self.__save(key, cached)
+                return cached
+
+            digest = sha256(body).hexdigest()
+            page = CachedPage(
+                url=url,
+                final_url=str(response.url),
+                status_code=response.status_code,
+                digest=digest,
+                content_length=len(body),
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+                fresh_until=now + lifetime,
+                checked_at=now,
+                truncated=response.truncated
+            )
+            if cached is not None and cached.digest == digest:
+                self.__count("unchanged")  # No validators, but the same content: keep the extracted text
+            else:
+                self.__count("downloads")
+                self.__write(self.__path(key, ".body"), body)
+            self.__save(key, page)
+
+        self.__prune()
+        return page
+
+    def cached(self, url: str) -> Optional[CachedPage]:
+        """ Last good copy of a page regardless of its freshness (served while the site is unreachable) """
+        key = self.key(url)
+        with self.__url_lock(key):
+            return self.__load(key)
+
+    def body(self, page: CachedPage) -> bytes:
+        with open(self.__path(self.key(page.url), ".body"), "rb") as file:
+            return file.read()
+
+    def extract(self, page: CachedPage, name: str, func: Callable[[bytes], Any]) -> Any:
+        """
+        Return `func(body)` for a cached page, computing it only when the body has changed.
+
+        Args:
+            page: Page returned by `fetch`
+            name: Name of the extraction (part of the file name)
+            func: Pure function of the response body returning JSON serializable data
+        """
+        path = self.__path(self.key(page.url), f".{name}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                stored = json.load(file)
+            if stored.get("digest") == page.digest:
+                self.__count("extract_hits")
+                return stored["value"]
+        except (OSError, ValueError):
+            pass
+
+        self.__count("extract_misses")
+        value = func(self.body(page))
+        self.__write(path, json.dumps({"digest": page.digest, "value": value}, ensure_ascii=False).encode("utf-8"))
+        return value
+
+    def __prune(self):
+        """ Drop the least recently checked pages beyond `max_pages` """
+        try:
+            metas = [name for name in os.listdir(self.cache_dir) if name.endswith(".json") and name.count(".") == 1]
+        except OSError:
+            return
+        if len(metas) <= self.max_pages:
+            return
+        metas.sort(key=lambda name: os.path.getmtime(os.path.join(self.cache_dir, name)))
+        for name in metas[:len(metas) - self.max_pages]:
+            key = name.split(".")[0]
+            for file in os.listdir(self.cache_dir):
+                if file.startswith(key + "."):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, file))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return dict(self.__stats)
+
+
+# Global page cache instance
+page_cache = PageCache()
+
+
+# Example usage and test cases (against a local stub server)
+if __name__ == '__main__':
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    import tempfile
+
+    PAGE = "<html><head><title>Stub</title></head><body><p>Hello</p></body></html>".encode()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    cache = PageCache(tempfile.mkdtemp())
+    url = f"http://127.0.0.1:{server.server_address[1]}/131"
+    for _ in range(3):
+        page = cache.fetch(url)
+        print(page.status_code, cache.extract(page, "length", len))
+    print("Page cache stats:", cache.stats())
+    server.shutdown()
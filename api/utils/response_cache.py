@@ -0,0 +1,211 @@
+"""
+Exact-match cache of deterministic model outputs.
+
+A generation round is keyed by the model hash, the full prompt, the generation parameters (seed
+included) and the data versions of the tool results in the prompt. Only deterministic rounds (fixed
+seed or greedy decoding) are cached, so replaying the recorded token stream gives the same output
+the model would produce again — benchmark runs, demos and kiosk presets become instant.
+
+The key carries only the date of the clock in the system prompt, so rounds whose output quotes
+a time of day are not stored.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Generator, List, Optional
+from json import dumps, loads
+import threading
+import hashlib
+import time
+import re
+import os
+
+try:
+    from .cache import ToolCache, tool_cache
+    from .answer_cache import tool_calls
+except ImportError:
+    from cache import ToolCache, tool_cache
+    from answer_cache import tool_calls
+
+
+# Times of day in an output ("15:30", "3시", "오후", "PM"): such rounds depend on the prompt clock
+_CLOCK = re.compile(r"\d{1,2}:\d{2}|\d{1,2}\s?시(?!간)|오전|오후|정오|자정|\b[AaPp]\.?[Mm]\b")
+
+
+def is_deterministic(temperature: float, seed: Optional[int]) -> bool:
+    """ Greedy decoding or a fixed sampling seed """
+    return temperature <= 0 or seed is not None
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    skipped: int = 0
+    replayed_tokens: int = 0
+    saved_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "skipped": self.skipped,
+            "replayed_tokens": self.replayed_tokens,
+            "saved_seconds": round(self.saved_seconds, 1),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class ResponseCache:
+    """
+    Token streams of deterministic generation rounds by exact key.
+
+    - `make_key` hashes every input of a round; the tool-data versions make a prompt that quotes
+      a tool result miss once the tool cache has refreshed that result.
+    - `stream` replays a recorded round or records the tokens of a new one. A round is stored
+      only when its stream ran to the end, so aborted generations are never replayed, and
+      only when it does not quote a time of day.
+    - With a `path` the recorded rounds are appended to a JSON lines file and loaded again on
+      start, so repeated benchmark runs are instant across restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None, cache: ToolCache = tool_cache, enabled: bool = True):
+        self.max_entries = max_entries
+        self.path = path
+        self.cache = cache
+        self.enabled = enabled
+
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[str, tuple] = OrderedDict()  # key -> (tokens, elapsed)
+        self.__stats = ResponseCacheStats()
+        self.__load()
+
+    def __load(self):
+        if not self.path or not os.path.isfile(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                    self.__entries[record["key"]] = (record["tokens"], record.get("elapsed", 0.0))
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn last line of an interrupted run
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+
+    def tool_versions(self, messages: Iterable[dict], implementations: dict) -> List[list]:
+        """ Data version of every tool call quoted in the prompt (None when not tracked by the tool cache) """
+        versions = []
+        for name, arguments in tool_calls(messages):
+            key = self.cache.make_key(name, implementations[name], arguments) if name in implementations else None
+            versions.append([name, key and self.cache.data_version(key)])
+        return versions
+
+    @staticmethod
+    def canonical(messages: List[dict]) -> List[dict]:
+        """ Prompt messages with the random tool call ids replaced by their order of appearance """
+        ids: Dict[str, str] = {}
+        rename = lambda call_id: ids.setdefault(call_id, f"call_{len(ids)}")
+        canonical = []
+        for message in messages:
+            message = dict(message)
+            if message.get("tool_calls"):
+                message["tool_calls"] = [{**call, "id": rename(call.get("id"))} for call in message["tool_calls"]]
+            if "tool_call_id" in message:
+                message["tool_call_id"] = rename(message["tool_call_id"])
+            canonical.append(message)
+        return canonical
+
+    @classmethod
+    def make_key(cls, model_hash: str, messages: List[dict], generation: Dict[str, Any], tool_versions: List[list]) -> str:
+        """ Hash of the model, the full prompt, the generation parameters and the tool-data versions """
+        payload = dumps([model_hash, cls.canonical(messages), generation, tool_versions], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """ Recorded tokens of a round, or None """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__stats.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__stats.hits += 1
+            self.__stats.replayed_tokens += len(entry[0])
+            self.__stats.saved_seconds += entry[1]
+            return list(entry[0])
+
+    def put(self, key: str, tokens: List[str], elapsed: float = 0.0):
+        """ Record the tokens of a finished round """
+        with self.__lock:
+            self.__entries[key] = (list(tokens), elapsed)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+            self.__stats.stores += 1
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(dumps(dict(key=key, tokens=tokens, elapsed=round(elapsed, 3)), ensure_ascii=False) + "\n")
+
+    def stream(self, key: str, generate: Callable[[], Iterable[str]]) -> Generator[str, None, None]:
+        """ Replay the round of `key`, or run `generate` and record its tokens """
+        tokens = self.get(key) if self.enabled else None
+        if tokens is not None:
+            yield from tokens
+            return
+
+        started, tokens = time.monotonic(), []
+        for token in generate():
+            tokens.append(token)
+            yield token
+        if not self.enabled:
+            return
+        if _CLOCK.search("".join(tokens)):
+            with self.__lock:
+                self.__stats.skipped += 1
+            return
+        self.put(key, tokens, time.monotonic() - started)
+
+    def invalidate(self):
+        """ Drop every recorded round (and the persisted file) """
+        with self.__lock:
+            self.__entries.clear()
+            if self.path and os.path.isfile(self.path):
+                os.remove(self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """ Hit-rate counters and entry count """
+        with self.__lock:
+            return {"enabled": self.enabled, "entries": len(self.__entries), **self.__stats.as_dict()}
+
+
+# Global response cache instance
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "1024")),
+    path=os.getenv("RESPONSE_CACHE_FILE") or None,
+    enabled=os.getenv("RESPONSE_CACHE", "on").lower() not in ("0", "off", "false")
+)
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    def generate():
+        for token in ["천안시 ", "도시재생지원센터", "입니다."]:
+            time.sleep(0.2)  # stands in for the model
+            yield token
+
+    cache = ResponseCache()
+    messages = [{"role": "system", "content": "system prompt"}, {"role": "user", "content": "센터 이름이 뭐야?"}]
+    key = cache.make_key("model-hash", messages, dict(temperature=0.0, seed=None, max_new_tokens=256), cache.tool_versions(messages, {}))
+
+    for run in range(3):
+        started = time.perf_counter()
+        output = "".join(cache.stream(key, generate))
+        print(f"Run {run + 1}: {output} ({(time.perf_counter() - started) * 1000:.2f} ms)")
+
+    other = cache.make_key("model-hash", messages, dict(temperature=0.0, seed=42, max_new_tokens=256), [])
+    print("Different seed hits:", cache.get(other) is not None)
+    print(cache.stats())
@@ -0,0 +1,174 @@
+"""
+Hybrid retrieval: BM25 and dense rankings fused by reciprocal rank, with optional reranking.
+"""
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+import threading
+import os
+import re
+
+try:
+    from .bm25 import BM25Index, tokenize
+    from .chunking import Chunk
+    from .vector_index import VectorIndex
+except ImportError:
+    from bm25 import BM25Index, tokenize
+    from chunking import Chunk
+    from vector_index import VectorIndex
+
+
+MODES = ("hybrid", "bm25", "dense")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60, weights: Optional[Sequence[float]] = None) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse rankings by summing `weight / (k + rank)` over the rankings an id appears in.
+
+    Only ranks are used, so BM25 scores and cosine similarities need no calibration.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class Reranker:
+    """ Reorders the fused candidates of a query """
+    name: str = "none"
+
+    def rerank(self, query: str, candidates: List[Tuple[Chunk, float]]) -> List[Tuple[Chunk, float]]:
+        return candidates
+
+
+_LITERAL = re.compile(r"\d[\d-]{2,}|[가-힣]{2,}(?:지구|센터|사업)")
+
+
+class TermOverlapReranker(Reranker):
+    """
+    Cheap lexical reranker: share of the query terms found in the chunk, plus a bonus for
+    literals of the query (phone numbers, "남산지구"-like project names) found verbatim.
+    The fused score breaks ties, so chunks keep their order when no term decides.
+    """
+    name = "terms"
+
+    def rerank(self, query: str, candidates: List[Tuple[Chunk, float]]) -> List[Tuple[Chunk, float]]:
+        terms = set(tokenize(query))
+        literals = _LITERAL.findall(query)
+        if not terms:
+            return candidates
+        top = max((score for _, score in candidates), default=1.0) or 1.0
+
+        def score(item: Tuple[Chunk, float]) -> float:
+            chunk, fused = item
+            text = f"{chunk.title} {chunk.text}"
+            overlap = len(terms.intersection(tokenize(text))) / len(terms)
+            bonus = sum(literal in text for literal in literals) / len(literals) if literals else 0.0
+            return overlap + bonus + 0.5 * fused / top
+
+        return sorted(((chunk, score((chunk, fused))) for chunk, fused in candidates), key=lambda item: item[1], reverse=True)
+
+
+class CrossEncoderReranker(Reranker):
+    """ sentence-transformers cross-encoder on the CPU (RERANK_MODEL) """
+
+    def __init__(self, model_name: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"):
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.name = model_name
+
+    def rerank(self, query: str, candidates: List[Tuple[Chunk, float]]) -> List[Tuple[Chunk, float]]:
+        if not candidates:
+            return candidates
+        scores = self.model.predict([(query, f"{chunk.title}\n{chunk.text}") for chunk, _ in candidates])
+        return sorted(((chunk, float(score)) for (chunk, _), score in zip(candidates, scores)), key=lambda item: item[1], reverse=True)
+
+
+def get_reranker(name: Optional[str] = None) -> Reranker:
+    """ Reranker selected by `name` or RERANKER: "terms" (default), "cross-encoder" or "none" """
+    name = name or os.getenv("RERANKER", "terms")
+    if name == "cross-encoder":
+        try:
+            model = os.getenv("RERANK_MODEL")
+            return CrossEncoderReranker(model) if model else CrossEncoderReranker()
+        except ImportError:
+            name = "terms"
+    return TermOverlapReranker() if name == "terms" else Reranker()
+
+
+class HybridRetriever:
+    """
+    Retrieval over the chunks of a `VectorIndex` with both a BM25 index and the dense vectors.
+
+    BM25 (Korean-aware tokenizer: particles stripped, Hangul bigrams) finds exact terms such as
+    project names and phone numbers; the dense index finds paraphrases. The top `candidates` of
+    each are fused with reciprocal rank fusion and the head of the fused list is reranked.
+    The BM25 index follows the updates of the vector index chunk by chunk.
+    """
+
+    def __init__(self, index: VectorIndex, embed: Callable[[str], np.ndarray], candidates: int = 50, rrf_k: int = 60, reranker: Optional[Reranker] = None):
+        self.index = index
+        self.embed = embed
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.reranker = reranker or get_reranker()
+
+        self.__lock = threading.Lock()
+        self.__bm25 = BM25Index()
+        self.__chunks: Dict[str, Chunk] = {}
+        self.__version: Optional[int] = None
+
+    def __sync(self):
+        """ Apply the changes of the vector index to the BM25 index (only changed chunks are re-tokenized) """
+        version = self.index.meta.get("version")
+        with self.__lock:
+            if version == self.__version:
+                return
+            chunks = {chunk.id: chunk for chunk in self.index.chunks()}
+            for doc_id in self.__chunks.keys() - chunks.keys():
+                self.__bm25.remove(doc_id)
+            for doc_id, chunk in chunks.items():
+                if self.__chunks.get(doc_id) != chunk:
+                    self.__bm25.add(doc_id, f"{chunk.title}\n{chunk.text}")
+            self.__chunks, self.__version = chunks, version
+
+    def search(self, query: str, k: int = 5, mode: str = "hybrid", rerank: bool = True) -> List[Tuple[Chunk, float]]:
+        """
+        Top `k` (chunk, score) pairs for a query.
+
+        Args:
+            query: Question or keywords
+            k: Number of chunks to return
+            mode: "hybrid", "bm25" or "dense"
+            rerank: Rerank the fused candidates (hybrid mode only)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}' (expected one of {', '.join(MODES)})")
+        self.__sync()
+        with self.__lock:
+            chunks = self.__chunks
+            lexical = self.__bm25.search(query, self.candidates) if mode != "dense" else []
+        if mode == "bm25":
+            return [(chunks[doc_id], score) for doc_id, score in lexical[:k]]
+        dense = self.index.search(self.embed(query), self.candidates)
+        if mode == "dense":
+            return dense[:k]
+
+        fused = reciprocal_rank_fusion([[doc_id for doc_id, _ in lexical], [chunk.id for chunk, _ in dense]], k=self.rrf_k)
+        candidates = [(chunks[doc_id], score) for doc_id, score in fused[:max(k * 4, 20)] if doc_id in chunks]
+        if rerank:
+            candidates = self.reranker.rerank(query, candidates)
+        return candidates[:k]
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    print(reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]]))
+
+    candidates = [
+        (Chunk("p#0", "https://www.cheonanurc.or.kr/68", "사업 현황", "봉명지구 도시재생 뉴딜사업은 2023년 완료되었습니다.", "page"), 0.03),
+        (Chunk("p#1", "https://www.cheonanurc.or.kr/68", "사업 현황", "남산지구 도시재생 사업은 중앙동 일원에서 추진 중입니다.", "page"), 0.02),
+    ]
+    for chunk, score in TermOverlapReranker().rerank("남산지구 사업", candidates):
+        print(f"{score:.3f} {chunk.text}")
@@ -0,0 +1,197 @@
+"""
+Races several search engines with hedged starts and caches the winning result sets.
+"""
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import time
+
+try:
+    from .cache import normalize_value
+    from .fanout import LatencyTracker
+    from .executor import propagate, remaining_time, is_cancelled
+except ImportError:
+    from cache import normalize_value
+    from fanout import LatencyTracker
+    from executor import propagate, remaining_time, is_cancelled
+
+
+# engine(query, max_results, engine) -> result dicts, or [{'error': ...}]
+Engine = Callable[[str, int, str], List[Dict[str, Any]]]
+
+
+def is_failed(results: Optional[List[Dict[str, Any]]]) -> bool:
+    return not results or "error" in results[0]
+
+
+@dataclass
+class EngineStats:
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    wins: int = 0
+
+    def success_rate(self) -> float:
+        """ Laplace smoothed, so an unused engine starts at 0.5 """
+        return (self.successes + 1) / (self.calls + 2)
+
+
+class SearchRace:
+    """
+    Runs a query on several engines and returns the first good result set.
+
+    - Engines are started in order of their record (success rate, then median latency).
+    - The next engine starts when the previous one fails or after `hedge_delay` seconds
+      without an answer, so a slow engine costs at most the hedge delay, not its timeout.
+    - Inside a tool call the race ends at the call's deadline, engines run bound to the call
+      (their HTTP requests stop when it is cancelled) and no engine is started after cancellation.
+    - Result sets are cached by normalised query, engine and max_results for `cache_ttl` seconds.
+    """
+
+    def __init__(self, engines: Dict[str, Engine], hedge_delay: float = 1.5, deadline: float = 30.0, cache_ttl: float = 600.0, max_entries: int = 256):
+        self.engines = engines
+        self.hedge_delay = hedge_delay
+        self.deadline = deadline
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self.latencies = LatencyTracker(min_samples=1)
+
+        self.__pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+        self.__lock = threading.Lock()
+        self.__cache: OrderedDict[Tuple, Tuple[float, str, List[Dict[str, Any]]]] = OrderedDict()
+        self.__engines = {name: EngineStats() for name in engines}
+        self.__stats = {"searches": 0, "cache_hits": 0, "hedges": 0, "all_failed": 0}
+
+    def order(self) -> List[str]:
+        """ Engine names, most reliable and fastest first """
+        with self.__lock:
+            rates = {name: stats.success_rate() for name, stats in self.__engines.items()}
+
+        def score(name: str):
+            median = self.latencies.percentile(name, 0.5)
+            return -round(rates[name], 1), median if median is not None else self.hedge_delay
+
+        return sorted(self.engines, key=score)
+
+    def __record(self, name: str, started: float, future: Future):
+        """ Engine outcome, also for losers that finish after the race was decided """
+        try:
+            failed = is_failed(future.result())
+        except Exception:
+            failed = True
+        with self.__lock:
+            stats = self.__engines[name]
+            stats.calls += 1
+            if failed:
+                stats.failures += 1
+            else:
+                stats.successes += 1
+        if not failed:
+            self.latencies.record(name, time.monotonic() - started)
+
+    def search(self, query: str, max_results: int = 10, engine: str = "google") -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Search with every engine until one answers with results.
+
+        Returns:
+            (name of the winning engine, results); the error of the first engine if all of them failed
+        """
+        key = (normalize_value(query), engine, max_results)
+        with self.__lock:
+            self.__stats["searches"] += 1
+            cached = self.__cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self.__cache.move_to_end(key)
+                self.__stats["cache_hits"] += 1
+                return cached[1], cached[2]
+
+        remaining = remaining_time()
+        deadline = self.deadline if remaining is None else min(self.deadline, remaining)
+        end = time.monotonic() + deadline
+        waiting = self.order()
+        running: Dict[Future, str] = {}
+        errors: Dict[str, List[Dict[str, Any]]] = {}
+
+        def start():
+            name = waiting.pop(0)
+            started = time.monotonic()
+            future = self.__pool.submit(propagate(self.engines[name]), query, max_results, engine)
+            future.add_done_callback(lambda done: self.__record(name, started, done))
+            running[future] = name
+
+        start()
+        while running or waiting:
+            now = time.monotonic()
+            if now >= end or is_cancelled():
+                break
+            if waiting and not running:
+                start()
+                continue
+            timeout = min(end, now + self.hedge_delay) - now if waiting else end - now
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                with self.__lock:
+                    self.__stats["hedges"] += 1
+                start()  # The running engines are slow: race the next one
+                continue
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [{'error': f"{name} failed: {str(e)}"}]
+                if not is_failed(results):
+                    with self.__lock:
+                        self.__engines[name].wins += 1
+                        self.__cache[key] = (time.monotonic(), name, results)
+                        self.__cache.move_to_end(key)
+                        while len(self.__cache) > self.max_entries:
+                            self.__cache.popitem(last=False)
+                    return name, results
+                errors[name] = results or [{'error': f"No results from {name}"}]
+
+        with self.__lock:
+            self.__stats["all_failed"] += 1
+        first = next((name for name in self.engines if name in errors), None)
+        if first is None:
+            return "", [{'error': f"No search engine answered within {deadline:g} seconds"}]
+        return first, errors[first]
+
+    def invalidate(self):
+        with self.__lock:
+            self.__cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.__lock:
+            engines = {name: dict(vars(stats)) for name, stats in self.__engines.items()}
+            result = {**self.__stats, "cached": len(self.__cache)}
+        for name, stats in engines.items():
+            median = self.latencies.percentile(name, 0.5)
+            stats["median_latency"] = round(median, 3) if median is not None else None
+        return {**result, "order": self.order(), "engines": engines}
+
+
+# Example usage and test cases
+if __name__ == '__main__':
+    def slow(query: str, max_results: int, engine: str):
+        time.sleep(3.0)
+        return [{'title': "slow", 'link': "https://slow.example", 'snippet': query}]
+
+    def fast(query: str, max_results: int, engine: str):
+        time.sleep(0.2)
+        return [{'title': "fast", 'link': "https://fast.example", 'snippet': query}]
+
+    def broken(query: str, max_results: int, engine: str):
+        return [{'error': "API key not found"}]
+
+    race = SearchRace({"broken": broken, "slow": slow, "fast": fast}, hedge_delay=0.5)
+    for query in ["Cheonan startup center", "  cheonan STARTUP center", "Cheonan startup center"]:
+        started = time.perf_counter()
+        winner, results = race.search(query)
+        print(f"{query!r}: {winner} in {time.perf_counter() - started:.2f}s -> {results[0]['title']}")
+    race.invalidate()
+    started = time.perf_counter()
+    print("After learning:", race.search("new query")[0], f"{time.perf_counter() - started:.2f}s")
+    print("Search race stats:", race.stats())
@@ -0,0 +1,99 @@
+"""
+Server-side store of tool results referenced by `<cached_result:{id}>` placeholders.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+from hashlib import sha256
+from json import dumps
+from uuid import uuid4
+import threading
+import re
+
+
+PLACEHOLDER = re.compile(r"^\s*<cached_result:(call_[\w-]+)>\s*$")
+
+
+def new_call_id() -> str:
+    """ Unique tool call id (the timestamp keeps ids readable, the random suffix keeps them unique) """
+    return datetime.now().strftime("call_%Y%m%d%H%M%S_") + uuid4().hex[:16]
+
+
+class ToolResultStore:
+    """
+    Bounded, content-addressed store of tool results.
+
+    Results are kept once per content digest and referenced by call id, so the same
+    page fetched by many sessions is stored only once. The least recently used call
+    ids are evicted when the number of ids or the total size of the stored contents
+    exceeds its budget.
+    """
+
+    def __init__(self, max_calls: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_calls = max_calls
+        self.max_bytes = max_bytes
+
+        self.__lock = threading.Lock()
+        self.__calls: OrderedDict[str, str] = OrderedDict()  # call id -> digest
+        self.__blobs: Dict[str, list] = {}  # digest -> [content, size, reference count]
+        self.__size = 0
+
+    @staticmethod
+    def digest(content: Any) -> tuple[str, int]:
+        """ Content digest and approximate size in bytes """
+        if isinstance(content, str):
+            data = content.encode("utf-8", "surrogatepass")
+        else:
+            data = dumps(content, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8", "surrogatepass")
+        return sha256(data).hexdigest(), len(data)
+
+    def put(self, call_id: str, content: Any):
+        """ Store the result of a tool call """
+        digest, size = self.digest(content)
+        with self.__lock:
+            if call_id in self.__calls:
+                self.__release(self.__calls.pop(call_id))
+            blob = self.__blobs.get(digest)
+            if blob is None:
+                self.__blobs[digest] = blob = [content, size, 0]
+                self.__size += size
+            blob[2] += 1
+            self.__calls[call_id] = digest
+
+            while self.__calls and (len(self.__calls) > self.max_calls or self.__size > self.max_bytes):
+                _, oldest = self.__calls.popitem(last=False)
+                self.__release(oldest)
+
+    def __release(self, digest: str):
+        blob = self.__blobs[digest]
+        blob[2] -= 1
+        if blob[2] <= 0:
+            del self.__blobs[digest]
+            self.__size -= blob[1]
+
+    def get(self, call_id: str) -> Optional[Any]:
+        """ Result of a tool call, or None if it is unknown or evicted """
+        with self.__lock:
+            digest = self.__calls.get(call_id)
+            if digest is None:
+                return None
+            self.__calls.move_to_end(call_id)
+            return self.__blobs[digest][0]
+
+    def resolve(self, content: Any) -> Any:
+        """ Replace a `<cached_result:{id}>` placeholder with the stored result (if still available) """
+        if isinstance(content, str):
+            match = PLACEHOLDER.match(content)
+            if match:
+                result = self.get(match.group(1))
+                if result is not None:
+                    return result
+        return content
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {"calls": len(self.__calls), "contents": len(self.__blobs), "bytes": self.__size}
+
+
+# Global tool result store instance
+tool_result_store = ToolResultStore()
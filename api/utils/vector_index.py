@@ -0,0 +1,300 @@
+"""
+NumPy vector index persisted as a memory-mapped matrix, with exact top-k search by inner product
+and in-place updates (appended rows plus tombstones, compacted when too many rows are dead).
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from hashlib import sha256
+import numpy as np
+import threading
+import json
+import time
+import os
+
+try:
+    from .chunking import Chunk
+except ImportError:
+    from chunking import Chunk
+
+
+INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "rag"))
+
+
+def content_digest(chunk: Chunk) -> str:
+    """ Hash of the embedded text of a chunk """
+    return sha256(f"{chunk.title}\n{chunk.text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content hash -> embedding store of one embedder, so unchanged text is never embedded twice.
+
+    Vectors are appended to `<path>/<embedder>/vectors.f32` and their digests to `keys.txt`;
+    both files only grow, and a torn append (crash) is cut off on the next load.
+    """
+
+    def __init__(self, path: str, embedder: str, dim: int):
+        self.dim = dim
+        self.path = os.path.join(path, "embeddings", embedder.replace("/", "_"))
+
+        self.__lock = threading.Lock()
+        self.__rows: Optional[Dict[str, int]] = None  # digest -> row, loaded on first use
+        self.__vectors: Optional[np.ndarray] = None
+        self.__keys_bytes = 0
+        self.__stats = {"hits": 0, "misses": 0}
+
+    def __load(self):
+        if self.__rows is not None:
+            return
+        rows: Dict[str, int] = {}
+        try:
+            with open(os.path.join(self.path, "keys.txt"), "r", encoding="utf-8") as file:
+                keys = file.read().split("\n")
+            count = min(len(keys) - 1, os.path.getsize(os.path.join(self.path, "vectors.f32")) // (self.dim * 4))
+            rows = {key: i for i, key in enumerate(keys[:count])}
+        except OSError:
+            count = 0
+        self.__rows = rows
+        self.__keys_bytes = sum(len(key) + 1 for key in rows)  # digests are ASCII
+        self.__map(count)
+
+    def __map(self, count: int):
+        path = os.path.join(self.path, "vectors.f32")
+        self.__vectors = np.memmap(path, dtype=np.float32, mode="r", shape=(count, self.dim)) if count else np.zeros((0, self.dim), np.float32)
+
+    def lookup(self, digests: List[str]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """ (cached vectors by digest, digests that are not cached) """
+        with self.__lock:
+            self.__load()
+            found = {d: np.array(self.__vectors[self.__rows[d]]) for d in digests if d in self.__rows}
+            missing = [d for d in dict.fromkeys(digests) if d not in found]
+            self.__stats["hits"] += len(found)
+            self.__stats["misses"] += len(missing)
+        return found, missing
+
+    def store(self, digests: List[str], vectors: np.ndarray):
+        if not digests:
+            return
+        with self.__lock:
+            self.__load()
+            os.makedirs(self.path, exist_ok=True)
+            count = len(self.__rows)
+            with open(os.path.join(self.path, "vectors.f32"), "ab") as file:
+                file.truncate(count * self.dim * 4)  # Drop a torn append
+                file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with open(os.path.join(self.path, "keys.txt"), "ab") as file:
+                file.truncate(self.__keys_bytes)
+                file.write("".join(d + "\n" for d in digests).encode("ascii"))
+                self.__keys_bytes = file.tell()
+            for digest in digests:
+                self.__rows[digest] = count
+                count += 1
+            self.__map(count)
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {**self.__stats, "entries": len(self.__rows or {})}
+
+
+class VectorIndex:
+    """
+    Unit-length chunk embeddings stored in `<path>/vectors.f32` and opened with `np.memmap`.
+
+    The matrix is paged in by the OS on first use and shared between processes, so loading a
+    large index costs no start-up time. Search is an exact matrix-vector product followed by
+    `argpartition`, which stays in the low milliseconds up to a few hundred thousand chunks.
+    The chunk texts are kept in `chunks.jsonl` in the row order of the matrix.
+
+    Updates replace whole documents (sources): their old rows become tombstones, masked out of
+    every search, and the new rows are appended to both files. Once more than `compact_ratio`
+    of the rows are dead, `compact` rewrites the live rows. `meta.json` is written last and is
+    the commit point: rows beyond its `rows` count (a torn update) are cut off on the next update.
+    """
+
+    def __init__(self, path: str = INDEX_DIR, compact_ratio: float = 0.25):
+        self.path = path
+        self.compact_ratio = compact_ratio
+
+        self.__lock = threading.Lock()
+        self.__vectors: Optional[np.ndarray] = None
+        self.__chunks: List[Chunk] = []
+        self.__dead: Set[int] = set()
+        self.__mask: Optional[np.ndarray] = None  # True for dead rows
+        self.__sources: Dict[str, List[int]] = {}  # source -> live rows
+        self.__meta: Dict[str, Any] = {}
+
+    def __file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def __write_meta(self, meta: Dict[str, Any]):
+        temp = self.__file(f"meta.json.{threading.get_ident()}.tmp")
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        os.replace(temp, self.__file("meta.json"))
+
+    def __index(self, vectors: np.ndarray, chunks: List[Chunk], dead: Set[int], meta: Dict[str, Any]):
+        """ Install a loaded state (called with the lock held) """
+        mask = np.zeros(len(chunks), dtype=bool)
+        mask[list(dead)] = True
+        sources: Dict[str, List[int]] = {}
+        for row, chunk in enumerate(chunks):
+            if row not in dead:
+                sources.setdefault(chunk.source, []).append(row)
+        self.__vectors, self.__chunks, self.__dead, self.__mask, self.__sources, self.__meta = vectors, chunks, dead, mask, sources, meta
+
+    def __map(self, rows: int, dim: int) -> np.ndarray:
+        if not rows:
+            return np.zeros((0, dim), np.float32)
+        return np.memmap(self.__file("vectors.f32"), dtype=np.float32, mode="r", shape=(rows, dim))
+
+    def load(self) -> bool:
+        """ Map the stored index (False if there is none) """
+        try:
+            with open(self.__file("meta.json"), "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(self.__file("chunks.jsonl"), "r", encoding="utf-8") as file:
+                chunks = [Chunk(**json.loads(line)) for _, line in zip(range(meta["rows"]), file)]
+            if len(chunks) != meta["rows"]:
+                return False
+            vectors = self.__map(meta["rows"], meta["dim"])
+        except (OSError, ValueError, TypeError, KeyError):
+            return False
+        with self.__lock:
+            self.__index(vectors, chunks, set(meta.get("tombstones", [])), meta)
+        return True
+
+    def build(self, chunks: List[Chunk], embed, batch_size: int = 64, documents: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Embed every chunk and replace the stored index.
+
+        Args:
+            chunks: Chunks to index
+            embed: `Embedder` turning a list of texts into unit-length float32 rows
+            batch_size: Texts embedded at once
+            documents: Fingerprints of the indexed documents, stored with the index
+
+        Returns:
+            Metadata of the new index
+        """
+        started = time.perf_counter()
+        vectors = np.zeros((len(chunks), embed.dim), np.float32)
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            vectors[start:start + len(batch)] = embed.embed([f"{chunk.title}\n{chunk.text}" for chunk in batch])
+        meta = self.rewrite(chunks, vectors, embed.name, embed.dim, documents)
+        meta["build_seconds"] = round(time.perf_counter() - started, 3)
+        return meta
+
+    def rewrite(self, chunks: List[Chunk], vectors: np.ndarray, embedder: str, dim: int, documents: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """ Replace the stored index with `chunks` and their vectors """
+        os.makedirs(self.path, exist_ok=True)
+        ident = threading.get_ident()
+        with open(self.__file(f"vectors.f32.{ident}.tmp"), "wb") as file:
+            file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self.__file(f"chunks.jsonl.{ident}.tmp"), "wb") as file:
+            for chunk in chunks:
+                file.write((json.dumps(chunk.as_dict(), ensure_ascii=False) + "\n").encode("utf-8"))
+            chunks_bytes = file.tell()
+
+        with self.__lock:
+            meta = {
+                "embedder": embedder, "dim": dim, "rows": len(chunks), "chunks_bytes": chunks_bytes, "tombstones": [],
+                "version": self.__meta.get("version", 0) + 1, "built_at": time.time(), "documents": documents or {}
+            }
+            self.__vectors = None  # Release the old mapping before it is replaced
+            os.replace(self.__file(f"vectors.f32.{ident}.tmp"), self.__file("vectors.f32"))
+            os.replace(self.__file(f"chunks.jsonl.{ident}.tmp"), self.__file("chunks.jsonl"))
+            self.__write_meta(meta)
+            self.__index(self.__map(len(chunks), dim), list(chunks), set(), meta)
+        return {key: value for key, value in meta.items() if key not in ("tombstones", "documents", "chunks_bytes")}
+
+    def update(self, replaced: Dict[str, Tuple[List[Chunk], np.ndarray]], removed: Iterable[str] = (), documents: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+        """
+        Replace and remove whole documents in place.
+
+        Args:
+            replaced: source -> (new chunks, their vectors); the old rows of the source become tombstones
+            removed: Sources to drop
+            documents: Fingerprints of the indexed documents, stored with the index
+
+        Returns:
+            Counts of appended and tombstoned rows
+        """
+        with self.__lock:
+            meta = dict(self.__meta)
+            if not meta:
+                raise ValueError("The index has not been built yet")
+            rows, dim = meta["rows"], meta["dim"]
+            dead = set(self.__dead)
+            for source in set(replaced) | set(removed):
+                dead.update(self.__sources.get(source, ()))
+            appended = [(chunk, vector) for chunks, vectors in replaced.values() for chunk, vector in zip(chunks, vectors)]
+
+            with open(self.__file("vectors.f32"), "ab") as file:
+                file.truncate(rows * dim * 4)  # Drop the rows of a torn update
+                for _, vector in appended:
+                    file.write(np.asarray(vector, dtype=np.float32).tobytes())
+            with open(self.__file("chunks.jsonl"), "r+b") as file:
+                file.truncate(meta["chunks_bytes"])
+                file.seek(meta["chunks_bytes"])
+                for chunk, _ in appended:
+                    file.write((json.dumps(chunk.as_dict(), ensure_ascii=False) + "\n").encode("utf-8"))
+                chunks_bytes = file.tell()
+
+            tombstoned = len(dead) - len(self.__dead)
+            meta.update(rows=rows + len(appended), chunks_bytes=chunks_bytes, tombstones=sorted(dead), version=meta.get("version", 0) + 1, updated_at=time.time())
+            if documents is not None:
+                meta["documents"] = documents
+            self.__write_meta(meta)
+            self.__vectors = None
+            self.__index(self.__map(meta["rows"], dim), self.__chunks + [chunk for chunk, _ in appended], dead, meta)
+        return {"appended": len(appended), "tombstoned": tombstoned}
+
+    def needs_compaction(self) -> bool:
+        with self.__lock:
+            return bool(self.__chunks) and len(self.__dead) > self.compact_ratio * len(self.__chunks)
+
+    def compact(self) -> Dict[str, Any]:
+        """ Rewrite the live rows only """
+        with self.__lock:
+            live = [row for row in range(len(self.__chunks)) if row not in self.__dead]
+            chunks = [self.__chunks[row] for row in live]
+            vectors = np.array(self.__vectors[live]) if live else np.zeros((0, self.__meta["dim"]), np.float32)
+            embedder, dim, documents = self.__meta["embedder"], self.__meta["dim"], self.__meta.get("documents", {})
+        return self.rewrite(chunks, vectors, embedder, dim, documents)
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return dict(self.__meta)
+
+    def chunks(self) -> List[Chunk]:
+        """ Live indexed chunks """
+        with self.__lock:
+            return [chunk for row, chunk in enumerate(self.__chunks) if row not in self.__dead]
+
+    def search(self, query: np.ndarray, k: int = 5) -> List[Tuple[Chunk, float]]:
+        """ Top `k` (chunk, cosine similarity) pairs for a unit-length query vector """
+        with self.__lock:
+            vectors, chunks, mask, dead = self.__vectors, self.__chunks, self.__mask, len(self.__dead)
+        if vectors is None or len(chunks) <= dead:
+            return []
+        scores = vectors @ query.astype(np.float32, copy=False)
+        if dead:
+            scores[mask] = -np.inf
+        k = min(k, len(scores) - dead)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(chunks[i], float(scores[i])) for i in top]
+
+    def __len__(self) -> int:
+        return len(self.__chunks) - len(self.__dead)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.__lock:
+            return {
+                "chunks": len(self.__chunks) - len(self.__dead),
+                "tombstones": len(self.__dead),
+                "documents": len(self.__sources),
+                "version": self.__meta.get("version"),
+                "embedder": self.__meta.get("embedder"),
+                "built_at": self.__meta.get("built_at")
+            }
@@ -1,22 +1,50 @@
-import requests
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List
 from datetime import datetime
 
+try:
+    from .http_client import http_client, HTTPError
+    from .geocoding import geocode_cache
+    from .fanout import fetch_all
+except ImportError:
+    from http_client import http_client, HTTPError
+    from geocoding import geocode_cache
+    from fanout import fetch_all
+
+
 
 class WeatherAPI:
     """Weather API wrapper using Open-Meteo (free service, no API key required)."""
     
     def __init__(self):
         """Initialize Weather API client."""
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        }
         self.base_url = "https://api.open-meteo.com/v1"
         self.geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
     
     def get_coordinates(self, location: str) -> Dict[str, Any]:
+        """
+        Get coordinates for a location (gazetteer and persistent cache first, then the geocoding API).
+        
+        Args:
+            location: City name or location
+            
+        Returns:
+            Dict with latitude, longitude, and location info
+        """
+        return geocode_cache.lookup(location, self._geocode)
+
+    def resolve_locations(self, locations: List[str]) -> List[Dict[str, Any]]:
+        """ Coordinates of several locations, geocoding the unknown ones in parallel """
+        outcomes = fetch_all(
+            self.get_coordinates, list(locations), deadline=15, hedge_percentile=None,
+            is_failure=lambda result: "error" in result and not result.get("not_found")
+        )
+        return [outcomes[location].value if outcomes[location].ok else {"error": outcomes[location].error} for location in locations]
+
+    def _geocode(self, location: str) -> Dict[str, Any]:
         """
         Get coordinates for a location using Open-Meteo geocoding API.
         
@@ -34,13 +62,13 @@ class WeatherAPI:
                 'format': 'json'
             }
             
-            response = self.session.get(self.geocoding_url, params=params, timeout=10)
+            response = http_client.get(self.geocoding_url, params=params, headers=self.headers, timeout=10)
             response.raise_for_status()
             
             data = response.json()
             
             if not data.get('results'):
-                return {"error": f"Location '{location}' not found"}
+                return {"error": f"Location '{location}' not found", "not_found": True}
             
             location_data = data['results'][0]
             return {
@@ -51,43 +79,61 @@ class WeatherAPI:
                 "admin1": location_data.get('admin1', ''),  # State/Province
             }
             
-        except requests.exceptions.RequestException as e:
+        except HTTPError as e:
             return {"error": f"Geocoding request failed: {str(e)}"}
         except Exception as e:
             return {"error": f"Geocoding error: {str(e)}"}
     
-    def get_weather_data(self, location: str, unit: str = "celsius") -> Dict[str, Any]:
+    def _fetch_forecast(self, coordinates: List[Dict[str, Any]], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ One Open-Meteo call for many coordinates (comma separated), one response per coordinate """
+        params = dict(params)
+        params['latitude'] = ",".join(str(coord['latitude']) for coord in coordinates)
+        params['longitude'] = ",".join(str(coord['longitude']) for coord in coordinates)
+        
+        response = http_client.get(f"{self.base_url}/forecast", params=params, headers=self.headers, timeout=10)
+        response.raise_for_status()
+        
+        data = response.json()
+        return data if isinstance(data, list) else [data]  # a single coordinate returns an object
+
+    def _batch(self, locations: List[str], params: Dict[str, Any], parse) -> List[Dict[str, Any]]:
+        """ Resolve the locations, fetch them in a single call and parse each response """
+        try:
+            coordinates = self.resolve_locations(locations)
+            found = [coord for coord in coordinates if "error" not in coord]
+            responses = self._fetch_forecast(found, params) if found else []
+            
+            results, responses = [], iter(responses)
+            for coord in coordinates:
+                results.append(coord if "error" in coord else parse(coord, next(responses, {})))
+            return results
+            
+        except HTTPError as e:
+            return [{"error": f"Network error: {str(e)}"} for _ in locations]
+        except json.JSONDecodeError:
+            return [{"error": "Invalid response from weather service"} for _ in locations]
+        except Exception as e:
+            return [{"error": f"Unexpected error: {str(e)}"} for _ in locations]
+
+    def get_weather_batch(self, locations: List[str], unit: str = "celsius") -> List[Dict[str, Any]]:
         """
-        Get current weather data using Open-Meteo API.
+        Get current weather data for several locations with a single Open-Meteo call.
         
         Args:
-            location: City name
+            locations: City names
             unit: Temperature unit (celsius/fahrenheit)
             
         Returns:
-            Dict containing weather data or error
+            List of weather data (or error) dicts in the order of `locations`
         """
-        try:
-            # Get coordinates first
-            coord_data = self.get_coordinates(location)
-            if "error" in coord_data:
-                return coord_data
-            
-            # Get current weather
-            params = {
-                'latitude': coord_data['latitude'],
-                'longitude': coord_data['longitude'],
-                'current': 'temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m,wind_direction_10m,surface_pressure',
-                'timezone': 'auto'
-            }
-            
-            if unit == "fahrenheit":
-                params['temperature_unit'] = 'fahrenheit'
-            
-            response = self.session.get(f"{self.base_url}/forecast", params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+        params = {
+            'current': 'temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m,wind_direction_10m,surface_pressure',
+            'timezone': 'auto'
+        }
+        if unit == "fahrenheit":
+            params['temperature_unit'] = 'fahrenheit'
+        
+        def parse(coord_data: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
             current = data.get('current', {})
             
             # Map weather code to condition
@@ -109,49 +155,31 @@ class WeatherAPI:
                 "timestamp": current.get('time', datetime.now().isoformat()),
                 "source": "Open-Meteo"
             }
-            
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Network error: {str(e)}"}
-        except json.JSONDecodeError:
-            return {"error": "Invalid response from weather service"}
-        except Exception as e:
-            return {"error": f"Unexpected error: {str(e)}"}
-    
-    def get_forecast_data(self, location: str, days: int = 7, unit: str = "celsius") -> Dict[str, Any]:
+        
+        return self._batch(locations, params, parse)
+
+    def get_forecast_batch(self, locations: List[str], days: int = 7, unit: str = "celsius") -> List[Dict[str, Any]]:
         """
-        Get weather forecast data using Open-Meteo API.
+        Get weather forecast data for several locations with a single Open-Meteo call.
         
         Args:
-            location: City name
+            locations: City names
             days: Number of days (0-15)
             unit: Temperature unit
             
         Returns:
-            Dict containing forecast data or error
+            List of forecast data (or error) dicts in the order of `locations`
         """
-        try:
-            # Get coordinates first
-            coord_data = self.get_coordinates(location)
-            if "error" in coord_data:
-                return coord_data
-            
-            # Get forecast
-            days += 1  # Include today in forecast
-            params = {
-                'latitude': coord_data['latitude'],
-                'longitude': coord_data['longitude'],
-                'daily': 'weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max,wind_direction_10m_dominant',
-                'timezone': 'auto',
-                'forecast_days': min(days, 16)  # Open-Meteo supports up to 16 days
-            }
-            
-            if unit == "fahrenheit":
-                params['temperature_unit'] = 'fahrenheit'
-            
-            response = self.session.get(f"{self.base_url}/forecast", params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+        days += 1  # Include today in forecast
+        params = {
+            'daily': 'weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max,wind_direction_10m_dominant',
+            'timezone': 'auto',
+            'forecast_days': min(days, 16)  # Open-Meteo supports up to 16 days
+        }
+        if unit == "fahrenheit":
+            params['temperature_unit'] = 'fahrenheit'
+        
+        def parse(coord_data: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
             daily = data.get('daily', {})
             
             if not daily:
@@ -178,13 +206,35 @@ class WeatherAPI:
                 "unit": unit,
                 "source": "Open-Meteo"
             }
+        
+        return self._batch(locations, params, parse)
+
+    def get_weather_data(self, location: str, unit: str = "celsius") -> Dict[str, Any]:
+        """
+        Get current weather data using Open-Meteo API.
+        
+        Args:
+            location: City name
+            unit: Temperature unit (celsius/fahrenheit)
             
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Network error: {str(e)}"}
-        except json.JSONDecodeError:
-            return {"error": "Invalid response from weather service"}
-        except Exception as e:
-            return {"error": f"Unexpected error: {str(e)}"}
+        Returns:
+            Dict containing weather data or error
+        """
+        return self.get_weather_batch([location], unit)[0]
+    
+    def get_forecast_data(self, location: str, days: int = 7, unit: str = "celsius") -> Dict[str, Any]:
+        """
+        Get weather forecast data using Open-Meteo API.
+        
+        Args:
+            location: City name
+            days: Number of days (0-15)
+            unit: Temperature unit
+            
+        Returns:
+            Dict containing forecast data or error
+        """
+        return self.get_forecast_batch([location], days, unit)[0]
     
     def _get_weather_condition(self, weather_code: int) -> str:
         """Convert Open-Meteo weather code to condition string."""
@@ -333,6 +383,73 @@ def get_weather_forecast(location: str, days: int = 7, unit: str = "celsius") ->
     return response
 
 
+def get_weather_multi(locations: List[str], days: int = 0, unit: str = "celsius") -> str:
+    """
+    Get current weather (days = 0) or a forecast for several locations at once.
+    All locations are fetched with a single Open-Meteo call.
+    
+    Args:
+        locations: Location names (up to 20)
+        days: 0 for the current weather, otherwise the number of days to forecast (1-16)
+        unit: Temperature unit
+        
+    Returns:
+        Formatted comparison string
+    """
+    if unit not in ["celsius", "fahrenheit"]:
+        raise ValueError("Unit must be 'celsius' or 'fahrenheit'.")
+    
+    if isinstance(locations, str):
+        locations = locations.split(",")
+    locations = list(dict.fromkeys(location.strip() for location in locations if location.strip()))[:20]
+    if not locations:
+        return "Error getting weather: no locations given"
+    
+    days = min(max(days, 0), 16)
+    unit_symbol = "°C" if unit == "celsius" else "°F"
+    
+    if days == 0:
+        results = weather_api.get_weather_batch(locations, unit)
+        response = f"Current weather in {len(locations)} locations:\n"
+    else:
+        results = weather_api.get_forecast_batch(locations, days, unit)
+        response = f"Weather forecast for {len(locations)} locations ({days} days):\n"
+    
+    if all("error" in data for data in results):
+        return f"Error getting weather for {', '.join(locations)}: {results[0]['error']}"
+    
+    for location, data in zip(locations, results):
+        if "error" in data:
+            response += f"\n📍 {location}: {data['error']}\n"
+            continue
+        
+        # Build location string
+        location_str = data['location']
+        if data.get('admin1') and data['admin1'] != data['location']:
+            location_str += f", {data['admin1']}"
+        if data.get('country'):
+            location_str += f", {data['country']}"
+        
+        if days == 0:
+            wind_dir = weather_api._get_wind_direction_text(data['wind_direction'])
+            response += (
+                f"\n📍 {location_str}: 🌡️ {data['temperature']}{unit_symbol} (feels like {data['feels_like']}{unit_symbol}), "
+                f"☁️ {data['condition']}, 💧 {data['humidity']}%, 💨 {data['wind_speed']} m/s {wind_dir}\n"
+            )
+            continue
+        
+        response += f"\n📍 {location_str}\n"
+        for day_data in data['forecast_days']:
+            condition = weather_api._get_weather_condition(day_data['weather_code'])
+            line = f"   📅 {day_data['date']}: {round(day_data['max_temp'], 1)}/{round(day_data['min_temp'], 1)}{unit_symbol}, {condition}"
+            if day_data['precipitation'] > 0:
+                line += f", 🌧️ {round(day_data['precipitation'], 1)} mm"
+            response += line + "\n"
+    
+    response += "\n📡 Source: Open-Meteo"
+    return response
+
+
 # Example usage and test cases
 if __name__ == '__main__':
     test_locations = ["Seoul", "New York", "London", "Tokyo", "Sydney"]
@@ -398,6 +515,11 @@ if __name__ == '__main__':
     print(f"Requested 25 days, got {day_count} days (should be 16)")
     print(extreme_forecast[:500] + "..." if len(extreme_forecast) > 500 else extreme_forecast)
     
+    print("\nTesting multiple locations (one Open-Meteo call):")
+    print("-" * 30)
+    print(get_weather_multi(["Cheonan", "서울", "Busan", "Tokyo"]))
+    print(get_weather_multi(["Cheonan", "Asan"], days=3))
+    
     print("\nTesting negative days (should clamp to 1):")
     print("-" * 30)
     negative_forecast = get_weather_forecast("Seoul", -5)
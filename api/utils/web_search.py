@@ -1,9 +1,28 @@
-import requests
 import json
 from typing import List, Dict, Optional, Any
 from urllib.parse import urlparse, quote_plus
+from datetime import datetime
+import time
 import os
 
+try:
+    from .http_client import http_client, HTTPError
+    from .page_cache import page_cache, MAX_BODY_BYTES
+    from .extract import html_extractor, strip_boilerplate
+    from .search_race import SearchRace, is_failed
+    from .fanout import fetch_all, RetryPolicy
+    from .bm25 import BM25Index
+    from .chunking import split_text
+except ImportError:
+    from http_client import http_client, HTTPError
+    from page_cache import page_cache, MAX_BODY_BYTES
+    from extract import html_extractor, strip_boilerplate
+    from search_race import SearchRace, is_failed
+    from fanout import fetch_all, RetryPolicy
+    from bm25 import BM25Index
+    from chunking import split_text
+
+
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -27,15 +46,20 @@ class WebSearchAPI:
     
     def __init__(self):
         """Initialize web search client."""
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        }
         # API key should be set as environment variable: SERPAPI_KEY
         self.api_key = os.getenv('SERPAPI_KEY')
         
         # Try to import SerpApi library
         self.serpapi_available = self._check_serpapi_library()
+
+        # Engines raced by `search_web` (seconds before the next engine is started: SEARCH_HEDGE_DELAY)
+        self.race = SearchRace(
+            {"serpapi": self.search_serpapi, "bing": self.search_bing},
+            hedge_delay=float(os.getenv('SEARCH_HEDGE_DELAY', 1.5))
+        )
     
     def _check_serpapi_library(self) -> bool:
         """Check if SerpApi library is available."""
@@ -137,6 +161,19 @@ class WebSearchAPI:
         except Exception as e:
             return [{'error': f"SerpApi library error: {str(e)}"}]
     
+    def search_serpapi(self, query: str, max_results: int = 10, engine: str = "google") -> List[Dict[str, str]]:
+        """SerpApi search with the official library, or direct requests if it is not installed."""
+        if not self.api_key:
+            return [{'error': "SerpApi API key not found"}]
+        results = self.search_serpapi_library(query, max_results, engine)
+        if results and 'error' in results[0] and 'library not installed' in results[0]['error']:
+            results = self.search_serpapi_requests(query, max_results, engine)
+        return results
+
+    def search_bing(self, query: str, max_results: int = 10, engine: str = "google") -> List[Dict[str, str]]:
+        """Bing scraping with the signature of the raced engines (`engine` is a SerpApi option)."""
+        return self.search_fallback_bing(query, max_results)
+
     def search_serpapi_requests(self, query: str, max_results: int = 10, engine: str = "google") -> List[Dict[str, str]]:
         """
         Search using SerpApi via direct HTTP requests (fallback).
@@ -161,7 +198,7 @@ class WebSearchAPI:
                 'output': 'json'
             }
             
-            response = self.session.get("https://serpapi.com/search", params=params, timeout=30)
+            response = http_client.get("https://serpapi.com/search", params=params, headers=self.headers, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -188,7 +225,7 @@ class WebSearchAPI:
             
             return results
             
-        except requests.exceptions.RequestException as e:
+        except HTTPError as e:
             return [{'error': f"SerpApi request failed: {str(e)}"}]
         except json.JSONDecodeError:
             return [{'error': "Invalid JSON response from SerpApi"}]
@@ -212,7 +249,7 @@ class WebSearchAPI:
             # Bing search URL
             search_url = f"https://www.bing.com/search?q={quote_plus(query)}&count={min(max_results, 50)}"
             
-            response = self.session.get(search_url, timeout=15)
+            response = http_client.get(search_url, headers=self.headers, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -251,23 +288,16 @@ class WebSearchAPI:
         except Exception as e:
             return [{'error': f"Bing fallback failed: {str(e)}"}]
     
-    def search_comprehensive_fallback(self, query: str, max_results: int = 10) -> List[Dict[str, str]]:
+    def search_guidance(self, query: str) -> List[Dict[str, str]]:
         """
-        Comprehensive fallback search trying multiple sources.
-        
+        Synthetic results with helpful guidance, used when every search engine failed.
+
         Args:
             query: Search query
-            max_results: Maximum number of results to return
-            
+
         Returns:
-            List of search results
+            List of guidance results
         """
-        # Try Bing fallback
-        results = self.search_fallback_bing(query, max_results)
-        if results and 'error' not in results[0]:
-            return results
-        
-        # If all else fails, create synthetic results with helpful guidance
         return [{
             'title': f"Search guidance for: {query}",
             'link': f"https://www.google.com/search?q={quote_plus(query)}",
@@ -306,25 +336,10 @@ def search_web(query: str, max_results: int = 10, engine: str = "google") -> str
         max_results = 10
     
     try:
-        # Try SerpApi library first
-        if web_search_api.api_key:
-            results = web_search_api.search_serpapi_library(query, max_results, engine)
-            
-            # If library method fails, try direct requests
-            if results and 'error' in results[0] and 'library not installed' in results[0]['error']:
-                results = web_search_api.search_serpapi_requests(query, max_results, engine)
-        else:
-            results = [{'error': "SerpApi API key not found"}]
-        
-        # If SerpApi fails, try fallback
-        if results and 'error' in results[0]:
-            if 'API key not found' in results[0]['error']:
-                results = web_search_api.search_comprehensive_fallback(query, max_results)
-            else:
-                # For other SerpApi errors, still try fallback
-                fallback_results = web_search_api.search_comprehensive_fallback(query, max_results)
-                if fallback_results and 'error' not in fallback_results[0]:
-                    results = fallback_results
+        # Race SerpApi and Bing (cached by normalised query); guidance only if every engine failed
+        _, results = web_search_api.race.search(query, max_results, engine)
+        if is_failed(results):
+            results = web_search_api.search_guidance(query)
         
         if not results:
             return f"No search results found for: {query}"
@@ -373,13 +388,20 @@ def search_website(query: str, site_url: Optional[str] = None, max_results: int
         return search_web(query, max_results)
 
 
-def fetch_webpage(url: str, extract_text: bool = True, length_limit: int = 5000) -> Dict[str, Any]:
+def fetch_webpage(url: str, extract_text: bool = True, length_limit: int = 5000, max_bytes: int = MAX_BODY_BYTES) -> Dict[str, Any]:
     """
     Fetch and parse a webpage.
+
+    Pages go through the on-disk page cache: unchanged pages are revalidated with a
+    conditional request and their extracted text is reused without parsing the HTML.
+    The download stops after `max_bytes` and text extraction stops once `length_limit`
+    characters (plus a margin for boilerplate removal) have been extracted.
     
     Args:
         url: URL to fetch
         extract_text: Whether to extract text content
+        length_limit: Maximum length of the text content (negative values cut from the end)
+        max_bytes: Download budget of the response body
         
     Returns:
         Dictionary with webpage data
@@ -390,55 +412,46 @@ def fetch_webpage(url: str, extract_text: bool = True, length_limit: int = 5000)
         if not parsed_url.scheme or not parsed_url.netloc:
             return {"error": "Invalid URL format"}
         
-        response = requests.get(url, timeout=15, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        response.raise_for_status()
+        try:
+            page, stale = page_cache.fetch(url, timeout=15, max_bytes=max_bytes), None
+        except HTTPError as e:
+            page, stale = page_cache.cached(url), e  # Serve the last good copy while the site is unreachable
+            if page is None:
+                raise
         
         # Extract basic information
         result = {
             "url": url,
-            "status_code": response.status_code,
+            "status_code": page.status_code,
             "title": "",
             "description": "",
             "text_content": "",
-            "content_length": len(response.content)
+            "content_length": page.content_length
         }
+        if page.truncated:
+            result["truncated"] = True
+        if stale is not None:
+            result["stale"] = True
+            result["refresh_error"] = str(stale)
+            result["fetched_at"] = datetime.fromtimestamp(page.checked_at).isoformat(timespec="seconds")
+            result["age"] = round(time.time() - page.checked_at)
         
-        # Try to parse HTML if BeautifulSoup is available
-        try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title_tag = soup.find('title')
-            if title_tag:
-                result["title"] = title_tag.get_text(strip=True)
-            
-            # Extract meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc:
-                result["description"] = meta_desc.get('content', '')
-            
-            if extract_text:
-                # Remove script and style elements
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                
-                # Get text content
-                text = soup.get_text()
-                # Clean up text
-                lines = (line.strip() for line in text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                result["text_content"] = ' '.join(chunk for chunk in chunks if chunk)[:length_limit]  # Limit length
-        
-        except ImportError:
-            # If BeautifulSoup not available, return raw content info
-            result["text_content"] = "BeautifulSoup4 not available - raw content extraction not supported"
+        # Extract text with the fastest installed HTML backend, dropping known site boilerplate
+        if length_limit >= 0:
+            max_chars = length_limit + 4096 if extract_text else 0
+            extracted = page_cache.extract(
+                page, f"{html_extractor.cache_name}.{max_chars}", lambda body: html_extractor.extract(body, max_chars=max_chars)
+            )
+        else:
+            extracted = page_cache.extract(page, html_extractor.cache_name, html_extractor.extract)
+        result["title"] = extracted["title"]
+        result["description"] = extracted["description"]
+        if extract_text:
+            result["text_content"] = strip_boilerplate(page.final_url, extracted["text_content"])[:length_limit]  # Limit length
         
         return result
         
-    except requests.exceptions.RequestException as e:
+    except HTTPError as e:
         return {"error": f"Failed to fetch webpage: {str(e)}"}
     except Exception as e:
         return {"error": f"Error parsing webpage: {str(e)}"}
@@ -473,6 +486,82 @@ def get_webpage_text(url: str) -> str:
     return output
 
 
+RESEARCH_PAGE_BYTES = 512 * 1024  # download budget of each page fetched by `research`
+RESEARCH_PAGE_CHARS = 20000  # extracted characters of each page searched for passages
+
+
+def research(query: str, top_k: int = 3, max_passages: int = 6, max_chars: int = 4000) -> str:
+    """
+    Search the web, fetch the top result pages in parallel and return the passages relevant to the query.
+
+    Combines `search_web` and one `fetch_webpage` per hit into a single call: pages are downloaded
+    concurrently with a byte budget, split into passages and ranked by BM25 against the query.
+    Every passage is cited with the number of its source.
+
+    Args:
+        query (str): The research question or search query
+        top_k (int): Number of result pages to read (default: 3)
+        max_passages (int): Maximum number of passages to return (default: 6)
+        max_chars (int): Character budget of the returned passages (default: 4000)
+
+    Returns:
+        str: Sources and cited passages, or an error message
+    """
+    if not query.strip():
+        return "Error: Search query cannot be empty"
+    top_k = min(max(top_k, 1), 8)
+    max_passages = min(max(max_passages, 1), 20)
+
+    try:
+        _, results = web_search_api.race.search(query, max(top_k * 2, 5))
+        if is_failed(results):
+            return f"Search error: {results[0]['error'] if results else 'No results'}"
+        hits = [result for result in results if urlparse(result.get('link', '')).scheme in ("http", "https")][:top_k]
+        if not hits:
+            return f"No search results found for: {query}"
+
+        pages = fetch_all(
+            lambda url: fetch_webpage(url, length_limit=RESEARCH_PAGE_CHARS, max_bytes=RESEARCH_PAGE_BYTES),
+            [hit['link'] for hit in hits], deadline=20, retry=RetryPolicy(attempts=2)
+        )
+
+        index = BM25Index()
+        passages: Dict[tuple, str] = {}
+        for number, hit in enumerate(hits, 1):
+            outcome = pages[hit['link']]
+            texts = split_text(outcome.value.get('text_content', ''), size=500, overlap=0) if outcome.ok else []
+            if hit.get('snippet'):
+                texts.append(hit['snippet'])  # Unreadable pages are still represented by their snippet
+            for i, text in enumerate(texts):
+                passages[(number, i)] = text
+                index.add((number, i), text)
+
+        ranked = [doc_id for doc_id, _ in index.search(query, k=max_passages)]
+        if not ranked:  # No term in common with the query: lead passage of each source
+            ranked = [(number, 0) for number in range(1, len(hits) + 1) if (number, 0) in passages][:max_passages]
+
+        output = f"Research results for: '{query}'\n"
+        output += "=" * 50 + "\n\nSources:\n"
+        for number, hit in enumerate(hits, 1):
+            outcome = pages[hit['link']]
+            title = outcome.value.get('title') if outcome.ok else None
+            note = "" if outcome.ok else " (page unavailable, search snippet only)"
+            output += f"[{number}] {title or hit['title']} - {hit['link']}{note}\n"
+
+        output += "\nRelevant passages:\n"
+        budget = max_chars
+        for number, i in ranked:
+            text = passages[(number, i)][:budget]
+            if not text:
+                break
+            output += f"[{number}] {text}\n\n"
+            budget -= len(text)
+        return output.rstrip() + "\n"
+
+    except Exception as e:
+        return f"Error performing research: {str(e)}"
+
+
 # Example usage and test cases
 if __name__ == '__main__':
     test_queries = [
@@ -20,6 +20,18 @@ import urllib.parse
 from api.settings import STATIC_DIR, MODEL_LIST, Session
 from api.system import system_prompt, welcome_message
 from api.models.config import ChatHistory
+from api.utils.executor import tool_executor
+from api.utils.cache import tool_cache
+from api.utils.http_client import http_client
+from api.utils.page_cache import page_cache
+from api.utils.fanout import fanout
+from api.utils.geocoding import geocode_cache
+from api.utils.currency import currency_api
+from api.utils.web_search import web_search_api
+from api.utils.embedding import document_search
+from api.utils.answer_cache import answer_cache
+from api.utils.response_cache import response_cache
+from api.functions.mirror import site_mirror
 
 
 class Message(BaseModel):
@@ -40,6 +52,19 @@ app.mount("/dashboard", StaticFiles(directory=STATIC_DIR, html=True), name="dash
 app.mount("/data", StaticFiles(directory="data"), name="data")
 
 
+@app.on_event("startup")
+def start_site_mirror():
+    """ Keep the center website mirrored in the background and the document index in step with it """
+    site_mirror.add_listener(lambda urls: document_search.refresh_in_background())
+    document_search.refresh_in_background()
+    site_mirror.start()
+
+
+@app.on_event("shutdown")
+def stop_site_mirror():
+    site_mirror.stop()
+
+
 @app.get("/")
 def index():
     """ Serve the main HTML page """
@@ -51,6 +76,17 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/tools/stats")
+def tool_stats():
+    """ Tool executor queue depth, latency, tool cache, answer cache and response cache hit-rate counters """
+    return dict(
+        executor=tool_executor.stats(), cache=tool_cache.stats(), http=http_client.stats(), pages=page_cache.stats(),
+        mirror=site_mirror.stats(), fanout=fanout.stats(), geocode=geocode_cache.stats(), rates=currency_api.rate_table.stats(),
+        search=web_search_api.race.stats(), documents=document_search.stats(), answers=answer_cache.stats(),
+        responses=response_cache.stats()
+    )
+
+
 @app.get("/api/models")
 def models():
     """ List available models """
@@ -213,8 +249,12 @@ async def chat_with_streaming(websocket: WebSocket):
     await websocket.accept()
 
     try:
-        session_id = json.loads(await websocket.receive_text()).get("session_id")
-        session = Session(session_id=session_id)
+        options = json.loads(await websocket.receive_text())
+        session = Session(session_id=options.get("session_id"))
+        # Deterministic mode: a fixed sampling seed or greedy decoding (kiosk presets: CHAT_SEED)
+        seed = options.get("seed", os.getenv("CHAT_SEED"))
+        seed = int(seed) if seed not in (None, "") else None
+        generation = dict(temperature=0.0) if options.get("greedy") else {}
     except Exception:
         traceback.print_exc()
         await websocket.close(code=1008, reason="Invalid session ID or model not found.")
@@ -232,12 +272,19 @@ async def chat_with_streaming(websocket: WebSocket):
             user_prompt,
             system_prompt(model_name),
             print_output=True,
+            seed=seed,
+            **generation
         )
         del model
     
-    for token in run():
-        await websocket.send_text(token)
-        await asyncio.sleep(0.0001)  # 0.1ms delay between tokens
+    # The model and the tool waits block: advance the generator in a worker thread, off the event loop
+    tokens, end = run(), object()
+    try:
+        while (token := await asyncio.to_thread(next, tokens, end)) is not end:
+            await websocket.send_text(token)
+            await asyncio.sleep(0.0001)  # 0.1ms delay between tokens
+    finally:
+        await asyncio.to_thread(tokens.close)
 
     await websocket.send_text("<EOS>")  # EOS token to signal the end of the conversation
     await websocket.close()
@@ -0,0 +1,51 @@
+"""
+Program and notice records parsed from the synthetic center pages (data/fixtures/synthetic).
+"""
+from datetime import date
+
+import pytest
+
+from api.functions.program import PROGRAM_SECTIONS
+from api.functions.records import ENDED, ONGOING, UPCOMING, RecordIndex, parse_records
+from api.utils.chunking import load_fixture_pages
+from api.utils.extract import SYNTHETIC_DIR
+
+
+TODAY = date(2025, 6, 1)
+
+
+@pytest.fixture(scope="module")
+def pages():
+    return {page["url"].rsplit("/", 1)[-1]: page["text_content"] for page in load_fixture_pages(SYNTHETIC_DIR)}
+
+
+def test_program_titles_and_statuses(pages):
+    records = parse_records(pages["41"], PROGRAM_SECTIONS)
+    assert [(record.title, record.section, record.status(TODAY)) for record in records] == [
+        ("2025 마을학교 목공 교육 참여자 모집", "진행 중", ONGOING),
+        ("도시재생 주민 리더 아카데미", "진행 예정", UPCOMING),
+        ("2024 도시재생 대학 기초과정", "진행 완료", ENDED),
+        ("골목길 가드닝 주민 워크숍", "진행 완료", ENDED),
+    ]
+    assert records[0].application == (date(2025, 5, 19), date(2025, 6, 6))
+    assert records[0].event == (date(2025, 6, 10), date(2025, 7, 15))
+
+
+def test_notice_titles_keep_their_posted_dates(pages):
+    index = RecordIndex(parse_records(pages["new"], default_slot="posted"))
+    records = index.query(today=TODAY, newest_first=True)
+    assert [(record.title, record.posted) for record in records] == [
+        ("2025 마을학교 목공 교육 참여자 모집 안내", date(2025, 5, 19)),
+        ("천안시 도시재생지원센터 휴무 안내", date(2025, 4, 30)),
+        ("도시재생 주민공모사업 선정 결과 공고", date(2025, 4, 28)),
+    ]
+    assert all(record.application is None and record.event is None for record in records)
+    assert records[0].describe(TODAY) == "2025 마을학교 목공 교육 참여자 모집 안내 | 게시 2025-05-19"
+
+
+def test_only_explicit_labels_open_an_application_window():
+    records = parse_records("도시재생 사진 공모전 접수 2025.08.01 주민 설명회 참가 신청기간 2025.08.04 ~ 08.08", default_slot="posted")
+    assert [(record.title, record.posted, record.application) for record in records] == [
+        ("도시재생 사진 공모전 접수", date(2025, 8, 1), None),
+        ("주민 설명회 참가", None, (date(2025, 8, 4), date(2025, 8, 8))),
+    ]